@@ -0,0 +1,161 @@
+"""
+Durable storage for conversational chat feedback and user profiles.
+Feedback is an append-only log written in batches; profiles are appended as versions.
+DB-backed with in-memory fallback, like the adherence routes.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+
+from . import database
+from .models import ChatFeedback, ChatUserProfile
+
+FEEDBACK_BATCH_SIZE = 50
+FEEDBACK_FLUSH_SECONDS = 2.0
+MAX_FALLBACK_ENTRIES = 5000
+FEEDBACK_STATS_TTL_SECONDS = 5.0
+
+
+class FeedbackLog:
+    """Buffers feedback rows and inserts them in one statement per batch.
+
+    Rating counts and averages are aggregated in the database (indexed on created_at), so every
+    worker reports the same numbers; results are cached for a few seconds.
+    """
+
+    def __init__(self, batch_size: int = FEEDBACK_BATCH_SIZE, flush_seconds: float = FEEDBACK_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stats: Dict[Optional[int], Tuple[float, Dict]] = {}
+        # Emergency fallback if DB is unavailable (bounded, newest kept); retried on the next flush.
+        self.fallback: List[Dict] = []
+
+    def append(self, entry: Dict) -> None:
+        entry.setdefault("created_at", datetime.utcnow())
+        with self._lock:
+            self._pending.append(entry)
+            full = len(self._pending) >= self.batch_size
+        self._ensure_flusher()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self.fallback + self._pending, []
+                self.fallback = []
+            if not batch:
+                return 0
+            rows = [
+                {
+                    "feedback_id": e["id"],
+                    "session_id": e["session_id"],
+                    "user_id": e.get("user_id"),
+                    "message_id": e.get("message_id"),
+                    "rating": int(e["rating"]),
+                    "feedback": e.get("feedback"),
+                    "created_at": e["created_at"],
+                }
+                for e in batch
+            ]
+            db = database.SessionLocal()
+            try:
+                db.execute(insert(ChatFeedback), rows)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"⚠ Chat feedback flush failed, keeping {len(batch)} entries in memory: {e}")
+                with self._lock:
+                    self.fallback = (batch + self.fallback)[-MAX_FALLBACK_ENTRIES:]
+            finally:
+                db.close()
+            return len(batch)
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+
+            def _loop():
+                while not self._stop.wait(self.flush_seconds):
+                    self.flush()
+
+            self._flusher = threading.Thread(target=_loop, name="chat-feedback-flusher", daemon=True)
+            self._flusher.start()
+
+    def close(self) -> int:
+        """Stop the flusher and write out everything still buffered (called on shutdown)."""
+        self._stop.set()
+        return self.flush()
+
+    def stats(self, window_seconds: Optional[int] = None) -> Dict:
+        """Count and average rating of all feedback, or of the last `window_seconds`, from the table."""
+        cached = self._stats.get(window_seconds)
+        if cached is not None and time.monotonic() - cached[0] < FEEDBACK_STATS_TTL_SECONDS:
+            return cached[1]
+        stmt = select(func.count(ChatFeedback.id), func.coalesce(func.sum(ChatFeedback.rating), 0))
+        if window_seconds is not None:
+            stmt = stmt.where(ChatFeedback.created_at >= datetime.utcnow() - timedelta(seconds=window_seconds))
+        db = database.SessionLocal()
+        try:
+            count, rating_sum = db.execute(stmt).one()
+        except Exception as e:
+            if cached is None:
+                raise
+            print(f"⚠ Chat feedback stats served stale: {e}")
+            return cached[1]
+        finally:
+            db.close()
+        count = int(count or 0)
+        result = {"count": count, "average_rating": round(int(rating_sum or 0) / count, 2) if count else 0}
+        self._stats[window_seconds] = (time.monotonic(), result)
+        return result
+
+
+feedback_log = FeedbackLog()
+
+# Emergency fallback if DB is unavailable.
+_profile_fallback: Dict[str, Dict] = {}
+
+
+def save_profile(user_id: str, profile: Dict) -> None:
+    db = database.SessionLocal()
+    try:
+        db.add(ChatUserProfile(user_id=user_id, profile_json=json.dumps(profile)))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠ Chat profile stored in memory only: {e}")
+        _profile_fallback[user_id] = profile
+    finally:
+        db.close()
+
+
+def get_profile(user_id: str) -> Optional[Dict]:
+    db = database.SessionLocal()
+    try:
+        row = db.execute(
+            select(ChatUserProfile.profile_json)
+            .where(ChatUserProfile.user_id == user_id)
+            .order_by(ChatUserProfile.id.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+        if row is not None:
+            return json.loads(row)
+    except Exception as e:
+        print(f"⚠ Chat profile read from memory: {e}")
+    finally:
+        db.close()
+    return _profile_fallback.get(user_id)
@@ -13,6 +13,7 @@ Enhanced with:
 from __future__ import annotations
 
 import re
+import threading
 import unicodedata
 from collections import Counter
 from typing import Any, Dict, List, Optional, Tuple
@@ -22,6 +23,8 @@ from difflib import SequenceMatcher
 import numpy as np
 import pandas as pd
 
+from .food_index import FoodNameIndex, normalize_food_name
+
 
 # ---------------------------------------------------------------------------
 # GLOBAL SYNONYM / ALIAS MAP
@@ -200,6 +203,7 @@ class FitnessChatbot:
         self.datasets: Dict[str, pd.DataFrame] = {}
         self.dataset_metadata: Dict[str, Dict[str, Any]] = {}
         self.qa_cache: Dict[str, str] = {}  # Cache for QA responses
+        self.cache_stats: Dict[str, Dict[str, int]] = {}  # Hit/miss counters per cache
         self.inferred_knowledge: Dict[str, Any] = {}  # Dynamic knowledge base
         self.vocabulary: set = set()  # Dynamic vocabulary from datasets
         self.stop_words = set()  # Will be inferred
@@ -210,6 +214,8 @@ class FitnessChatbot:
         self._preprocess_qa_dataset()  # Preprocess QA for faster matching
         self._infer_knowledge_from_datasets()  # NEW: Learn from all datasets
         self._build_vocabulary()  # Build vocabulary from datasets
+        self._build_ranked_views()  # Precompute "top foods by X" rankings
+        self._build_numeric_indexes()  # Sorted numeric columns for range/aggregate queries
 
     def _fuzzy_match(self, word: str, targets: List[str], threshold: float = 0.6) -> Optional[str]:
         """Find closest matching word from targets using fuzzy matching.
@@ -243,6 +249,11 @@ class FitnessChatbot:
         
         return best_match
 
+    def _record_cache(self, name: str, hit: bool) -> None:
+        """Count a hit or miss for the named cache (read by scripts/bench_chatbot.py)."""
+        stats = self.cache_stats.setdefault(name, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+
     def _apply_synonym_map(self, text: str) -> str:
         """Apply SYNONYM_MAP to an entire text string (phrase-level and word-level)."""
         result = text.lower().strip()
@@ -631,7 +642,9 @@ class FitnessChatbot:
         
         # Check cache first
         if q_lower in self.qa_cache:
+            self._record_cache("qa", True)
             return self.qa_cache[q_lower]
+        self._record_cache("qa", False)
         
         # Skip QA if asking for list of foods (should query food dataset instead)
         food_list_indicators = ['foods to', 'food items to', 'foods for', 'food items for', 'list of foods', 
@@ -731,238 +744,243 @@ class FitnessChatbot:
 
 
 
+    def _build_ranked_views(self) -> None:
+        """Materialize "top foods by X" rankings once per dataset load.
+
+        Every view is an array of row positions into the food dataset, already
+        in answer order: one ascending/descending pair per numeric nutrient
+        column, one row list per boolean diet flag (is_low_calorie,
+        suitable_for_weight_loss, ...) and one per scored list answer. List
+        questions are then answered with a slice; the formatted text is
+        memoized in _ranked_answer_cache until the next rebuild.
+        """
+        self.food_columns: Dict[str, Optional[str]] = {}
+        self.food_values: Dict[str, np.ndarray] = {}
+        self.ranked_asc: Dict[str, np.ndarray] = {}
+        self.ranked_desc: Dict[str, np.ndarray] = {}
+        self.flag_rows: Dict[str, np.ndarray] = {}
+        self.score_views: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._ranked_answer_cache: Dict[Tuple[Any, ...], Optional[str]] = {}
+
+        food_df = self.datasets.get("food_nutrition")
+        if food_df is None or food_df.empty:
+            return
+
+        for col in food_df.columns:
+            series = food_df[col]
+            if pd.api.types.is_bool_dtype(series):
+                self.flag_rows[col] = np.flatnonzero(series.to_numpy())
+                continue
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+            valid = np.flatnonzero(~np.isnan(values))
+            if valid.size == 0:
+                continue
+            self.food_values[col] = values
+            self.ranked_asc[col] = valid[np.argsort(values[valid], kind='stable')]
+            self.ranked_desc[col] = valid[np.argsort(-values[valid], kind='stable')]
+
+        # Resolve column roles once, against numeric columns only (boolean
+        # flags such as is_high_protein must not shadow "Protein (g)").
+        def numeric_col(*keys: str) -> Optional[str]:
+            return next((c for c in self.food_values if any(k in c.lower() for k in keys)), None)
+
+        self.food_columns = {
+            'name': next((c for c in ['food', 'Dish Name', 'Food Name', 'name'] if c in food_df.columns), food_df.columns[0]),
+            'calories': numeric_col('calorie', 'kcal'),
+            'protein': numeric_col('protein'),
+            'carbs': numeric_col('carb'),
+            'fat': numeric_col('fat'),
+            'fiber': numeric_col('fiber', 'fibre'),
+            'sugar': numeric_col('sugar'),
+        }
+
+        self.score_views['healthy'] = self._rank_healthy_foods()
+        self.score_views['weight_loss'] = self._rank_weight_loss_foods()
+        self.score_views['weight_loss_fruits'] = self._rank_weight_loss_fruits(food_df)
+        for goal in ('weight_loss', 'muscle_gain', 'energy', 'balanced'):
+            self.score_views[f'intelligent:{goal}'] = self._rank_intelligent_foods(goal)
+
+    def _rank_rows(self, score: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Row positions with a finite score (and mask), best first; ties keep dataset order."""
+        keep = np.isfinite(score)
+        if mask is not None:
+            keep &= mask
+        rows = np.flatnonzero(keep)
+        return rows[np.argsort(-score[rows], kind='stable')]
+
+    def _memoized_answer(self, key: Tuple[Any, ...], build) -> Optional[str]:
+        """Return the memoized formatted answer for key, building it on first use."""
+        if key in self._ranked_answer_cache:
+            self._record_cache("ranked_answers", True)
+            return self._ranked_answer_cache[key]
+        self._record_cache("ranked_answers", False)
+        answer = build()
+        self._ranked_answer_cache[key] = answer
+        return answer
+
     def _get_high_nutrient_foods(self, nutrient: str, min_value: float = 10) -> str:
-        """Extract high nutrient foods from food nutrition dataset"""
+        """List high nutrient foods from the precomputed descending nutrient ranking"""
         food_df = self.datasets.get("food_nutrition")
         if food_df is None or food_df.empty:
             return None
-        
+
         # Find nutrient column (case insensitive)
-        nutrient_col = None
-        for col in food_df.columns:
-            if nutrient.lower() in col.lower():
-                nutrient_col = col
-                break
-        
-        if nutrient_col is None:
+        nutrient_col = next((c for c in food_df.columns if nutrient.lower() in c.lower()), None)
+        if nutrient_col is None or nutrient_col not in self.ranked_desc:
             return None
-        
-        # Find food name column
-        food_col = None
-        for col in ['food', 'Dish Name', 'Food Name', 'name']:
-            if col in food_df.columns:
-                food_col = col
-                break
-        if food_col is None:
-            food_col = food_df.columns[0]
-        
-        # Filter and sort by nutrient content
-        try:
-            df_filtered = food_df[pd.to_numeric(food_df[nutrient_col], errors='coerce') >= min_value].copy()
-            df_filtered[nutrient_col] = pd.to_numeric(df_filtered[nutrient_col], errors='coerce')
-            df_sorted = df_filtered.sort_values(by=nutrient_col, ascending=False).head(15)
-            
-            if df_sorted.empty:
-                return None
-            
-            # Build response
+
+        def build() -> Optional[str]:
+            order = self.ranked_desc[nutrient_col]
+            values = self.food_values[nutrient_col]
+            # Values are descending along the view, so rows meeting min_value form a prefix
+            count = int(np.searchsorted(-values[order], -min_value, side='right'))
+            names = food_df[self.food_columns['name']]
+
             foods = []
-            for _, row in df_sorted.iterrows():
-                food_name = row[food_col]
-                nutrient_val = row[nutrient_col]
-                if pd.notna(food_name) and pd.notna(nutrient_val):
-                    foods.append(f"{food_name} ({nutrient_val}g)")
-            
+            for pos in order[:min(count, 15)]:
+                food_name = names.iat[pos]
+                if pd.notna(food_name):
+                    foods.append(f"{food_name} ({values[pos]}g)")
+
             if not foods:
                 return None
-            
+
             response = f"High {nutrient} foods (per 100g):\n\n"
             response += "\n".join([f"{i+1}. {food}" for i, food in enumerate(foods[:10])])
             response += f"\n\nTip: Aim for {min_value}g+ per serving for good {nutrient} intake."
-            
             return response
-        except Exception:
-            return None
+
+        return self._memoized_answer(("high", nutrient, min_value), build)
 
     def _get_low_calorie_foods(self) -> str:
-        """Extract low calorie foods from food nutrition dataset"""
+        """List low calorie foods from the precomputed ascending calorie ranking"""
         food_df = self.datasets.get("food_nutrition")
         if food_df is None or food_df.empty:
             return None
-        
-        # Find calorie column
-        cal_col = None
-        for col in food_df.columns:
-            if 'calorie' in col.lower() or 'kcal' in col.lower():
-                cal_col = col
-                break
-        
-        if cal_col is None:
+
+        cal_col = next((c for c in food_df.columns if 'calorie' in c.lower() or 'kcal' in c.lower()), None)
+        if cal_col is None or cal_col not in self.ranked_asc:
             return None
-        
-        # Find food name column
-        food_col = None
-        for col in ['food', 'Dish Name', 'Food Name', 'name']:
-            if col in food_df.columns:
-                food_col = col
-                break
-        if food_col is None:
-            food_col = food_df.columns[0]
-        
-        try:
-            df_copy = food_df.copy()
-            df_copy[cal_col] = pd.to_numeric(df_copy[cal_col], errors='coerce')
-            df_sorted = df_copy[df_copy[cal_col] < 100].sort_values(by=cal_col).head(15)
-            
-            if df_sorted.empty:
-                return None
-            
+
+        def build() -> Optional[str]:
+            order = self.ranked_asc[cal_col]
+            values = self.food_values[cal_col]
+            count = int(np.searchsorted(values[order], 100, side='left'))
+            names = food_df[self.food_columns['name']]
+
             foods = []
-            for _, row in df_sorted.iterrows():
-                food_name = row[food_col]
-                cal_val = row[cal_col]
-                if pd.notna(food_name) and pd.notna(cal_val):
-                    foods.append(f"{food_name} ({int(cal_val)} kcal)")
-            
+            for pos in order[:min(count, 15)]:
+                food_name = names.iat[pos]
+                if pd.notna(food_name):
+                    foods.append(f"{food_name} ({int(values[pos])} kcal)")
+
             if not foods:
                 return None
-            
+
             response = "Low calorie foods for weight loss (per 100g):\n\n"
             response += "\n".join([f"{i+1}. {food}" for i, food in enumerate(foods[:10])])
             response += "\n\nTip: Focus on vegetables, lean proteins, and avoid fried/processed foods."
-            
             return response
-        except Exception:
+
+        return self._memoized_answer(("low_calorie",), build)
+
+    def _rank_healthy_foods(self) -> Optional[Dict[str, Any]]:
+        """Rank foods by a fuzzy health score inferred from dataset statistics"""
+        cal_col = self.food_columns.get('calories')
+        protein_col = self.food_columns.get('protein')
+        fat_col = self.food_columns.get('fat')
+        fiber_col = self.food_columns.get('fiber')
+        if not cal_col:
             return None
 
+        cal = self.food_values[cal_col]
+
+        # FUZZY LOGIC: Infer healthy thresholds from dataset statistics
+        cal_median = float(np.nanmedian(cal))
+        cal_q25 = float(np.nanquantile(cal, 0.25))
+        cal_q75 = float(np.nanquantile(cal, 0.75))
+
+        # Fuzzy membership functions for "healthy":
+        # moderate calories (around median), higher protein, lower fat
+        cal_score = np.select([cal < cal_q25, cal <= cal_median, cal <= cal_q75], [0.7, 1.0, 0.6], 0.2)
+
+        protein_median = protein_q75 = 0.0
+        protein_score: Any = 0.5
+        if protein_col:
+            prot = self.food_values[protein_col]
+            protein_median = float(np.nanmedian(prot))
+            protein_q75 = float(np.nanquantile(prot, 0.75))
+            protein_score = np.select([prot >= protein_q75, prot >= protein_median], [1.0, 0.8], 0.4)
+
+        fat_median = fat_q25 = 999.0
+        fat_score: Any = 0.5
+        if fat_col:
+            fat = self.food_values[fat_col]
+            fat_median = float(np.nanmedian(fat))
+            fat_q25 = float(np.nanquantile(fat, 0.25))
+            fat_score = np.select([fat <= fat_q25, fat <= fat_median], [1.0, 0.7], 0.3)
+
+        # Aggregate fuzzy scores (weighted average; protein matters most)
+        score = cal_score * 0.35 + protein_score * 0.40 + fat_score * 0.25
+
+        # Bonus for fiber if available
+        if fiber_col:
+            fiber = self.food_values[fiber_col]
+            score = score + np.where(fiber > np.nanmedian(fiber), 0.1, 0.0)
+
+        return {
+            'order': self._rank_rows(score, score >= 0.6),
+            'score': score,
+            'cal_median': cal_median,
+            'protein_median': protein_median,
+            'protein_q75': protein_q75,
+            'fat_median': fat_median,
+            'fat_q25': fat_q25,
+        }
+
     def _get_healthy_foods(self) -> Optional[str]:
-        """Get healthy, balanced foods using fuzzy logic inferred from dataset statistics"""
+        """Get healthy, balanced foods from the precomputed fuzzy health ranking"""
         food_df = self.datasets.get("food_nutrition")
-        if food_df is None or food_df.empty:
+        view = self.score_views.get('healthy')
+        if food_df is None or food_df.empty or not view:
             return None
-        
-        # Find columns
-        cal_col = protein_col = fat_col = carb_col = fiber_col = food_col = None
-        for col in food_df.columns:
-            col_lower = col.lower()
-            if 'calorie' in col_lower or 'kcal' in col_lower:
-                cal_col = col
-            elif 'protein' in col_lower:
-                protein_col = col
-            elif 'fat' in col_lower:
-                fat_col = col
-            elif 'carb' in col_lower:
-                carb_col = col
-            elif 'fiber' in col_lower or 'fibre' in col_lower:
-                fiber_col = col
-            elif col in ['food', 'Dish Name', 'Food Name', 'name']:
-                food_col = col
-        
-        if not cal_col or not food_col:
-            return None
-        
-        try:
-            df = food_df.copy()
-            df[cal_col] = pd.to_numeric(df[cal_col], errors='coerce')
-            if protein_col:
-                df[protein_col] = pd.to_numeric(df[protein_col], errors='coerce')
-            if fat_col:
-                df[fat_col] = pd.to_numeric(df[fat_col], errors='coerce')
-            if fiber_col:
-                df[fiber_col] = pd.to_numeric(df[fiber_col], errors='coerce')
-            
-            # FUZZY LOGIC: Infer healthy thresholds from dataset statistics
-            cal_median = df[cal_col].median()
-            cal_q25 = df[cal_col].quantile(0.25)
-            cal_q75 = df[cal_col].quantile(0.75)
-            
-            protein_median = df[protein_col].median() if protein_col else 0
-            protein_q75 = df[protein_col].quantile(0.75) if protein_col else 0
-            
-            fat_median = df[fat_col].median() if fat_col else 999
-            fat_q25 = df[fat_col].quantile(0.25) if fat_col else 999
-            
-            # Fuzzy membership functions for "healthy"
-            def calorie_health_score(cal):
-                # Prefer moderate calories (around median, not too high)
-                if cal < cal_q25:
-                    return 0.7  # Low calories = moderately healthy
-                elif cal <= cal_median:
-                    return 1.0  # Moderate calories = very healthy
-                elif cal <= cal_q75:
-                    return 0.6  # Above median = less healthy
-                else:
-                    return 0.2  # High calories = unhealthy
-            
-            def protein_health_score(prot):
-                # Higher protein = healthier
-                if prot >= protein_q75:
-                    return 1.0  # High protein = very healthy
-                elif prot >= protein_median:
-                    return 0.8  # Above median = healthy
-                else:
-                    return 0.4  # Low protein = less healthy
-            
-            def fat_health_score(fat_val):
-                # Lower fat = healthier
-                if fat_val <= fat_q25:
-                    return 1.0  # Low fat = very healthy
-                elif fat_val <= fat_median:
-                    return 0.7  # Moderate fat = somewhat healthy
-                else:
-                    return 0.3  # High fat = unhealthy
-            
-            # Calculate fuzzy health score for each food
-            df['cal_score'] = df[cal_col].apply(calorie_health_score)
-            df['protein_score'] = df[protein_col].apply(protein_health_score) if protein_col else 0.5
-            df['fat_score'] = df[fat_col].apply(fat_health_score) if fat_col else 0.5
-            
-            # Aggregate fuzzy scores (weighted average)
-            df['health_score'] = (
-                df['cal_score'] * 0.35 +  # Calories weight
-                df['protein_score'] * 0.40 +  # Protein weight (most important)
-                df['fat_score'] * 0.25  # Fat weight
-            )
-            
-            # Bonus for fiber if available
-            if fiber_col:
-                fiber_median = df[fiber_col].median()
-                df['health_score'] += df[fiber_col].apply(
-                    lambda f: 0.1 if f > fiber_median else 0
-                )
-            
-            # Filter: only foods with health_score > 0.6 (fuzzy threshold for "healthy")
-            healthy_foods = df[df['health_score'] >= 0.6].nlargest(10, 'health_score')
-            
-            if healthy_foods.empty:
+
+        def build() -> Optional[str]:
+            top = view['order'][:10]
+            if top.size == 0:
                 return None
-            
+
+            cols = self.food_columns
+            cal_col, protein_col, fat_col, carb_col = cols['calories'], cols['protein'], cols['fat'], cols['carbs']
+
             # Infer health criteria explanation
             criteria = f"Based on dataset analysis:\n"
-            criteria += f"• Moderate calories (around {cal_median:.0f} kcal or less)\n"
+            criteria += f"• Moderate calories (around {view['cal_median']:.0f} kcal or less)\n"
             if protein_col:
-                criteria += f"• Good protein (≥{protein_median:.1f}g, ideally ≥{protein_q75:.1f}g)\n"
+                criteria += f"• Good protein (≥{view['protein_median']:.1f}g, ideally ≥{view['protein_q75']:.1f}g)\n"
             if fat_col:
-                criteria += f"• Lower fat (≤{fat_median:.1f}g, ideally ≤{fat_q25:.1f}g)\n"
-            if fiber_col:
+                criteria += f"• Lower fat (≤{view['fat_median']:.1f}g, ideally ≤{view['fat_q25']:.1f}g)\n"
+            if cols['fiber']:
                 criteria += f"• Higher fiber when available\n"
-            
+
+            def fmt(col: Optional[str], label: str, pos: int) -> str:
+                if not col or np.isnan(self.food_values[col][pos]):
+                    return ""
+                return f", {label}: {self.food_values[col][pos]:.1f}g"
+
+            names = food_df[cols['name']]
             lines = ["🥗 Healthy & Balanced Food Items:\n", criteria, ""]
-            for i, (_, row) in enumerate(healthy_foods.iterrows(), 1):
-                food_name = row[food_col]
-                cal = int(row[cal_col]) if pd.notna(row[cal_col]) else 0
-                protein = f", Protein: {row[protein_col]:.1f}g" if protein_col and pd.notna(row[protein_col]) else ""
-                fat = f", Fat: {row[fat_col]:.1f}g" if fat_col and pd.notna(row[fat_col]) else ""
-                carb = f", Carbs: {row[carb_col]:.1f}g" if carb_col and pd.notna(row[carb_col]) else ""
-                health = f" [Health Score: {row['health_score']:.2f}]"
-                lines.append(f"{i}. {food_name}")
-                lines.append(f"   Calories: {cal} kcal{protein}{carb}{fat}{health}")
-            
+            for i, pos in enumerate(top, 1):
+                cal_val = self.food_values[cal_col][pos]
+                cal = int(cal_val) if not np.isnan(cal_val) else 0
+                health = f" [Health Score: {view['score'][pos]:.2f}]"
+                lines.append(f"{i}. {names.iat[pos]}")
+                lines.append(f"   Calories: {cal} kcal{fmt(protein_col, 'Protein', pos)}{fmt(carb_col, 'Carbs', pos)}{fmt(fat_col, 'Fat', pos)}{health}")
+
             lines.append("\n💡 Health scores calculated using fuzzy logic based on dataset statistics.")
             return "\n".join(lines)
-        except Exception as e:
-            print(f"Error in _get_healthy_foods: {e}")
-            return None
+
+        return self._memoized_answer(("healthy",), build)
 
     def _normalize_query(self, question: str) -> str:
         """Normalize query: unicode → ASCII, apply synonym map, fix typos via vocabulary.
@@ -1317,6 +1335,73 @@ class FitnessChatbot:
         
         return scores
 
+    def _build_numeric_indexes(self) -> None:
+        """Build a sorted index and column statistics for every numeric column.
+
+        For each dataset/column: values sorted ascending (NaN dropped) with the
+        matching row labels and positions, prefix sums over the sorted values, and count/min/
+        max/sum/mean. Range filters become a bisection into the sorted values
+        and aggregates over a whole column or a range slice are O(1).
+        """
+        self.numeric_indexes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for name, df in self.datasets.items():
+            columns: Dict[str, Dict[str, Any]] = {}
+            for col in self.dataset_metadata.get(name, {}).get("numeric_columns", []):
+                if col not in df.columns:
+                    continue
+                values = df[col].to_numpy(dtype=float)
+                valid = np.flatnonzero(~np.isnan(values))
+                # Stable sort keeps dataset order among equal values (first occurrence wins)
+                order = valid[np.argsort(values[valid], kind="stable")]
+                sorted_values = values[order]
+                count = len(sorted_values)
+                total = float(sorted_values.sum()) if count else 0.0
+                columns[col] = {
+                    "values": sorted_values,
+                    "row_ids": df.index.to_numpy()[order],
+                    "positions": order,
+                    "prefix_sums": np.concatenate(([0.0], np.cumsum(sorted_values))),
+                    "stats": {
+                        "count": count,
+                        "min": float(sorted_values[0]) if count else None,
+                        "max": float(sorted_values[-1]) if count else None,
+                        "sum": total,
+                        "mean": total / count if count else None,
+                    },
+                }
+            self.numeric_indexes[name] = columns
+
+    def _numeric_range(self, dataset_name: str, col: str, op: str, value: float) -> Optional[slice]:
+        """Bisect the sorted index for rows where col > value ("gt") or col < value ("lt")."""
+        index = self.numeric_indexes.get(dataset_name, {}).get(col)
+        if index is None:
+            return None
+        values = index["values"]
+        if op == "gt":
+            return slice(int(np.searchsorted(values, value, side="right")), len(values))
+        return slice(0, int(np.searchsorted(values, value, side="left")))
+
+    def _indexed_aggregate(self, dataset_name: str, col: str, operation: str, span: slice) -> Any:
+        """Aggregate col over a slice of its sorted index.
+
+        Returns the row label for max/min (first occurrence in dataset order),
+        the value for average/sum, or None when the slice is empty.
+        """
+        index = self.numeric_indexes[dataset_name][col]
+        values = index["values"]
+        start, stop = span.start, span.stop
+        if stop <= start:
+            return None
+        if start == 0 and stop == len(values) and operation in {"average", "sum"}:
+            return index["stats"]["mean" if operation == "average" else "sum"]
+        if operation == "min":
+            return index["row_ids"][start]
+        if operation == "max":
+            first_of_max = max(start, int(np.searchsorted(values, values[stop - 1], side="left")))
+            return index["row_ids"][first_of_max]
+        total = float(index["prefix_sums"][stop] - index["prefix_sums"][start])
+        return total / (stop - start) if operation == "average" else total
+
     def _detect_target_numeric_column(self, question: str, dataset_name: str) -> Optional[str]:
         md = self.dataset_metadata.get(dataset_name, {})
         numeric_columns = md.get("numeric_columns", [])
@@ -1365,31 +1450,44 @@ class FitnessChatbot:
 
             target_col = self._detect_target_numeric_column(question, dataset_name)
             scores = self._row_match_scores(df, tokens)
-            matched = df[scores > 0].copy()
-            matched_scores = scores[scores > 0]
-
-            if matched.empty:
+            numeric_target = bool(target_col and target_col in df.columns and pd.api.types.is_numeric_dtype(df[target_col]))
+            index = self.numeric_indexes.get(dataset_name, {}).get(target_col) if df is self.datasets[dataset_name] else None
+
+            # Positions in df of the text-matched rows, best match first; None means every row, in
+            # dataset order. Rows are only taken from df once the positions are final.
+            positions: Optional[np.ndarray] = None
+            # Set when the rows are the whole dataset or an index slice of it, so numeric filters and
+            # aggregates can be answered from the sorted index alone.
+            index_span: Optional[slice] = None
+            hits = np.flatnonzero(scores.to_numpy() > 0) if not scores.empty else np.array([], dtype=int)
+            if len(hits):
+                order = pd.Series(scores.to_numpy()[hits]).sort_values(ascending=False).index.to_numpy()
+                positions = hits[order]
+            elif numeric_target:
                 # For numeric operations/filters, operate directly on the dataset
                 # when textual row matching is not available.
-                if target_col and target_col in df.columns and pd.api.types.is_numeric_dtype(df[target_col]):
-                    matched = df.copy()
-                    matched["_match_score"] = 1
-                else:
-                    continue
-
-            if not matched_scores.empty:
-                matched = matched.assign(_match_score=matched_scores.loc[matched.index])
-            if "_match_score" not in matched.columns:
-                matched["_match_score"] = 1
-            matched = matched.sort_values("_match_score", ascending=False)
+                if index is not None:
+                    index_span = slice(0, index["stats"]["count"])
+            else:
+                continue
 
-            if numeric_filter and target_col and target_col in matched.columns and pd.api.types.is_numeric_dtype(matched[target_col]):
+            if numeric_filter and numeric_target:
                 op, value = numeric_filter
-                if op == "gt":
-                    matched = matched[matched[target_col] > value]
+                span = self._numeric_range(dataset_name, target_col, op, value) if index is not None else None
+                if span is not None and positions is None:
+                    # Whole dataset: the in-range rows by position, in dataset order
+                    positions = np.sort(index["positions"][span])
+                    index_span = span
+                elif span is not None:
+                    in_range = np.zeros(len(df), dtype=bool)
+                    in_range[index["positions"][span]] = True
+                    positions = positions[in_range[positions]]
                 else:
-                    matched = matched[matched[target_col] < value]
+                    values = df[target_col].to_numpy()
+                    keep = values > value if op == "gt" else values < value
+                    positions = np.flatnonzero(keep) if positions is None else positions[keep[positions]]
 
+            matched = df if positions is None else df.iloc[positions]
             if matched.empty:
                 continue
 
@@ -1398,7 +1496,7 @@ class FitnessChatbot:
                 if instruction_answer:
                     return instruction_answer
 
-            answer = self._format_answer(dataset_name, matched, operation, target_col)
+            answer = self._format_answer(dataset_name, matched, operation, target_col, index_span)
             return answer
 
         rule_answer = self._rule_based_general_answer(question, intent)
@@ -1660,6 +1758,28 @@ class FitnessChatbot:
         lines.append("💡 This knowledge helps me give you smarter, data-driven recommendations!")
         return "\n".join(lines)
 
+    def _rank_intelligent_foods(self, goal: str) -> Optional[Dict[str, Any]]:
+        """Rank foods for a goal using inferred nutrition medians"""
+        cal_col = self.food_columns.get('calories')
+        protein_col = self.food_columns.get('protein')
+        patterns = self.inferred_knowledge.get('nutrition')
+        if not patterns or not cal_col or not protein_col:
+            return None
+
+        cal = self.food_values[cal_col]
+        prot = self.food_values[protein_col]
+        cal_median = patterns.get(cal_col, {}).get('median', 150)
+        protein_median = patterns.get(protein_col, {}).get('median', 5)
+
+        # Score based on goal
+        if goal == "weight_loss":
+            score = (prot / protein_median) * 2 - (cal / cal_median)
+        elif goal == "muscle_gain":
+            score = (prot / protein_median) * 3
+        else:
+            score = (prot / protein_median) + (1 - np.abs(cal - cal_median) / cal_median)
+        return {'order': self._rank_rows(score)}
+
     def _intelligent_food_recommendation(self, query: str) -> Optional[str]:
         """Use inferred nutrition patterns to recommend foods intelligently"""
         if 'nutrition' not in self.inferred_knowledge:
@@ -1669,8 +1789,6 @@ class FitnessChatbot:
         if food_df is None or food_df.empty:
             return None
         
-        patterns = self.inferred_knowledge['nutrition']
-        
         # Determine goal from query
         if any(k in query for k in ['weight loss', 'lose weight', 'cut', 'diet']):
             goal = "weight_loss"
@@ -1684,58 +1802,35 @@ class FitnessChatbot:
         else:
             goal = "balanced"
             criteria = "balanced macros"
-        
-        # Use fuzzy logic with inferred thresholds
-        try:
-            df = food_df.copy()
-            cal_col = 'Calories (kcal)' if 'Calories (kcal)' in df.columns else None
-            protein_col = 'Protein (g)' if 'Protein (g)' in df.columns else None
-            food_col = 'Dish Name' if 'Dish Name' in df.columns else df.columns[0]
-            
-            if not cal_col or not protein_col:
-                return None
-            
-            df[cal_col] = pd.to_numeric(df[cal_col], errors='coerce')
-            df[protein_col] = pd.to_numeric(df[protein_col], errors='coerce')
-            
-            cal_median = patterns.get(cal_col, {}).get('median', 150)
-            protein_median = patterns.get(protein_col, {}).get('median', 5)
-            
-            # Score based on goal
-            if goal == "weight_loss":
-                df['score'] = (df[protein_col] / protein_median) * 2 - (df[cal_col] / cal_median)
-            elif goal == "muscle_gain":
-                df['score'] = (df[protein_col] / protein_median) * 3
-            else:
-                df['score'] = (df[protein_col] / protein_median) + (1 - abs(df[cal_col] - cal_median) / cal_median)
-            
-            top_foods = df.nlargest(8, 'score')
-            
+
+        view = self.score_views.get(f'intelligent:{goal}')
+        if not view:
+            return None
+
+        def build() -> Optional[str]:
+            cal = self.food_values[self.food_columns['calories']]
+            prot = self.food_values[self.food_columns['protein']]
+            names = food_df[self.food_columns['name']]
+
             lines = [f"🍽️ Intelligent Food Recommendations for {goal.replace('_', ' ').title()}:\n"]
             lines.append(f"Criteria: {criteria} (based on dataset analysis)\n")
-            
-            for i, (_, row) in enumerate(top_foods.iterrows(), 1):
-                food = row[food_col]
-                cal = int(row[cal_col]) if pd.notna(row[cal_col]) else 0
-                prot = row[protein_col] if pd.notna(row[protein_col]) else 0
-                lines.append(f"{i}. {food} - {cal} kcal, {prot:.1f}g protein")
-            
+
+            for i, pos in enumerate(view['order'][:8], 1):
+                cal_val = int(cal[pos]) if not np.isnan(cal[pos]) else 0
+                prot_val = prot[pos] if not np.isnan(prot[pos]) else 0
+                lines.append(f"{i}. {names.iat[pos]} - {cal_val} kcal, {prot_val:.1f}g protein")
+
             return "\n".join(lines)
-        except Exception:
-            return None
 
-    def _get_weight_loss_fruits(self) -> Optional[str]:
-        """Infer good fruit options for weight loss from food dataset (not hardcoded tips)."""
-        food_df = self.datasets.get("food_nutrition")
-        if food_df is None or food_df.empty:
-            return None
+        return self._memoized_answer(("intelligent", goal), build)
 
-        # Identify columns dynamically
+    def _rank_weight_loss_fruits(self, food_df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+        """Infer and rank "fruit-like" rows for weight loss from dataset fields."""
         food_col = 'Dish Name' if 'Dish Name' in food_df.columns else food_df.columns[0]
-        cal_col = next((c for c in food_df.columns if 'calorie' in c.lower() or 'kcal' in c.lower()), None)
-        fiber_col = next((c for c in food_df.columns if 'fibre' in c.lower() or 'fiber' in c.lower()), None)
-        sugar_col = next((c for c in food_df.columns if 'free sugar' in c.lower() or 'sugar' in c.lower()), None)
-        prot_col = next((c for c in food_df.columns if 'protein' in c.lower()), None)
+        cal_col = self.food_columns.get('calories')
+        fiber_col = self.food_columns.get('fiber')
+        sugar_col = self.food_columns.get('sugar')
+        prot_col = self.food_columns.get('protein')
         weight_loss_flag_col = next((c for c in food_df.columns if c.lower() == 'suitable_for_weight_loss'), None)
         low_cal_flag_col = next((c for c in food_df.columns if c.lower() == 'is_low_calorie'), None)
         kw_col = 'search_keywords' if 'search_keywords' in food_df.columns else None
@@ -1743,68 +1838,82 @@ class FitnessChatbot:
         if cal_col is None:
             return None
 
-        df = food_df.copy()
-        df[cal_col] = pd.to_numeric(df[cal_col], errors='coerce')
-        if fiber_col:
-            df[fiber_col] = pd.to_numeric(df[fiber_col], errors='coerce')
-        if sugar_col:
-            df[sugar_col] = pd.to_numeric(df[sugar_col], errors='coerce')
-        if prot_col:
-            df[prot_col] = pd.to_numeric(df[prot_col], errors='coerce')
-
         # Infer "fruit-like" rows from names + keywords
         fruit_regex = r"\b(?:fruit|apple|banana|orange|mango|papaya|guava|berry|grape|melon|pomegranate|pineapple|lemon)\b"
-        mask_name = df[food_col].astype(str).str.contains(fruit_regex, case=False, na=False, regex=True)
-        mask_kw = df[kw_col].astype(str).str.contains(r"\bfruit\b", case=False, na=False, regex=True) if kw_col else False
-        mask = mask_name | mask_kw
-        candidates = df[mask].copy()
-        if candidates.empty:
+        mask = food_df[food_col].astype(str).str.contains(fruit_regex, case=False, na=False, regex=True).to_numpy()
+        if kw_col:
+            mask = mask | food_df[kw_col].astype(str).str.contains(r"\bfruit\b", case=False, na=False, regex=True).to_numpy()
+        if not mask.any():
             return None
 
+        def median_of(col: str) -> float:
+            values = self.food_values[col]
+            return float(np.nanmedian(values)) if not np.isnan(values).all() else float('nan')
+
+        def flag(col: str) -> np.ndarray:
+            if col in self.flag_rows:
+                hits = np.zeros(len(food_df))
+                hits[self.flag_rows[col]] = 1.0
+                return hits
+            return food_df[col].astype(str).str.lower().isin(['true', '1', 'yes']).to_numpy(dtype=float)
+
         # Score using dataset fields
-        cal_median = pd.to_numeric(df[cal_col], errors='coerce').dropna().median()
+        cal = self.food_values[cal_col]
+        cal_median = median_of(cal_col)
         if not np.isfinite(cal_median) or cal_median <= 0:
             cal_median = 150.0
 
-        candidates['score'] = 0.0
-        candidates['score'] += (1.0 - (candidates[cal_col].fillna(cal_median) / max(1.0, cal_median))).clip(-1.0, 1.0)
+        score = np.clip(1.0 - (np.nan_to_num(cal, nan=cal_median) / max(1.0, cal_median)), -1.0, 1.0)
         if fiber_col:
-            fiber_median = pd.to_numeric(df[fiber_col], errors='coerce').dropna().median()
+            fiber_median = median_of(fiber_col)
             if np.isfinite(fiber_median) and fiber_median > 0:
-                candidates['score'] += (candidates[fiber_col].fillna(0) / fiber_median).clip(0.0, 2.0) * 0.8
+                score += np.clip(np.nan_to_num(self.food_values[fiber_col], nan=0.0) / fiber_median, 0.0, 2.0) * 0.8
         if sugar_col:
-            sugar_median = pd.to_numeric(df[sugar_col], errors='coerce').dropna().median()
+            sugar_median = median_of(sugar_col)
             if np.isfinite(sugar_median) and sugar_median > 0:
-                candidates['score'] -= (candidates[sugar_col].fillna(sugar_median) / sugar_median).clip(0.0, 2.0) * 0.4
+                score -= np.clip(np.nan_to_num(self.food_values[sugar_col], nan=sugar_median) / sugar_median, 0.0, 2.0) * 0.4
         if prot_col:
-            prot_median = pd.to_numeric(df[prot_col], errors='coerce').dropna().median()
+            prot_median = median_of(prot_col)
             if np.isfinite(prot_median) and prot_median > 0:
-                candidates['score'] += (candidates[prot_col].fillna(0) / prot_median).clip(0.0, 2.0) * 0.2
+                score += np.clip(np.nan_to_num(self.food_values[prot_col], nan=0.0) / prot_median, 0.0, 2.0) * 0.2
         if weight_loss_flag_col:
-            candidates['score'] += candidates[weight_loss_flag_col].astype(str).str.lower().isin(['true', '1', 'yes']).astype(float) * 1.2
+            score += flag(weight_loss_flag_col) * 1.2
         if low_cal_flag_col:
-            candidates['score'] += candidates[low_cal_flag_col].astype(str).str.lower().isin(['true', '1', 'yes']).astype(float) * 0.8
+            score += flag(low_cal_flag_col) * 0.8
+
+        return {'order': self._rank_rows(score, mask), 'name_col': food_col}
 
-        top = candidates.sort_values(by='score', ascending=False).head(8)
-        if top.empty:
+    def _get_weight_loss_fruits(self) -> Optional[str]:
+        """Infer good fruit options for weight loss from food dataset (not hardcoded tips)."""
+        food_df = self.datasets.get("food_nutrition")
+        view = self.score_views.get('weight_loss_fruits')
+        if food_df is None or food_df.empty or not view:
             return None
 
-        lines = ["Fruit options from dataset that are more weight-loss friendly:\n"]
-        for i, (_, row) in enumerate(top.iterrows(), 1):
-            name = str(row.get(food_col, 'Unknown')).strip()
-            cal = row.get(cal_col, np.nan)
-            fib = row.get(fiber_col, np.nan) if fiber_col else np.nan
-            sug = row.get(sugar_col, np.nan) if sugar_col else np.nan
-            meta = []
-            if pd.notna(cal):
-                meta.append(f"{int(round(float(cal)))} kcal")
-            if pd.notna(fib):
-                meta.append(f"{float(fib):.1f}g fiber")
-            if pd.notna(sug):
-                meta.append(f"{float(sug):.1f}g sugar")
-            lines.append(f"{i}. {name}" + (f" ({', '.join(meta)})" if meta else ""))
-        lines.append("\nTip: prefer lower-calorie, higher-fiber choices and portion control.")
-        return "\n".join(lines)
+        def build() -> Optional[str]:
+            top = view['order'][:8]
+            if top.size == 0:
+                return None
+
+            cal = self.food_values[self.food_columns['calories']]
+            fiber_col, sugar_col = self.food_columns['fiber'], self.food_columns['sugar']
+            names = food_df[view['name_col']]
+
+            lines = ["Fruit options from dataset that are more weight-loss friendly:\n"]
+            for i, pos in enumerate(top, 1):
+                name = str(names.iat[pos]).strip()
+                meta = []
+                if not np.isnan(cal[pos]):
+                    meta.append(f"{int(round(float(cal[pos])))} kcal")
+                if fiber_col and not np.isnan(self.food_values[fiber_col][pos]):
+                    meta.append(f"{float(self.food_values[fiber_col][pos]):.1f}g fiber")
+                if sugar_col and not np.isnan(self.food_values[sugar_col][pos]):
+                    meta.append(f"{float(self.food_values[sugar_col][pos]):.1f}g sugar")
+                lines.append(f"{i}. {name}" + (f" ({', '.join(meta)})" if meta else ""))
+            lines.append("\nTip: prefer lower-calorie, higher-fiber choices and portion control.")
+            return "\n".join(lines)
+
+        return self._memoized_answer(("weight_loss_fruits",), build)
 
     def _intelligent_exercise_recommendation(self, query: str) -> Optional[str]:
         """Use inferred exercise patterns to recommend exercises intelligently"""
@@ -2155,8 +2264,9 @@ class FitnessChatbot:
         matched: pd.DataFrame,
         operation: str,
         target_col: Optional[str],
+        index_span: Optional[slice] = None,
     ) -> str:
-        view = matched.drop(columns=["_match_score"], errors="ignore")
+        view = matched
 
         if operation == "count":
             return f"Found {len(view)} results"
@@ -2165,6 +2275,18 @@ class FitnessChatbot:
             if not pd.api.types.is_numeric_dtype(view[target_col]):
                 return f"Found {len(view)} results, but '{target_col}' is not numeric."
 
+            # Whole-column or range-slice aggregates come straight from the sorted index
+            if index_span is not None and target_col in self.numeric_indexes.get(dataset_name, {}):
+                result = self._indexed_aggregate(dataset_name, target_col, operation, index_span)
+                if result is None:
+                    return f"Found {len(view)} results, but no numeric values found in '{target_col}'."
+                if operation in {"max", "min"}:
+                    title = "Highest" if operation == "max" else "Lowest"
+                    return self._format_single_row(dataset_name, view.loc[result], f"{title} {target_col}")
+                if operation == "average":
+                    return f"Average {target_col}: {result:.2f}"
+                return f"Total {target_col}: {result:.2f}"
+
             values = view[target_col].dropna()
             if values.empty:
                 return f"Found {len(view)} results, but no numeric values found in '{target_col}'."
@@ -2300,7 +2422,7 @@ class FitnessChatbot:
         if matched.empty:
             return None
 
-        view = matched.drop(columns=["_match_score"], errors="ignore")
+        view = matched
         q = (question or "").lower()
 
         # Extract exercise name from question (remove instruction keywords)
@@ -2582,69 +2704,72 @@ class FitnessChatbot:
         
         return None
     
+    def _rank_weight_loss_foods(self) -> Optional[Dict[str, Any]]:
+        """Rank foods ideal for weight loss: low calorie, high protein, high fiber"""
+        cal_col = self.food_columns.get('calories')
+        protein_col = self.food_columns.get('protein')
+        fiber_col = self.food_columns.get('fiber')
+        if not cal_col:
+            return None
+
+        cal = self.food_values[cal_col]
+
+        # Filter: calories < 200, protein > 5 (if available)
+        mask = cal < 200
+        # Score: lower calories + higher protein + higher fiber = better
+        score = -cal * 0.1
+        if protein_col:
+            mask &= self.food_values[protein_col] > 5
+            score = score + self.food_values[protein_col] * 2  # Protein is important
+        if fiber_col:
+            score = score + self.food_values[fiber_col] * 1.5  # Fiber keeps you full
+        return {'order': self._rank_rows(score, mask)}
+
     def _get_weight_loss_foods(self) -> Optional[str]:
-        """Get foods ideal for weight loss: low calorie, high protein, high fiber"""
+        """Get foods ideal for weight loss from the precomputed weight-loss ranking"""
         food_df = self.datasets.get("food_nutrition")
-        if food_df is None or food_df.empty:
+        view = self.score_views.get('weight_loss')
+        if food_df is None or food_df.empty or not view:
             return None
-        
-        # Find relevant columns
-        cal_col = None
-        protein_col = None
-        fiber_col = None
-        food_col = None
-        
-        for col in food_df.columns:
-            col_lower = col.lower()
-            if 'calorie' in col_lower or 'kcal' in col_lower:
-                cal_col = col
-            elif 'protein' in col_lower:
-                protein_col = col
-            elif 'fiber' in col_lower or 'fibre' in col_lower:
-                fiber_col = col
-            elif col in ['food', 'Dish Name', 'Food Name', 'name']:
-                food_col = col
-        
-        if not cal_col or not food_col:
-            return None
-        
-        try:
-            df = food_df.copy()
-            df[cal_col] = pd.to_numeric(df[cal_col], errors='coerce')
-            if protein_col:
-                df[protein_col] = pd.to_numeric(df[protein_col], errors='coerce')
-            if fiber_col:
-                df[fiber_col] = pd.to_numeric(df[fiber_col], errors='coerce')
-            
-            # Filter: calories < 200, protein > 5 (if available)
-            filtered = df[df[cal_col] < 200].copy()
-            if protein_col:
-                filtered = filtered[filtered[protein_col] > 5]
-            
-            # Score: lower calories + higher protein + higher fiber = better
-            filtered['score'] = 0
-            if protein_col:
-                filtered['score'] += filtered[protein_col] * 2  # Protein is important
-            if fiber_col:
-                filtered['score'] += filtered[fiber_col] * 1.5  # Fiber keeps you full
-            filtered['score'] -= filtered[cal_col] * 0.1  # Lower calories is better
-            
-            top_foods = filtered.nlargest(10, 'score')
-            
-            if top_foods.empty:
+
+        def build() -> Optional[str]:
+            top = view['order'][:10]
+            if top.size == 0:
                 return None
-            
+
+            cal = self.food_values[self.food_columns['calories']]
+            protein_col, fiber_col = self.food_columns['protein'], self.food_columns['fiber']
+            names = food_df[self.food_columns['name']]
+
             lines = ["📋 Top foods for weight loss (low calorie, high protein/fiber):\n"]
-            for i, (_, row) in enumerate(top_foods.iterrows(), 1):
-                food_name = row[food_col]
-                cal = int(row[cal_col]) if pd.notna(row[cal_col]) else 0
-                protein = f", {row[protein_col]:.1f}g protein" if protein_col and pd.notna(row[protein_col]) else ""
-                fiber = f", {row[fiber_col]:.1f}g fiber" if fiber_col and pd.notna(row[fiber_col]) else ""
-                lines.append(f"{i}. {food_name} - {cal} kcal{protein}{fiber}")
-            
+            for i, pos in enumerate(top, 1):
+                cal_val = int(cal[pos]) if not np.isnan(cal[pos]) else 0
+                protein = f", {self.food_values[protein_col][pos]:.1f}g protein" if protein_col and not np.isnan(self.food_values[protein_col][pos]) else ""
+                fiber = f", {self.food_values[fiber_col][pos]:.1f}g fiber" if fiber_col and not np.isnan(self.food_values[fiber_col][pos]) else ""
+                lines.append(f"{i}. {names.iat[pos]} - {cal_val} kcal{protein}{fiber}")
+
             return "\n".join(lines)
-        except Exception:
-            return None
+
+        return self._memoized_answer(("weight_loss",), build)
+
+    def _food_name_index(self, food_df: pd.DataFrame, food_col: str) -> FoodNameIndex:
+        """Name index for the chatbot's food dataset, resolved only when the dataset object changes.
+
+        The enhanced dataset lists the same dishes in the same order as the app's food catalog, so
+        the shared logic.get_food_index() (aliases included) is reused; a private index is built
+        only when the two diverge.
+        """
+        cached = getattr(self, "_food_index_cache", None)
+        if cached is None or cached[0] is not food_df or cached[1] != food_col:
+            from . import logic
+
+            names = [normalize_food_name(n) for n in food_df[food_col].astype(str)]
+            index = logic.get_food_index()
+            if names != index.names:
+                index = FoodNameIndex(names)
+            cached = (food_df, food_col, index)
+            self._food_index_cache = cached
+        return cached[2]
 
     def _get_specific_food_nutrition(self, question: str) -> Optional[str]:
         """Get nutrition info for a specific food item using fuzzy grammar parsing"""
@@ -2706,31 +2831,33 @@ class FitnessChatbot:
             return None
         
         # Search for matching foods - try both singular and plural
+        index = self._food_name_index(food_df, food_col)
         # Phase 1: Exact and typo matching (strict)
         # First try: exact match
-        matches = food_df[food_df[food_col].str.lower() == food_keyword_singular]
+        positions = index.exact_all(food_keyword_singular)
         
         # Second try: food name starts with keyword (singular)
-        if matches.empty:
-            matches = food_df[food_df[food_col].str.lower().str.startswith(food_keyword_singular, na=False)]
+        if not positions:
+            positions = index.prefix(food_keyword_singular)
         
         # Third try: food name contains keyword as whole word (singular)
-        if matches.empty:
-            pattern = r'\b' + re.escape(food_keyword_singular) + r'\b'
-            matches = food_df[food_df[food_col].str.contains(pattern, case=False, na=False, regex=True)]
+        if not positions:
+            positions = index.words(food_keyword_singular)
         
         # Fourth try: original keyword
-        if matches.empty and food_keyword != food_keyword_singular:
-            pattern = r'\b' + re.escape(food_keyword) + r'\b'
-            matches = food_df[food_df[food_col].str.contains(pattern, case=False, na=False, regex=True)]
+        if not positions and food_keyword != food_keyword_singular:
+            positions = index.words(food_keyword)
+        
+        # Trigram candidates, in row order; names sharing no trigram cannot reach the thresholds below
+        candidates = [] if positions else sorted(pos for pos, _ in index.fuzzy(food_keyword_singular, limit=None))
         
         # Fifth try: typo correction with strict threshold (85%+)
-        if matches.empty:
+        if not positions:
             best_match_idx = None
             best_score = 0.85
             
-            for idx, row in food_df.iterrows():
-                food_name = str(row[food_col]).lower()
+            for idx in candidates:
+                food_name = index.names[idx]
                 score = SequenceMatcher(None, food_keyword_singular, food_name).ratio()
                 
                 if score > best_score:
@@ -2738,15 +2865,15 @@ class FitnessChatbot:
                     best_match_idx = idx
             
             if best_match_idx is not None:
-                matches = food_df.loc[[best_match_idx]]
+                positions = [best_match_idx]
         
         # Phase 2: Related items fallback (if no exact/typo match found)
-        if matches.empty:
+        if not positions:
             # Look for related foods with lower threshold (60%+)
             related_matches = []
             
-            for idx, row in food_df.iterrows():
-                food_name = str(row[food_col]).lower()
+            for idx in candidates:
+                food_name = index.names[idx]
                 
                 # Check if any word in food name is similar to keyword
                 words = food_name.split()
@@ -2766,9 +2893,9 @@ class FitnessChatbot:
             # Sort by score and take top matches
             if related_matches:
                 related_matches.sort(key=lambda x: x[1], reverse=True)
-                top_indices = [idx for idx, _ in related_matches[:3]]
-                matches = food_df.loc[top_indices]
+                positions = [idx for idx, _ in related_matches[:3]]
         
+        matches = food_df.iloc[positions]
         if matches.empty:
             return None
         
@@ -2898,12 +3025,16 @@ class FitnessChatbot:
 
 
 chatbot_instance: Optional[FitnessChatbot] = None
+_chatbot_lock = threading.Lock()
 
 
 def get_chatbot() -> FitnessChatbot:
+    """Return the shared chatbot, building it at most once even under concurrent first calls."""
     global chatbot_instance
     if chatbot_instance is None:
-        chatbot_instance = FitnessChatbot()
+        with _chatbot_lock:
+            if chatbot_instance is None:
+                chatbot_instance = FitnessChatbot()
     return chatbot_instance
 
 
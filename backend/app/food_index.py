@@ -0,0 +1,256 @@
+"""
+Shared food name index: exact, prefix, substring, whole-word and trigram fuzzy lookup, plus
+an Aho-Corasick extractor for food mentions in free text.
+
+Positions returned by the lookup methods are row positions in the list the index was built from,
+in row order, so callers can keep "first matching row wins" semantics with `df.iloc[pos]`.
+"""
+
+import bisect
+import re
+from collections import defaultdict, deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+_WORD_RE = re.compile(r"\w+")
+_PAREN_RE = re.compile(r"^(.*?)\s*\((.*?)\)\s*$")
+
+
+def normalize_food_name(name: object) -> str:
+    return str(name or "").strip().lower()
+
+
+def _trigrams(text: str, padded: bool = True) -> Set[str]:
+    s = f"  {text} " if padded else text
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def default_aliases(names: Iterable[str]) -> Dict[str, str]:
+    """'Dish (Hindi name)' -> aliases 'dish' and 'hindi name' pointing at the full name."""
+    aliases: Dict[str, str] = {}
+    for name in names:
+        m = _PAREN_RE.match(normalize_food_name(name))
+        if not m:
+            continue
+        for alias in (m.group(1).strip(), m.group(2).strip()):
+            if alias and alias not in aliases:
+                aliases[alias] = normalize_food_name(name)
+    return aliases
+
+
+class FoodMention(NamedTuple):
+    name: str   # canonical (normalized) catalog name
+    start: int  # span in the text
+    end: int
+
+
+class MentionAutomaton:
+    """Aho-Corasick automaton over pattern -> canonical name; one pass over the text finds every hit."""
+
+    def __init__(self, patterns: Dict[str, str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[Tuple[int, str]]] = [None]  # (pattern length, canonical)
+        self._next_output: List[int] = [0]  # nearest node on the fail chain with an output (0 = none)
+        for pattern, canonical in patterns.items():
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._next_output.append(0)
+                node = nxt
+            self._output[node] = (len(pattern), canonical)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                link = self._fail[child]
+                self._next_output[child] = link if self._output[link] is not None else self._next_output[link]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        node = 0
+        goto, fail, output, next_output = self._goto, self._fail, self._output, self._next_output
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if output[node] is not None else next_output[node]
+            while hit:
+                length, canonical = output[hit]
+                yield i + 1 - length, i + 1, canonical
+                hit = next_output[hit]
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+class FoodNameIndex:
+    """Build once per catalog; every lookup avoids scanning the rows one by one in Python."""
+
+    def __init__(self, names: Iterable[object], aliases: Optional[Dict[str, str]] = None):
+        self.names: List[str] = [normalize_food_name(n) for n in names]
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        for pos, name in enumerate(self.names):
+            self._exact[name].append(pos)
+        # Aliases only fill gaps; a real catalog name always wins
+        self._aliases = {
+            normalize_food_name(a): normalize_food_name(c)
+            for a, c in (aliases or {}).items()
+            if normalize_food_name(a) not in self._exact and normalize_food_name(c) in self._exact
+        }
+
+        # Prefix: sorted (name, position) array
+        self._sorted: List[Tuple[str, int]] = sorted((name, pos) for pos, name in enumerate(self.names))
+        self._sorted_keys = [name for name, _ in self._sorted]
+
+        # Substring: all names joined, with row start offsets for bisect
+        self._joined = "\n".join(self.names)
+        self._starts: List[int] = []
+        offset = 0
+        for name in self.names:
+            self._starts.append(offset)
+            offset += len(name) + 1
+
+        # Whole words and trigrams
+        self._words: Dict[str, Set[int]] = defaultdict(set)
+        self._grams: Dict[str, List[int]] = defaultdict(list)
+        self._gram_counts: List[int] = []
+        for pos, name in enumerate(self.names):
+            for word in set(_WORD_RE.findall(name)):
+                self._words[word].add(pos)
+            grams = _trigrams(name)
+            for word in set(_WORD_RE.findall(name)):
+                grams |= _trigrams(word)
+            for g in grams:
+                self._grams[g].append(pos)
+            self._gram_counts.append(len(grams))
+        self._short = [pos for pos, name in enumerate(self.names) if 0 < len(name) < 3]
+        self._automaton: Optional[MentionAutomaton] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def resolve(self, query: str) -> str:
+        """Normalized query with aliases mapped to their canonical name."""
+        q = normalize_food_name(query)
+        return self._aliases.get(q, q)
+
+    def exact_all(self, query: str) -> List[int]:
+        return list(self._exact.get(self.resolve(query), []))
+
+    def exact(self, query: str) -> Optional[int]:
+        hits = self._exact.get(self.resolve(query))
+        return hits[0] if hits else None
+
+    def prefix(self, query: str, limit: Optional[int] = None) -> List[int]:
+        q = normalize_food_name(query)
+        out: List[int] = []
+        i = bisect.bisect_left(self._sorted_keys, q)
+        while i < len(self._sorted) and self._sorted_keys[i].startswith(q):
+            out.append(self._sorted[i][1])
+            i += 1
+        out.sort()
+        return out[:limit] if limit is not None else out
+
+    def contains(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """Rows whose name contains the query, in row order."""
+        q = normalize_food_name(query)
+        if "\n" in q:
+            return []
+        out: List[int] = []
+        start = 0
+        while limit is None or len(out) < limit:
+            hit = self._joined.find(q, start)
+            if hit < 0:
+                break
+            pos = bisect.bisect_right(self._starts, hit) - 1
+            if hit + len(q) <= self._starts[pos] + len(self.names[pos]):
+                out.append(pos)
+            start = self._starts[pos + 1] if pos + 1 < len(self._starts) else len(self._joined) + 1
+        return out
+
+    def words(self, query: str) -> List[int]:
+        """Rows containing the query as a whole word or phrase (like a \\b...\\b regex)."""
+        q = normalize_food_name(query)
+        tokens = _WORD_RE.findall(q)
+        if not tokens:
+            return []
+        candidates = set.intersection(*(self._words.get(t, set()) for t in tokens))
+        if not candidates:
+            return []
+        pattern = re.compile(r"\b" + re.escape(q) + r"\b")
+        return sorted(pos for pos in candidates if pattern.search(self.names[pos]))
+
+    def fuzzy(self, query: str, limit: Optional[int] = 10, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """Rows sharing trigrams with the query, scored by Dice similarity (best first, then row order)."""
+        q = normalize_food_name(query)
+        grams = _trigrams(q)
+        for word in set(_WORD_RE.findall(q)):
+            grams |= _trigrams(word)
+        if not grams:
+            return []
+        shared: Dict[int, int] = defaultdict(int)
+        for g in grams:
+            for pos in self._grams.get(g, ()):
+                shared[pos] += 1
+        scored = [
+            (pos, 2.0 * n / (len(grams) + self._gram_counts[pos]))
+            for pos, n in shared.items()
+        ]
+        scored = [s for s in scored if s[1] >= min_score]
+        scored.sort(key=lambda s: (-s[1], s[0]))
+        return scored[:limit] if limit is not None else scored
+
+    def mentioned_in(self, text: str) -> List[int]:
+        """Rows whose full name occurs somewhere in `text`, in row order."""
+        t = normalize_food_name(text)
+        text_grams = _trigrams(t, padded=False)
+        counts: Dict[int, int] = defaultdict(int)
+        for g in text_grams:
+            for pos in self._grams.get(g, ()):
+                counts[pos] += 1
+        candidates = set(counts)
+        # Names shorter than a trigram have no inner grams to match on
+        candidates.update(self._short)
+        return sorted(pos for pos in candidates if self.names[pos] and self.names[pos] in t)
+
+    def mentions(self, text: Optional[str], whole_words: bool = True) -> List[FoodMention]:
+        """Non-overlapping food mentions in text order; at each position the longest name or alias wins.
+
+        The automaton is compiled on first use and lives as long as this index (one per catalog).
+        """
+        if not text:
+            return []
+        if self._automaton is None:
+            patterns = {name: name for name in self._exact if name}
+            for alias, canonical in self._aliases.items():
+                patterns.setdefault(alias, canonical)
+            self._automaton = MentionAutomaton(patterns)
+        t = text.lower()
+        hits = [
+            (start, end, name)
+            for start, end, name in self._automaton.iter_matches(t)
+            if not whole_words or _is_boundary(t, start, end)
+        ]
+        hits.sort(key=lambda h: (h[0], -h[1]))
+        out: List[FoodMention] = []
+        last_end = 0
+        for start, end, name in hits:
+            if start >= last_end:
+                out.append(FoodMention(name, start, end))
+                last_end = end
+        return out
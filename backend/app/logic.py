@@ -1,8 +1,16 @@
+import copy
+import hashlib
+import json
 import os
 import re
-from typing import Any, Dict, List, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 import pandas as pd
+from . import plan_store
+from .food_index import FoodNameIndex, default_aliases, normalize_food_name
+from .nutrient_matrix import NUTRIENT_KEYS, NutrientMatrix, profile_dict
 from sklearn.preprocessing import StandardScaler
 from sklearn.neighbors import NearestNeighbors
 
@@ -14,6 +22,7 @@ DISEASE_DATASET_PATH = os.path.join(BASE_DIR, "real_disease_food_nutrition_datas
 DIET_REC_DATASET_PATH = os.path.join(BASE_DIR, "diet_recommendations_dataset.csv")
 CHATBOT_DATASET_PATH = os.path.join(BASE_DIR, "fitness_chatbot_training_dataset.csv")
 CSV_PATH = Path(__file__).resolve().parent / "Indian_Food_Nutrition_Processed.csv"
+ENHANCED_CSV_PATH = Path(__file__).resolve().parent / "Indian_Food_Nutrition_Enhanced.csv"
 NUTRITION_DATASET_PATH = os.path.join(BASE_DIR, "real_disease_food_nutrition_dataset.csv")
 
 # =========================================================
@@ -420,12 +429,135 @@ FOOD_ALTERNATIVES = {
 }
 
 def kcal_per_100g(food: str) -> float:
-    row = df_food[df_food["food"].str.lower() == (food or "").lower()]
-    return float(row.iloc[0]["calories"]) if not row.empty else 0.0
+    pos = get_food_index().exact(food)
+    return float(get_food_catalog().iloc[pos]["calories"]) if pos is not None else 0.0
 
 def healthy_alternatives(food: str) -> List[str]:
     return FOOD_ALTERNATIVES.get((food or "").lower(), [])
 
+# Micronutrient columns of the food catalog, per 100 g
+MICRONUTRIENT_COLUMNS = ["sodium (mg)", "calcium (mg)", "iron (mg)", "vitamin c (mg)", "folate (µg)", "free sugar (g)", "fibre (g)"]
+
+class FoodMicronutrients:
+    """Precomputed food name -> micronutrient vector (per 100 g) over the food catalog.
+
+    The first catalog row for a name wins. `lookup` falls back to the first catalog food whose
+    name contains the query (via the shared FoodNameIndex).
+    """
+
+    def __init__(self, df: pd.DataFrame, index: FoodNameIndex):
+        self.columns = [c for c in MICRONUTRIENT_COLUMNS if c in df.columns]
+        self.index = index
+        self.values = df[self.columns].apply(pd.to_numeric, errors="coerce").fillna(0.0).to_numpy(dtype=float)
+
+    def lookup(self, food_name: str, fuzzy: bool = True) -> Optional[Any]:
+        name = normalize_food_name(food_name)
+        if not name:
+            return None
+        pos = self.index.exact(name)
+        if pos is None and fuzzy:
+            hits = self.index.contains(name, limit=1)
+            pos = hits[0] if hits else None
+        return self.values[pos] if pos is not None else None
+
+    def value(self, food_name: str, column: str, fuzzy: bool = True) -> Optional[float]:
+        if column not in self.columns:
+            return None
+        vector = self.lookup(food_name, fuzzy)
+        return float(vector[self.columns.index(column)]) if vector is not None else None
+
+_food_catalog: Optional[pd.DataFrame] = None
+_food_index: Optional[FoodNameIndex] = None
+_food_catalog_lock = threading.Lock()
+
+def get_food_catalog() -> pd.DataFrame:
+    """The processed food CSV loaded once via load_foods (treat as read-only)."""
+    global _food_catalog
+    if _food_catalog is None:
+        with _food_catalog_lock:
+            if _food_catalog is None:
+                _food_catalog = load_foods(CSV_PATH).reset_index(drop=True)
+    return _food_catalog
+
+def get_food_index() -> FoodNameIndex:
+    """Name index over get_food_catalog() rows (positions are iloc positions)."""
+    global _food_index
+    if _food_index is None:
+        catalog = get_food_catalog()
+        with _food_catalog_lock:
+            if _food_index is None:
+                names = catalog["food"].tolist()
+                _food_index = FoodNameIndex(names, default_aliases(names))
+    return _food_index
+
+_food_micronutrients: Optional[FoodMicronutrients] = None
+_food_micronutrients_lock = threading.Lock()
+
+def get_food_micronutrients() -> FoodMicronutrients:
+    global _food_micronutrients
+    if _food_micronutrients is None:
+        with _food_micronutrients_lock:
+            if _food_micronutrients is None:
+                _food_micronutrients = FoodMicronutrients(get_food_catalog(), get_food_index())
+    return _food_micronutrients
+
+_nutrient_matrix: Optional[NutrientMatrix] = None
+_nutrient_matrix_lock = threading.Lock()
+
+def get_nutrient_matrix() -> NutrientMatrix:
+    """Food x nutrient matrix over the enhanced CSV (falls back to the processed catalog)."""
+    global _nutrient_matrix
+    if _nutrient_matrix is None:
+        with _nutrient_matrix_lock:
+            if _nutrient_matrix is None:
+                try:
+                    enhanced = load_foods(ENHANCED_CSV_PATH).reset_index(drop=True)
+                    names = enhanced["food"].tolist()
+                    _nutrient_matrix = NutrientMatrix(enhanced, FoodNameIndex(names, default_aliases(names)))
+                except Exception as e:
+                    print(f"⚠ Enhanced food CSV unavailable, using processed catalog for nutrients: {e}")
+                    _nutrient_matrix = NutrientMatrix(get_food_catalog(), get_food_index())
+    return _nutrient_matrix
+
+# Side dishes the plan text suggests, as real catalog servings (food, grams)
+SALAD_SIDE = ("Tossed salad", 100.0)
+RICE_SIDE = ("Boiled rice (Uble chawal)", 150.0)
+DAL_SIDE = ("Mixed dal", 100.0)
+
+def plan_servings(plan: List[Dict[str, Any]]) -> List[tuple]:
+    """(food, grams) servings of a recommendation plan's main items (the calorie-targeted part)."""
+    return [(str(m.get("food_name", "")), float(m.get("serving_g", 100) or 100)) for m in plan]
+
+def side_servings(plan: List[Dict[str, Any]]) -> List[tuple]:
+    """(food, grams) servings of the salad/rice/dal sides the plan text suggests alongside its mains."""
+    servings = []
+    for m in plan:
+        if m.get("salad_component"):
+            servings.append(SALAD_SIDE)
+        rice_portion = str(m.get("rice_portion") or "").lower()
+        if rice_portion:
+            servings.append(RICE_SIDE)
+            if "dal" in rice_portion:
+                servings.append(DAL_SIDE)
+    return servings
+
+def plan_kcal_correction(plan: List[Dict[str, Any]]) -> float:
+    """kcal to add to a plan's matrix total so main items count at the engine's calorie density.
+
+    suggest_for_target repairs catalog rows whose kcal is implausibly low for their macros; the
+    matrix holds raw catalog values, so the difference is applied here.
+    """
+    matrix = get_nutrient_matrix()
+    kcal_col = NUTRIENT_KEYS.index("calories")
+    delta = 0.0
+    for m in plan:
+        pos = matrix.row(str(m.get("food_name", "")))
+        if pos is None:
+            continue
+        serving = float(m.get("serving_g", 100) or 100)
+        delta += (float(m.get("calories", 0) or 0) - matrix.values[pos, kcal_col]) * serving / 100.0
+    return delta
+
 def get_disease_recommendations(diseases: List[str]) -> Dict[str, List[str]]:
     """Get consume and avoid lists for given diseases."""
     consume = []
@@ -515,17 +647,15 @@ def get_diet_recommendation_text(user_data: Optional[Dict]) -> str:
     recommendation = df_diet_rec.iloc[nearest_idx]["diet_recommendation"]
     return str(recommendation).strip()
 
-def _extract_foods_from_text(text: Optional[str], df: pd.DataFrame) -> List[str]:
+def _extract_foods_from_text(text: Optional[str], df: Optional[pd.DataFrame] = None) -> List[str]:
+    """Catalog foods mentioned in text (longest non-overlapping matches, in text order), at most 20."""
     if not text:
         return []
-    t = text.lower()
-    foods = []
     try:
-        for name in df["food"].astype(str).str.lower().unique():
-            if name and name in t:
-                foods.append(name)
+        index = get_food_index() if df is None or df is get_food_catalog() else FoodNameIndex(df["food"].tolist())
+        foods = [m.name for m in index.mentions(text)]
     except Exception:
-        pass
+        foods = []
     return list(dict.fromkeys(foods))[:20]
 
 def filter_foods_by_diseases(food_df: pd.DataFrame, diseases: List[str], diet_type: str) -> pd.DataFrame:
@@ -1384,7 +1514,54 @@ def get_yoga(level: str, target_area: Optional[str] = None, target_count: int =
 # =========================================================
 # ================= MAIN RECOMMENDER ======================
 # =========================================================
-def generate_recommendations(user_data: Dict) -> Dict:
+def stable_hash(*parts: object) -> int:
+    """64-bit hash that is the same in every process (built-in str hash is salted per process)."""
+    h = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return int.from_bytes(h.digest(), "big")
+
+def plan_fingerprint(user_data: Dict) -> str:
+    """Content address of the recommendation inputs: equal inputs give equal plans in any worker."""
+    payload = json.dumps(user_data, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Recommendations by (fingerprint, seed); results are deterministic, so a hit is the same plan
+RECOMMENDATION_CACHE_SIZE = 256
+_recommendation_cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+_recommendation_cache_lock = threading.Lock()
+
+def generate_recommendations(user_data: Dict, seed: Optional[int] = None) -> Dict:
+    """Diet/workout recommendations for a profile. Deterministic: the alternative-plan picks are
+    seeded from the profile fingerprint unless an explicit seed is given. Callers get their own copy."""
+    fingerprint = plan_fingerprint(user_data)
+    plan_seed = seed if seed is not None else stable_hash(fingerprint)
+    key = (fingerprint, plan_seed)
+    with _recommendation_cache_lock:
+        cached = _recommendation_cache.get(key)
+        if cached is not None:
+            _recommendation_cache.move_to_end(key)
+            return copy.deepcopy(cached)
+
+    result = None
+    if seed is None and ARCHETYPE_PLANS_ENABLED:
+        archetype = archetype_key(user_data)
+        if archetype is not None:
+            plan_seed = archetype_seed(archetype)
+            result = apply_archetype_overlay(get_archetype_plan(archetype), user_data)
+    if result is None:
+        result = _generate_recommendations(user_data, plan_seed)
+    result["plan_fingerprint"] = fingerprint
+    result["plan_seed"] = plan_seed
+    with _recommendation_cache_lock:
+        _recommendation_cache[key] = result
+        while len(_recommendation_cache) > RECOMMENDATION_CACHE_SIZE:
+            _recommendation_cache.popitem(last=False)
+    return copy.deepcopy(result)
+
+def _recommendation_context(user_data: Dict) -> Dict[str, Any]:
+    """Targets, filtered catalog and boost/penalty foods shared by every meal of a recommendation."""
     bmi = compute_bmi(
         user_data.get("height_cm", 170),
         user_data.get("weight_kg", 70)
@@ -1399,8 +1576,8 @@ def generate_recommendations(user_data: Dict) -> Dict:
     daily_cal = daily_calorie_target(weight_kg_val, height_cm_val, lifestyle_val, user_data.get("motive", "fitness"), age_val, gender_val)
     daily_protein_g = daily_protein_target(weight_kg_val, user_data.get("motive", "fitness"), lifestyle_val, age_val)
 
-    # Load and filter foods
-    df = load_foods(CSV_PATH)
+    # Load and filter foods (shared catalog; filter_foods_by_diseases works on a copy)
+    df = get_food_catalog()
     print(f"DEBUG: Loaded foods columns: {df.columns.tolist()}")
     print(f"DEBUG: Protein max: {df['protein'].max()}")
     diseases_list = [d.strip() for d in user_data.get("diseases", "").split(",") if d.strip()] if user_data.get("diseases") else []
@@ -1419,89 +1596,131 @@ def generate_recommendations(user_data: Dict) -> Dict:
     meal_shares = {"breakfast": 0.25, "lunch": 0.35, "snacks": 0.15, "dinner": 0.25}
     meal_targets = {m: round(daily_cal * meal_shares.get(m, 0.25), 1) for m in ["breakfast", "lunch", "snacks", "dinner"]}
 
+
+    return {
+        "bmi": bmi,
+        "daily_cal": daily_cal,
+        "daily_protein_g": daily_protein_g,
+        "df": df,
+        "filtered_df": filtered_df,
+        "diseases_list": diseases_list,
+        "allergies_list": allergies_list,
+        "diet_type": diet_type,
+        "diet_text": diet_text,
+        "boost_foods": boost_foods,
+        "penalty_foods": penalty_foods,
+        "meal_targets": meal_targets,
+    }
+
+def _meal_user_foods(user_data: Dict, meal: str) -> List[str]:
+    # Parse user-entered preferences more robustly
+    raw_pref = user_data.get(meal, "") or ""
+    user_foods = parse_meal_preferences(raw_pref)
+    # If nothing from parse, fallback to comma split
+    if not user_foods and raw_pref:
+        user_foods = [x.strip() for x in raw_pref.split(",") if x.strip()]
+    return user_foods
+
+def _main_meal_entry(ctx: Dict[str, Any], user_data: Dict, meal: str, used_foods: List[str]) -> Tuple[Optional[Dict], List[Dict]]:
+    """Main diet entry of one meal and its ranked suggestions (entry is None when nothing fits)."""
+    cal = ctx["meal_targets"][meal]
+    suggestions = suggest_for_target(
+        ctx["filtered_df"],
+        cal,
+        topn=15, # Increased from 10 to 15 to provide more alternatives
+        user_foods=_meal_user_foods(user_data, meal),
+        allergies=ctx["allergies_list"],
+        is_snack=(meal=="snacks"),
+        is_main_meal=(meal in ["breakfast","lunch","dinner"]),
+        exclude_foods=used_foods,
+        bmi=ctx["bmi"],
+        motive=user_data.get("motive"),
+        diet_type=ctx["diet_type"],
+        diseases=ctx["diseases_list"],
+        age=user_data.get("age"),
+        gender=user_data.get("gender"),
+        boost_foods=ctx["boost_foods"],
+        penalty_foods=ctx["penalty_foods"]
+    )
+    if not suggestions:
+        return None, []
+    # Main recommendation: first suggestion
+    s = suggestions[0]
+
+    # Build meal components with salads and portions
+    food_name = s["food"].title()
+    salad_component = ""
+    rice_portion = ""
+    pro_tip = ""
+    
+    # Add salad component if this is a main meal and doesn't already include salad
+    if meal in ["breakfast", "lunch", "dinner"]:
+        food_lower = s["food"].lower()
+        if not any(sal in food_lower for sal in ["salad", "raw", "fresh", "greens"]):
+            # Suggest complementary salad
+            salad_suggestions = {
+                "breakfast": "Green Salad with Cucumber & Tomato (100g)",
+                "lunch": "Mixed Green Salad with Carrots & Beetroot (100g)",
+                "dinner": "Fresh Vegetable Salad with Greens (100g)"
+            }
+            salad_component = salad_suggestions.get(meal, "Green Salad (100g)")
+    
+    # Add rice/curry guidance if applicable
+    if meal in ["lunch", "dinner"]:
+        food_lower = s["food"].lower()
+        if any(r in food_lower for r in ["rice", "curry", "dal"]):
+            rice_portion = "Pair with moderate rice (150g) + curry/dal for balanced carbs + protein"
+            pro_tip = "💡 Pro Tip: Pair with moderate rice (150g) + curry/dal for balanced carbs + protein"
+        elif any(p in food_lower for p in ["chicken", "fish", "egg", "meat"]):
+            rice_portion = "Add moderate rice/curry to reach target calories"
+            pro_tip = f"💡 Pro Tip: Start with {food_name} (main dish), add fresh salad side and moderate rice/curry to reach target calories"
+    
+    entry = {
+        "meal_type": meal,
+        "food_name": food_name,
+        "salad_component": salad_component,
+        "rice_portion": rice_portion,
+        "pro_tip": pro_tip,
+        "calories": s["calories_per_100g"],
+        "protein_g": s["protein_g"],
+        "carbs_g": s["carbs_g"],
+        "fat_g": s["fat_g"],
+        "meal_target_calories": cal,
+        "serving_g": s["serving_g"]
+    }
+    return entry, suggestions
+
+def recommend_meal(user_data: Dict, meal: str, exclude_foods: Optional[List[str]] = None) -> List[Dict]:
+    """Main diet entry for a single meal, scored like generate_recommendations but without the other
+    meals and the alternative plans. `exclude_foods` are the foods already picked for other meals."""
+    ctx = _recommendation_context(user_data)
+    if meal not in ctx["meal_targets"]:
+        return []
+    entry, _ = _main_meal_entry(ctx, user_data, meal, list(exclude_foods or []))
+    return [entry] if entry else []
+
+def _generate_recommendations(user_data: Dict, plan_seed: int) -> Dict:
+    ctx = _recommendation_context(user_data)
+    bmi, daily_cal, daily_protein_g = ctx["bmi"], ctx["daily_cal"], ctx["daily_protein_g"]
+    df, filtered_df, diet_type = ctx["df"], ctx["filtered_df"], ctx["diet_type"]
+    diseases_list, allergies_list = ctx["diseases_list"], ctx["allergies_list"]
+    diet_text, boost_foods, penalty_foods = ctx["diet_text"], ctx["boost_foods"], ctx["penalty_foods"]
+    meal_targets = ctx["meal_targets"]
+
     diet = []
     diet_alternatives = {}
     used_foods = []
     debug_info = []
-    for meal, cal in meal_targets.items():
-        # Parse user-entered preferences more robustly
-        raw_pref = user_data.get(meal, "") or ""
-        user_foods = parse_meal_preferences(raw_pref)
-        # If nothing from parse, fallback to comma split
-        if not user_foods and raw_pref:
-            user_foods = [x.strip() for x in raw_pref.split(",") if x.strip()]
-        debug_info.append(f"Meal {meal}: raw='{raw_pref}' → parsed={user_foods}")
-        suggestions = suggest_for_target(
-            filtered_df,
-            cal,
-            topn=15, # Increased from 10 to 15 to provide more alternatives
-            user_foods=user_foods,
-            allergies=allergies_list,
-            is_snack=(meal=="snacks"),
-            is_main_meal=(meal in ["breakfast","lunch","dinner"]),
-            exclude_foods=used_foods,
-            bmi=bmi,
-            motive=user_data.get("motive"),
-            diet_type=diet_type,
-            diseases=diseases_list,
-            age=user_data.get("age"),
-            gender=user_data.get("gender"),
-            boost_foods=boost_foods,
-            penalty_foods=penalty_foods
-        )
-        if suggestions:
-            # Main recommendation: first suggestion
-            s = suggestions[0]
-            used_foods.append(s["food"])
-            
-            # Store alternatives (everything except the main choice)
-            diet_alternatives[meal] = suggestions[1:]
-            
-            # Build meal components with salads and portions
-            food_name = s["food"].title()
-            salad_component = ""
-            rice_portion = ""
-            pro_tip = ""
-            
-            # Add salad component if this is a main meal and doesn't already include salad
-            if meal in ["breakfast", "lunch", "dinner"]:
-                food_lower = s["food"].lower()
-                if not any(sal in food_lower for sal in ["salad", "raw", "fresh", "greens"]):
-                    # Suggest complementary salad
-                    salad_suggestions = {
-                        "breakfast": "Green Salad with Cucumber & Tomato (100g)",
-                        "lunch": "Mixed Green Salad with Carrots & Beetroot (100g)",
-                        "dinner": "Fresh Vegetable Salad with Greens (100g)"
-                    }
-                    salad_component = salad_suggestions.get(meal, "Green Salad (100g)")
-            
-            # Add rice/curry guidance if applicable
-            if meal in ["lunch", "dinner"]:
-                food_lower = s["food"].lower()
-                if any(r in food_lower for r in ["rice", "curry", "dal"]):
-                    rice_portion = "Pair with moderate rice (150g) + curry/dal for balanced carbs + protein"
-                    pro_tip = "💡 Pro Tip: Pair with moderate rice (150g) + curry/dal for balanced carbs + protein"
-                elif any(p in food_lower for p in ["chicken", "fish", "egg", "meat"]):
-                    rice_portion = "Add moderate rice/curry to reach target calories"
-                    pro_tip = f"💡 Pro Tip: Start with {food_name} (main dish), add fresh salad side and moderate rice/curry to reach target calories"
-            
-            diet.append({
-                "meal_type": meal,
-                "food_name": food_name,
-                "salad_component": salad_component,
-                "rice_portion": rice_portion,
-                "pro_tip": pro_tip,
-                "calories": s["calories_per_100g"],
-                "protein_g": s["protein_g"],
-                "carbs_g": s["carbs_g"],
-                "fat_g": s["fat_g"],
-                "meal_target_calories": cal,
-                "serving_g": s["serving_g"]
-            })
+    for meal in meal_targets:
+        debug_info.append(f"Meal {meal}: raw='{user_data.get(meal, '') or ''}' → parsed={_meal_user_foods(user_data, meal)}")
+        entry, suggestions = _main_meal_entry(ctx, user_data, meal, used_foods)
+        if entry:
+            used_foods.append(suggestions[0]["food"])
+            diet.append(entry)
             # Alternatives: all suggestions
             diet_alternatives[meal] = suggestions
             # Add to used foods to avoid repetition
-            used_foods.append(s["food"])
+            used_foods.append(suggestions[0]["food"])
 
     # Generate 7 complete alternative daily meal plans with high diversity
     def build_meal_plan(plan_num: int) -> list:
@@ -1535,7 +1754,7 @@ def generate_recommendations(user_data: Dict) -> Dict:
             )
             
             # Pick the nth suggestion for this plan - ensure good spread through options
-            idx = (plan_num - 1 + (hash(meal) % 5)) % len(suggestions) if suggestions else 0
+            idx = (plan_num - 1 + (stable_hash(plan_seed, meal) % 5)) % len(suggestions) if suggestions else 0
             if suggestions and idx < len(suggestions):
                 s = suggestions[idx]
                 food_name = s["food"].title()
@@ -1581,12 +1800,6 @@ def generate_recommendations(user_data: Dict) -> Dict:
     # Generate 7 additional complete meal plans (8 total options)
     alternative_plans = [build_meal_plan(i) for i in range(1, 8)]
 
-    level = user_data.get("level", "beginner")
-    medical_conditions = _collect_medical_conditions(user_data)
-    injured_body_parts = _collect_injured_body_parts(user_data)
-    adherence_rate_14d = user_data.get("workout_completion_rate_14d")
-    workout_streak_days = user_data.get("workout_streak_days")
-
     # Build test output for display
     test_output = "User Meal Preferences:\n"
     for d in debug_info:
@@ -1595,43 +1808,7 @@ def generate_recommendations(user_data: Dict) -> Dict:
     test_output += f"\nDiseases: {diseases_list}\nAllergies: {allergies_list}\nMotive: {user_data.get('motive')}\n"
     test_output += f"Daily Calories: {daily_cal}\nRequired Protein: {daily_protein_g:.1f}g\n\n"
 
-    # Calculate daily totals for each plan
-    def calc_plan_totals(plan: list) -> dict:
-        # Include estimated proteins from salads (avg 3-4g per 100g)
-        total_cal = sum(m["calories_serving"] if "calories_serving" in m else m["calories"] * m["serving_g"] / 100 for m in plan)
-        total_protein = sum(m["protein_g"] for m in plan)
-        total_carbs = sum(m["carbs_g"] for m in plan)
-        total_fat = sum(m["fat_g"] for m in plan)
-        
-        # Add estimated protein from salads (100g salad ~ 3g protein)
-        for m in plan:
-            if m.get("salad_component"):
-                total_protein += 3.0  # Estimate ~3g protein per 100g salad
-            if m.get("rice_portion"):
-                # Add estimated protein from rice/curry (150g cooked rice ~ 5g protein, 100g dal ~ 8g protein)
-                if "dal" in m["rice_portion"].lower():
-                    total_protein += 8.0
-                elif "rice" in m["rice_portion"].lower():
-                    total_protein += 5.0
-                else:
-                    total_protein += 6.5  # Average of both
-        
-        return {
-            "daily_calories": round(total_cal, 1),
-            "daily_protein_g": round(total_protein, 1),
-            "daily_carbs_g": round(total_carbs, 1),
-            "daily_fat_g": round(total_fat, 1),
-            "protein_met": total_protein >= daily_protein_g * 0.95
-        }
-    
-    main_plan_totals = calc_plan_totals(diet)
-    alternative_plans_with_totals = [
-        {
-            "plan_meals": plan,
-            **calc_plan_totals(plan)
-        }
-        for plan in alternative_plans
-    ]
+    main_plan_totals, alternative_plans_with_totals = _plans_with_totals(diet, alternative_plans, daily_protein_g)
 
     return {
         "bmi": bmi,
@@ -1643,20 +1820,230 @@ def generate_recommendations(user_data: Dict) -> Dict:
         "diet_totals": main_plan_totals,
         "diet_alternatives": diet_alternatives,
         "alternative_meal_plans": alternative_plans_with_totals,
+        **_workout_recommendations(user_data),
+        "diet_recommendation_text": diet_text,
+        "test_output": test_output
+    }
+
+def _plans_with_totals(diet: List[Dict], alternative_plans: List[List[Dict]], daily_protein_g: float) -> tuple:
+    """(main plan totals, alternatives with totals): nutrient profiles of all 8 plans in one matrix multiply.
+
+    Calories, macros and nutrients cover the main items, which are sized to the daily calorie
+    target; the suggested sides are reported separately under "sides_nutrients". Their protein
+    still counts towards daily_protein_g / protein_met, as it always has.
+    """
+    all_plans = [diet] + alternative_plans
+    profiles = get_nutrient_matrix().profiles(
+        [plan_servings(p) for p in all_plans] + [side_servings(p) for p in all_plans]
+    )
+    profiles[: len(all_plans), NUTRIENT_KEYS.index("calories")] += [plan_kcal_correction(p) for p in all_plans]
+    protein_col = NUTRIENT_KEYS.index("protein_g")
+
+    def plan_totals(vector, sides) -> dict:
+        nutrients = profile_dict(vector)
+        protein = float(vector[protein_col] + sides[protein_col])
+        return {
+            "daily_calories": nutrients["calories"],
+            "daily_protein_g": round(protein, 1),
+            "daily_carbs_g": nutrients["carbs_g"],
+            "daily_fat_g": nutrients["fat_g"],
+            "protein_met": protein >= daily_protein_g * 0.95,
+            "nutrients": nutrients,
+            "weekly_nutrients": profile_dict(vector * 7),
+            "sides_nutrients": profile_dict(sides),
+        }
+
+    mains, sides = profiles[: len(all_plans)], profiles[len(all_plans):]
+    main_plan_totals = plan_totals(mains[0], sides[0])
+    alternative_plans_with_totals = [
+        {
+            "plan_meals": plan,
+            **plan_totals(vector, side_vector)
+        }
+        for plan, vector, side_vector in zip(alternative_plans, mains[1:], sides[1:])
+    ]
+    return main_plan_totals, alternative_plans_with_totals
+
+def _workout_recommendations(user_data: Dict) -> Dict:
+    level = user_data.get("level", "beginner")
+    return {
         "workouts": get_exercises(
             level,
             target_count=12,
             target_area=user_data.get("target_area", ""),
             age=user_data.get("age"),
             weight_kg=user_data.get("weight_kg"),
-            medical_conditions=medical_conditions,
-            injured_body_parts=injured_body_parts,
-            adherence_rate_14d=adherence_rate_14d,
-            workout_streak_days=workout_streak_days,
+            medical_conditions=_collect_medical_conditions(user_data),
+            injured_body_parts=_collect_injured_body_parts(user_data),
+            adherence_rate_14d=user_data.get("workout_completion_rate_14d"),
+            workout_streak_days=user_data.get("workout_streak_days"),
         ),
         "yoga": get_yoga(level, target_area=user_data.get("target_area", "")),
+    }
+
+# ================= ARCHETYPE PLANS =================
+# Profiles without meal preferences that share quantized diet inputs get the same base diet plan,
+# built once for a representative profile; a per-user overlay scales portions to the exact calorie
+# target and adds the per-user workouts, text and totals. Set ARCHETYPE_PLANS=0 to disable.
+ARCHETYPE_PLANS_ENABLED = os.getenv("ARCHETYPE_PLANS", "1") != "0"
+BMI_BAND_WIDTH = 2.5
+ARCHETYPE_HEIGHT_CM = 170.0
+ARCHETYPE_CACHE_SIZE = 512
+MAX_SERVING_G = 800.0  # same cap as suggest_for_target
+_MEAL_KEYS = ("breakfast", "lunch", "snacks", "dinner")
+_archetype_plans: "OrderedDict[tuple, Dict]" = OrderedDict()
+_archetype_lock = threading.Lock()
+
+def _csv_key(value: Any) -> tuple:
+    return tuple(sorted({x.strip().lower() for x in str(value or "").split(",") if x.strip()}))
+
+def archetype_key(user_data: Dict) -> Optional[tuple]:
+    """Canonical archetype of a profile, or None when it needs the full pipeline (meal preferences set).
+
+    (BMI band, motive, diet type, lifestyle, diseases, allergies, gender, 60+). Gender and the 60+ flag
+    are included because they change the KNN diet text and the food scoring.
+    """
+    if any(str(user_data.get(m) or "").strip() for m in _MEAL_KEYS):
+        return None
+    try:
+        bmi = compute_bmi(float(user_data.get("height_cm", 170)), float(user_data.get("weight_kg", 70)))
+        age = float(user_data.get("age") or 0)
+    except (TypeError, ValueError):
+        return None
+    return (
+        int(bmi // BMI_BAND_WIDTH),
+        str(user_data.get("motive") or "fitness").strip().lower(),
+        str(user_data.get("diet_type") or "vegetarian").strip().lower(),
+        str(user_data.get("lifestyle_level", user_data.get("lifestyle")) or "sedentary").strip().lower(),
+        _csv_key(user_data.get("diseases")),
+        _csv_key(user_data.get("allergies")),
+        str(user_data.get("gender") or "male").strip().lower(),
+        age >= 60,
+    )
+
+def archetype_seed(key: tuple) -> int:
+    return stable_hash("archetype", repr(key))
+
+def _archetype_profile(key: tuple) -> Dict:
+    band, motive, diet_type, lifestyle, diseases, allergies, gender, senior = key
+    bmi = (band + 0.5) * BMI_BAND_WIDTH
+    return {
+        "height_cm": ARCHETYPE_HEIGHT_CM,
+        "weight_kg": round(bmi * (ARCHETYPE_HEIGHT_CM / 100.0) ** 2, 1),
+        "motive": motive,
+        "diet_type": diet_type,
+        "lifestyle_level": lifestyle,
+        "diseases": ", ".join(diseases),
+        "allergies": ", ".join(allergies),
+        "gender": gender,
+        "age": 65 if senior else 30,
+    }
+
+def build_archetype_plan(key: tuple) -> Dict:
+    """Base diet plan of an archetype (JSON-serializable; what plan_store keeps)."""
+    full = _generate_recommendations(_archetype_profile(key), archetype_seed(key))
+    return {
+        "archetype": list(key),
+        "daily_calories": full["daily_calories"],
+        "diet": full["diet"],
+        "diet_alternatives": full["diet_alternatives"],
+        "alternative_plans": [p["plan_meals"] for p in full["alternative_meal_plans"]],
+    }
+
+def get_archetype_plan(key: tuple) -> Dict:
+    """Base plan from memory, then the shared plan store, else built and stored."""
+    with _archetype_lock:
+        cached = _archetype_plans.get(key)
+        if cached is not None:
+            _archetype_plans.move_to_end(key)
+            return cached
+    content_key = plan_store.content_key("archetype", repr(key))
+    payload = plan_store.get(content_key)
+    if payload is not None:
+        plan = json.loads(payload)
+    else:
+        plan = build_archetype_plan(key)
+        plan_store.put(content_key, "archetype", json.dumps(plan))
+    with _archetype_lock:
+        _archetype_plans[key] = plan
+        while len(_archetype_plans) > ARCHETYPE_CACHE_SIZE:
+            _archetype_plans.popitem(last=False)
+    return plan
+
+def _serving_cap(item: Dict, factor: float) -> float:
+    """`factor`, lowered so the item's serving stays within MAX_SERVING_G."""
+    serving = float(item.get("serving_g", 0) or 0)
+    return min(factor, MAX_SERVING_G / serving) if serving > 0 else factor
+
+def scale_plan_item(item: Dict, ratio: float) -> Dict:
+    """The item with its serving, macros and meal target scaled by `ratio` (capped at MAX_SERVING_G)."""
+    factor = _serving_cap(item, ratio)
+    out = dict(item)
+    for field in ("serving_g", "calories_serving", "protein_g", "carbs_g", "fat_g", "meal_target_calories"):
+        if field in out:
+            out[field] = round(float(out[field] or 0) * factor, 1)
+    return out
+
+def scale_plan(plan: List[Dict], ratio: float) -> List[Dict]:
+    """A plan's main items scaled to `ratio` times their total calories.
+
+    Calories an item cannot take because of the MAX_SERVING_G cap go to the other items, in
+    proportion to their calories; only when every item is capped does the plan fall short.
+    """
+    kcal = [float(m.get("calories", 0) or 0) * float(m.get("serving_g", 0) or 0) / 100.0 for m in plan]
+    target = ratio * sum(kcal)
+    factors = [_serving_cap(m, ratio) for m in plan]
+    capped: set = set()
+    while True:
+        newly = {i for i, m in enumerate(plan) if i not in capped and factors[i] < ratio}
+        if not newly:
+            break
+        capped |= newly
+        free = sum(k for i, k in enumerate(kcal) if i not in capped)
+        if free <= 0:
+            break
+        ratio = (target - sum(kcal[i] * factors[i] for i in capped)) / free
+        factors = [factors[i] if i in capped else _serving_cap(m, ratio) for i, m in enumerate(plan)]
+    return [scale_plan_item(m, f) for m, f in zip(plan, factors)]
+
+def apply_archetype_overlay(base: Dict, user_data: Dict) -> Dict:
+    """Full recommendation result for one user from an archetype base plan.
+
+    Servings are proportional to the meal calorie target in suggest_for_target, so scaling a plan by
+    the ratio of daily targets reproduces the user's calories. Servings stay within MAX_SERVING_G;
+    what a capped item cannot take is spread over the plan's other items (scale_plan). Meal swap
+    options are scaled on their own, so a capped option keeps a correspondingly smaller target.
+    """
+    bmi = compute_bmi(user_data.get("height_cm", 170), user_data.get("weight_kg", 70))
+    lifestyle_val = user_data.get("lifestyle_level", user_data.get("lifestyle", "sedentary"))
+    daily_cal = daily_calorie_target(
+        user_data.get("weight_kg", 70), user_data.get("height_cm", 170), lifestyle_val,
+        user_data.get("motive", "fitness"), user_data.get("age", None), user_data.get("gender", None)
+    )
+    daily_protein_g = daily_protein_target(user_data.get("weight_kg", 70), user_data.get("motive", "fitness"), lifestyle_val, user_data.get("age", None))
+    base_cal = float(base.get("daily_calories") or 0)
+    ratio = daily_cal / base_cal if base_cal > 0 else 1.0
+
+    diet = scale_plan(base["diet"], ratio)
+    diet_alternatives = {meal: [scale_plan_item(s, ratio) for s in items] for meal, items in base["diet_alternatives"].items()}
+    alternative_plans = [scale_plan(plan, ratio) for plan in base["alternative_plans"]]
+    main_plan_totals, alternative_plans_with_totals = _plans_with_totals(diet, alternative_plans, daily_protein_g)
+
+    test_output = f"Archetype plan {tuple(base.get('archetype', []))}, portions scaled x{ratio:.3f}\n"
+    test_output += f"Daily Calories: {daily_cal}\nRequired Protein: {daily_protein_g:.1f}g\n\n"
+    return {
+        "bmi": bmi,
+        "bmi_category": bmi_category(bmi),
+        "daily_calories": daily_cal,
+        "daily_protein_g": daily_protein_g,
+        "water_l": user_data.get("water_consumption_l", 2.5),
+        "diet": diet,
+        "diet_totals": main_plan_totals,
+        "diet_alternatives": diet_alternatives,
+        "alternative_meal_plans": alternative_plans_with_totals,
+        **_workout_recommendations(user_data),
         "diet_recommendation_text": get_diet_recommendation_text(user_data),
-        "test_output": test_output
+        "test_output": test_output,
     }
 
 # =========================================================
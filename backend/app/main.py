@@ -1,9 +1,11 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from app.database import Base, engine
 from app import models  # type: ignore
+from app import chat_store, warmup
 from app.routers import auth, profile, progress, reports, recommendations, images, chat, exercises, conversational_chat, nutrition, public_nutrition, weekly_meal_plan, public_weekly_meal_plan, weekly_workout_plan, adherence, faq
 
 app = FastAPI(title="Personalized Fitness API")
@@ -11,6 +13,17 @@ app = FastAPI(title="Personalized Fitness API")
 @app.on_event("startup")
 def _create_tables():
     Base.metadata.create_all(bind=engine)
+    adherence.ensure_analytics_indexes(engine)
+
+@app.on_event("startup")
+def _warm_up():
+    # Build chatbot / KNN / exercise data off the request path; /ready reports progress
+    warmup.start_background_warmup()
+
+@app.on_event("shutdown")
+def _flush_chat_feedback():
+    # Buffered ratings would otherwise be lost on restart or deploy
+    chat_store.feedback_log.close()
 
 # CORS
 app.add_middleware(
@@ -54,3 +67,9 @@ if GIF_DIR.exists():
 @app.get("/")
 def root():
     return {"message": "Welcome to the Personalized Fitness API"}
+
+@app.get("/ready")
+def ready():
+    warmup.retry_failed()
+    state = warmup.status()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
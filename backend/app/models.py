@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, UniqueConstraint, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, UniqueConstraint, Boolean, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 from datetime import datetime
@@ -67,6 +67,9 @@ class Profile(Base):
 
 class Progress(Base):
     __tablename__ = "progress"
+    __table_args__ = (
+        Index("ix_progress_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -150,6 +153,7 @@ class AdherenceLog(Base):
     consumed_planned_calories = Column(Float, default=0)
     completed_items_count = Column(Integer, default=0)
     total_items_count = Column(Integer, default=0)
+    # Legacy JSON blobs; new writes go to the child tables below and leave these as "[]".
     completed_item_ids_json = Column(Text, default="[]")
     extra_foods_json = Column(Text, default="[]")
     water_ml = Column(Integer, default=0)
@@ -158,6 +162,46 @@ class AdherenceLog(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    extra_foods = relationship(
+        "AdherenceExtraFood", order_by="AdherenceExtraFood.position", cascade="all, delete-orphan"
+    )
+    completed_items = relationship(
+        "AdherenceCompletedItem", order_by="AdherenceCompletedItem.position", cascade="all, delete-orphan"
+    )
+
+
+class AdherenceExtraFood(Base):
+    """Off-plan food logged on an adherence day."""
+    __tablename__ = "adherence_extra_foods"
+    __table_args__ = (
+        Index("ix_adherence_extra_user_date", "user_id", "log_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    adherence_log_id = Column(Integer, ForeignKey("adherence_logs.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    log_date = Column(String(20), nullable=False)  # YYYY-MM-DD, copied from the parent for range aggregates
+    position = Column(Integer, default=0)
+
+    name = Column(String(255), nullable=False)
+    calories = Column(Float, default=0)
+
+
+class AdherenceCompletedItem(Base):
+    """Meal plan item ticked off on an adherence day."""
+    __tablename__ = "adherence_completed_items"
+    __table_args__ = (
+        Index("ix_adherence_completed_user_date", "user_id", "log_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    adherence_log_id = Column(Integer, ForeignKey("adherence_logs.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    log_date = Column(String(20), nullable=False)
+    position = Column(Integer, default=0)
+
+    item_id = Column(String(255), nullable=False)
+
 
 class WorkoutDailyLog(Base):
     __tablename__ = "workout_daily_logs"
@@ -174,3 +218,108 @@ class WorkoutDailyLog(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# -------------------- NUTRITION LEDGER --------------------
+
+class NutritionDailyLog(Base):
+    """One macro/calorie/water entry per user and day (see routers/nutrition)."""
+    __tablename__ = "nutrition_daily_logs"
+    __table_args__ = (
+        UniqueConstraint("user_id", "log_date", name="uq_nutrition_daily_user_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # String so the public demo user ("public_user") shares the table with real user ids
+    user_id = Column(String(64), nullable=False, index=True)
+    log_date = Column(String(20), nullable=False, index=True)  # YYYY-MM-DD
+
+    protein_g = Column(Float, default=0)
+    carbs_g = Column(Float, default=0)
+    fats_g = Column(Float, default=0)
+    target_protein_g = Column(Float, default=0)
+    target_carbs_g = Column(Float, default=0)
+    target_fats_g = Column(Float, default=0)
+    calories = Column(Integer, default=0)
+    water_ml = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# -------------------- PLAN CACHE --------------------
+
+class PlanCacheEntry(Base):
+    """Generated plan stored under the hash of its inputs, shared by all workers (see plan_store)."""
+    __tablename__ = "plan_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_key = Column(String(64), nullable=False, unique=True)  # sha256 hex
+    kind = Column(String(32), nullable=False)
+    payload_json = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)  # retention pruning (plan_store)
+
+
+# -------------------- CONVERSATIONAL CHAT --------------------
+
+class ChatFeedback(Base):
+    """Append-only log of ratings on conversational chatbot answers."""
+    __tablename__ = "chat_feedback"
+
+    id = Column(Integer, primary_key=True, index=True)
+    feedback_id = Column(String(36), nullable=False, unique=True)
+    session_id = Column(String(64), nullable=False, index=True)
+    user_id = Column(String(64), index=True)
+    message_id = Column(String(64))
+    rating = Column(Integer, nullable=False)
+    feedback = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ChatUserProfile(Base):
+    """Append-only profile versions for the conversational chatbot; the newest row per user wins."""
+    __tablename__ = "chat_user_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String(64), nullable=False, index=True)
+    profile_json = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AdherenceRollup(Base):
+    """Per-user adherence aggregates, refreshed whenever a day log is written (see routers/adherence)."""
+    __tablename__ = "adherence_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True, index=True)
+    as_of_date = Column(String(20), nullable=False)  # YYYY-MM-DD the streaks/rates are counted back from
+
+    food_streak_days = Column(Integer, default=0)
+    water_streak_days = Column(Integer, default=0)
+    workout_streak_days = Column(Integer, default=0)
+    active_food_streak_days = Column(Integer, default=0)
+    active_water_streak_days = Column(Integer, default=0)
+    active_workout_streak_days = Column(Integer, default=0)
+
+    food_rate_7d = Column(Float, default=0)
+    food_rate_14d = Column(Float, default=0)
+    food_rate_30d = Column(Float, default=0)
+    water_rate_7d = Column(Float, default=0)
+    water_rate_14d = Column(Float, default=0)
+    water_rate_30d = Column(Float, default=0)
+    workout_rate_7d = Column(Float, default=0)
+    workout_rate_14d = Column(Float, default=0)
+    workout_rate_30d = Column(Float, default=0)
+
+    latest_logged_date = Column(String(20))
+    latest_food_date = Column(String(20))
+    latest_water_date = Column(String(20))
+    latest_workout_date = Column(String(20))
+
+    # JSON list of per-day log/goal bits, newest first (see routers/adherence)
+    day_flags_json = Column(Text)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
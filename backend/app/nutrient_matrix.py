@@ -0,0 +1,94 @@
+"""
+Food x nutrient matrix over the enhanced food catalog.
+
+Rows are catalog foods, columns are NUTRIENT_KEYS, values are per 100 g. A plan is a list of
+(food name, grams) servings; stacking plans gives a plans x foods servings matrix, and a single
+`servings @ values` yields the full nutrient profile of every plan at once.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .food_index import FoodNameIndex, normalize_food_name
+
+# Output key -> catalog column (lower-cased CSV header, after load_foods renames)
+NUTRIENT_COLUMNS: Dict[str, str] = {
+    "calories": "calories",
+    "protein_g": "protein",
+    "carbs_g": "carbs",
+    "fat_g": "fat",
+    "sugar_g": "free sugar (g)",
+    "fibre_g": "fibre (g)",
+    "sodium_mg": "sodium (mg)",
+    "calcium_mg": "calcium (mg)",
+    "iron_mg": "iron (mg)",
+    "vitamin_c_mg": "vitamin c (mg)",
+    "folate_ug": "folate (µg)",
+}
+NUTRIENT_KEYS: List[str] = list(NUTRIENT_COLUMNS)
+
+Serving = Tuple[str, float]  # (food name, grams)
+
+
+class NutrientMatrix:
+    """Build once per catalog; missing nutrient columns are zero rather than an error."""
+
+    def __init__(self, df: pd.DataFrame, index: FoodNameIndex):
+        self.index = index
+        values = np.zeros((len(df), len(NUTRIENT_KEYS)), dtype=float)
+        for j, key in enumerate(NUTRIENT_KEYS):
+            column = NUTRIENT_COLUMNS[key]
+            if column in df.columns:
+                values[:, j] = pd.to_numeric(df[column], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+        self.values = values
+
+    def row(self, food_name: str, fuzzy: bool = True) -> Optional[int]:
+        """Catalog row for a name: exact (or alias), else the first food containing it."""
+        name = normalize_food_name(food_name)
+        if not name:
+            return None
+        pos = self.index.exact(name)
+        if pos is None and fuzzy:
+            hits = self.index.contains(name, limit=1)
+            pos = hits[0] if hits else None
+        return pos
+
+    def servings(self, plans: Sequence[Sequence[Serving]]) -> np.ndarray:
+        """plans x foods matrix of 100 g units; unknown foods contribute nothing."""
+        matrix = np.zeros((len(plans), self.values.shape[0]), dtype=float)
+        for i, plan in enumerate(plans):
+            for food_name, grams in plan:
+                pos = self.row(food_name)
+                if pos is not None and grams:
+                    matrix[i, pos] += float(grams) / 100.0
+        return matrix
+
+    def profiles(self, plans: Sequence[Sequence[Serving]]) -> np.ndarray:
+        """plans x NUTRIENT_KEYS totals in one multiply."""
+        if not plans:
+            return np.zeros((0, len(NUTRIENT_KEYS)), dtype=float)
+        return self.servings(plans) @ self.values
+
+    def scaled_rows(self, items: Sequence[Tuple[str, float]]) -> np.ndarray:
+        """items x NUTRIENT_KEYS for (food name, kcal) items: each catalog row scaled to the given kcal.
+
+        For items that only carry a calorie figure. Names must match exactly (or via an alias): a
+        substring hit ("apple" -> "pineapple milkshake") scaled by calories would be badly off.
+        Unknown or zero-calorie foods get a zero row.
+        """
+        out = np.zeros((len(items), len(NUTRIENT_KEYS)), dtype=float)
+        kcal_col = NUTRIENT_KEYS.index("calories")
+        for i, (food_name, kcal) in enumerate(items):
+            pos = self.row(food_name, fuzzy=False)
+            if pos is None:
+                continue
+            per_100g = self.values[pos, kcal_col]
+            if per_100g > 0 and kcal:
+                out[i] = self.values[pos] * (float(kcal) / per_100g)
+        return out
+
+
+def profile_dict(vector: Sequence[float], digits: int = 1) -> Dict[str, float]:
+    return {key: round(float(v), digits) for key, v in zip(NUTRIENT_KEYS, vector)}
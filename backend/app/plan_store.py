@@ -0,0 +1,133 @@
+"""
+Content-addressed store for generated plans.
+Keys are sha256 of the plan kind, a format version and the generation inputs, so identical inputs in
+any worker or after a restart resolve to the same row. Generation is deterministic (see
+logic.stable_hash), which is what makes a stored plan valid for everyone with the same key.
+DB-backed with a bounded in-memory layer in front, like the chat store. Rows older than the
+retention window are pruned from `put`; while the database is unreachable the store serves
+memory only and retries after a short backoff instead of reconnecting on every miss.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from . import database
+from .models import PlanCacheEntry
+
+# Bump when plan generation changes so stale rows are never served.
+# 2: plan totals exclude sides; 3: absolute portion bounds; 4: archetype overlay plans;
+# 5: incremental updates rebuild avoid tokens and keep slot portions; 6: fixed-size plan horizon;
+# 7: archetype overlays spread capped servings over the plan
+PLAN_FORMAT_VERSION = 7
+MEMORY_CACHE_SIZE = 512
+RETENTION_DAYS = int(os.getenv("PLAN_CACHE_RETENTION_DAYS", "30"))
+PRUNE_INTERVAL_SECONDS = 3600
+DB_RETRY_SECONDS = 30.0
+
+_memory: "OrderedDict[str, str]" = OrderedDict()
+_memory_lock = threading.Lock()
+_table_ready = False
+_db_down_until = 0.0
+_last_prune = 0.0
+
+
+def content_key(kind: str, *parts: object) -> str:
+    h = hashlib.sha256()
+    for part in (kind, PLAN_FORMAT_VERSION, *parts):
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def _remember(key: str, payload: str) -> None:
+    with _memory_lock:
+        _memory[key] = payload
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def _ensure_table(db) -> None:
+    global _table_ready
+    if not _table_ready:
+        PlanCacheEntry.__table__.create(bind=db.get_bind(), checkfirst=True)
+        _table_ready = True
+
+
+def _db_available() -> bool:
+    return time.time() >= _db_down_until
+
+
+def _mark_db_down(action: str, error: Exception) -> None:
+    """Skip the database for DB_RETRY_SECONDS; warn once per outage rather than on every call."""
+    global _db_down_until
+    if _db_available():
+        print(f"⚠ Plan cache {action} failed, using memory only for {DB_RETRY_SECONDS:.0f}s: {error}")
+    _db_down_until = time.time() + DB_RETRY_SECONDS
+
+
+def _prune(db) -> None:
+    """Delete rows past the retention window, at most once per PRUNE_INTERVAL_SECONDS per process."""
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < PRUNE_INTERVAL_SECONDS:
+        return
+    _last_prune = now
+    cutoff = datetime.utcnow() - timedelta(days=RETENTION_DAYS)
+    removed = db.execute(delete(PlanCacheEntry).where(PlanCacheEntry.created_at < cutoff)).rowcount
+    db.commit()
+    if removed:
+        print(f"Plan cache pruned {removed} entries older than {RETENTION_DAYS} days")
+
+
+def get(key: str) -> Optional[str]:
+    """Stored payload (JSON text) for a content key, or None."""
+    with _memory_lock:
+        payload = _memory.get(key)
+        if payload is not None:
+            _memory.move_to_end(key)
+            return payload
+    if not _db_available():
+        return None
+    db = database.SessionLocal()
+    try:
+        _ensure_table(db)
+        payload = db.execute(
+            select(PlanCacheEntry.payload_json).where(PlanCacheEntry.content_key == key)
+        ).scalar_one_or_none()
+    except Exception as e:
+        _mark_db_down("lookup", e)
+        payload = None
+    finally:
+        db.close()
+    if payload is not None:
+        _remember(key, payload)
+    return payload
+
+
+def put(key: str, kind: str, payload: str) -> None:
+    """Store a payload; a concurrent insert of the same key by another worker is not an error."""
+    _remember(key, payload)
+    if not _db_available():
+        return
+    db = database.SessionLocal()
+    try:
+        _ensure_table(db)
+        db.add(PlanCacheEntry(content_key=key, kind=kind, payload_json=payload))
+        db.commit()
+        _prune(db)
+    except IntegrityError:
+        db.rollback()
+    except Exception as e:
+        db.rollback()
+        _mark_db_down("write", e)
+    finally:
+        db.close()
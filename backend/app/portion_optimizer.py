@@ -0,0 +1,136 @@
+"""
+Bounded portion optimizer for daily meal plans.
+
+Each meal is solved on its own (its share of the day's calorie/macro targets) with a small DP over
+calorie bins: every candidate item picks one portion multiplier from a bounded set, each bin keeps
+the best-scoring combination, and the bin closest to the meal targets wins. Candidates flagged
+optional may be left out (multiplier 0). The search is deterministic (ties keep the earlier
+level / lower bin) and numpy-vectorised, so a full day solves in well under a millisecond per meal.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Portion multipliers of the listed serving; 1.0 first so the nominal portion wins ties
+PORTION_LEVELS = (1.0, 0.75, 1.25, 0.5, 1.5, 1.75, 2.0)
+OPTIONAL_LEVELS = (0.0, 1.0, 0.5, 1.5)
+CALORIE_BIN = 10.0
+
+# Share of the day's targets per meal
+MEAL_SHARES = {"breakfast": 0.25, "lunch": 0.35, "snacks": 0.10, "dinner": 0.30}
+
+# Cost weights: relative calorie error, relative protein shortfall, relative carb/fat error,
+# and kcal-weighted distance from the nominal portion (keeps portions realistic)
+CALORIE_WEIGHT = 4.0
+PROTEIN_WEIGHT = 2.0
+MACRO_WEIGHT = 0.5
+PORTION_WEIGHT = 0.002
+OPTIONAL_ITEM_COST = 0.05
+
+
+class PortionCandidate(NamedTuple):
+    calories: float  # per listed serving
+    protein: float
+    carbs: float
+    fats: float
+    optional: bool = False
+
+
+class MealTargets(NamedTuple):
+    calories: float
+    protein: float
+    carbs: Optional[float] = None
+    fats: Optional[float] = None
+
+
+def day_targets(calories: float, protein: float, fat_share: float = 0.25) -> MealTargets:
+    """Protein from the caller, fat as a share of calories, carbs fill the rest."""
+    fats = calories * fat_share / 9.0
+    carbs = max(0.0, (calories - protein * 4.0 - fats * 9.0) / 4.0)
+    return MealTargets(calories, protein, carbs, fats)
+
+
+def meal_targets(day: MealTargets, meal: str) -> MealTargets:
+    share = MEAL_SHARES.get(meal, 0.25)
+    return MealTargets(
+        day.calories * share,
+        day.protein * share,
+        day.carbs * share if day.carbs is not None else None,
+        day.fats * share if day.fats is not None else None,
+    )
+
+
+def _cost(calories, protein, carbs, fats, target: MealTargets):
+    cost = CALORIE_WEIGHT * np.abs(calories - target.calories) / max(target.calories, 1.0)
+    if target.protein > 0:
+        cost = cost + PROTEIN_WEIGHT * np.maximum(0.0, target.protein - protein) / target.protein
+    if target.carbs:
+        cost = cost + MACRO_WEIGHT * np.abs(carbs - target.carbs) / target.carbs
+    if target.fats:
+        cost = cost + MACRO_WEIGHT * np.abs(fats - target.fats) / target.fats
+    return cost
+
+
+def optimize_meal(candidates: Sequence[PortionCandidate], target: MealTargets) -> List[float]:
+    """Portion multiplier per candidate (0.0 = left out; only for optional candidates)."""
+    if not candidates:
+        return []
+    max_kcal = sum(max(c.calories, 0.0) * 2.0 for c in candidates)
+    n_bins = int(max_kcal // CALORIE_BIN) + 2
+    # Within a bin, paths are ranked by portion penalty minus a protein bonus: at equal calories
+    # the more protein-dense combination survives.
+    protein_bonus = PROTEIN_WEIGHT / max(target.protein, 1.0)
+    rank = np.full(n_bins, np.inf)
+    rank[0] = 0.0
+    penalty = np.zeros(n_bins)
+    protein = np.zeros(n_bins)
+    carbs = np.zeros(n_bins)
+    fats = np.zeros(n_bins)
+    choice = np.full((len(candidates), n_bins), -1, dtype=np.int16)
+
+    for k, cand in enumerate(candidates):
+        levels = OPTIONAL_LEVELS if cand.optional else PORTION_LEVELS
+        new_rank = np.full(n_bins, np.inf)
+        new_penalty = np.zeros(n_bins)
+        new_protein = np.zeros(n_bins)
+        new_carbs = np.zeros(n_bins)
+        new_fats = np.zeros(n_bins)
+        for li, level in enumerate(levels):
+            shift = int(round(max(cand.calories, 0.0) * level / CALORIE_BIN))
+            if shift >= n_bins:
+                continue
+            step = PORTION_WEIGHT * abs(level - (0.0 if cand.optional else 1.0)) * max(cand.calories, 0.0) / 100.0
+            if cand.optional and level > 0:
+                step += OPTIONAL_ITEM_COST
+            candidate_rank = rank[:n_bins - shift] + step - protein_bonus * cand.protein * level
+            better = candidate_rank < new_rank[shift:]
+            if not better.any():
+                continue
+            idx = np.nonzero(better)[0]
+            new_rank[shift + idx] = candidate_rank[idx]
+            new_penalty[shift + idx] = penalty[idx] + step
+            new_protein[shift + idx] = protein[idx] + cand.protein * level
+            new_carbs[shift + idx] = carbs[idx] + cand.carbs * level
+            new_fats[shift + idx] = fats[idx] + cand.fats * level
+            choice[k, shift + idx] = li
+        rank, penalty, protein, carbs, fats = new_rank, new_penalty, new_protein, new_carbs, new_fats
+
+    calories = np.arange(n_bins) * CALORIE_BIN
+    total = np.where(np.isfinite(rank), penalty + _cost(calories, protein, carbs, fats, target), np.inf)
+    best = int(np.argmin(total))
+
+    multipliers = [0.0] * len(candidates)
+    b = best
+    for k in range(len(candidates) - 1, -1, -1):
+        cand = candidates[k]
+        levels = OPTIONAL_LEVELS if cand.optional else PORTION_LEVELS
+        level = levels[int(choice[k, b])]
+        multipliers[k] = level
+        b -= int(round(max(cand.calories, 0.0) * level / CALORIE_BIN))
+    return multipliers
+
+
+def optimize_day(meals: Dict[str, Sequence[PortionCandidate]], day: MealTargets) -> Dict[str, List[float]]:
+    """Per-meal multipliers for a whole day; each meal aims at its MEAL_SHARES slice of `day`."""
+    return {meal: optimize_meal(candidates, meal_targets(day, meal)) for meal, candidates in meals.items()}
@@ -3,16 +3,30 @@ Adherence tracking routes for meal completion, extra food logs, and water intake
 DB-backed with in-memory fallback.
 """
 
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+from itertools import groupby
 import json
+import time
 from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import Float, case, cast, delete, func, insert, literal_column, null, select, text, union_all
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, selectinload
 
+from ..database import SessionLocal
 from ..deps import get_current_user, get_db
-from ..models import Profile, AdherenceLog, WorkoutDailyLog
+from ..models import (
+    Profile,
+    Progress,
+    AdherenceLog,
+    AdherenceExtraFood,
+    AdherenceCompletedItem,
+    WorkoutDailyLog,
+    AdherenceRollup,
+)
 
 router = APIRouter()
 
@@ -40,6 +54,11 @@ class WorkoutDayPayload(BaseModel):
     calories_burned: float = 0
 
 
+class AdherenceSyncPayload(BaseModel):
+    days: List[DayAdherencePayload] = Field(default_factory=list, max_length=366)
+    workouts: List[WorkoutDayPayload] = Field(default_factory=list, max_length=366)
+
+
 # Emergency fallback if DB is unavailable.
 adherence_store: Dict[str, DayAdherencePayload] = {}
 
@@ -95,19 +114,27 @@ def _has_workout_log(completed: bool, calories_burned: float) -> bool:
     return bool(completed) or float(calories_burned or 0) > 0
 
 
-def _payload_from_row(row: AdherenceLog) -> DayAdherencePayload:
+def _legacy_json_list(raw: Optional[str]) -> list:
+    if not raw or raw == "[]":
+        return []
     try:
-        completed_ids = json.loads(row.completed_item_ids_json or "[]")
-        if not isinstance(completed_ids, list):
-            completed_ids = []
+        value = json.loads(raw)
+        return value if isinstance(value, list) else []
     except Exception:
-        completed_ids = []
-    try:
-        extras = json.loads(row.extra_foods_json or "[]")
-        if not isinstance(extras, list):
-            extras = []
-    except Exception:
-        extras = []
+        return []
+
+
+def _payload_from_row(row: AdherenceLog) -> DayAdherencePayload:
+    # Child tables are the source of truth; rows written before they existed still carry JSON.
+    # Load ranges with _with_children() so these relationships don't query per row.
+    if row.completed_items:
+        completed_ids = [c.item_id for c in row.completed_items]
+    else:
+        completed_ids = _legacy_json_list(row.completed_item_ids_json)
+    if row.extra_foods:
+        extras = [{"name": e.name, "calories": e.calories} for e in row.extra_foods]
+    else:
+        extras = _legacy_json_list(row.extra_foods_json)
     extra_foods = []
     for e in extras:
         try:
@@ -145,13 +172,114 @@ def _upsert_row(db: Session, user_id: int, payload: DayAdherencePayload) -> None
     row.consumed_planned_calories = float(payload.consumed_planned_calories or 0)
     row.completed_items_count = int(payload.completed_items_count or 0)
     row.total_items_count = int(payload.total_items_count or 0)
-    row.completed_item_ids_json = json.dumps(payload.completed_item_ids or [])
-    row.extra_foods_json = json.dumps([x.model_dump() for x in (payload.extra_foods or [])])
+    row.completed_item_ids_json = "[]"
+    row.extra_foods_json = "[]"
+    row.completed_items = [
+        AdherenceCompletedItem(**values) for values in _completed_item_values(user_id, log_date, payload)
+    ]
+    row.extra_foods = [AdherenceExtraFood(**values) for values in _extra_food_values(user_id, log_date, payload)]
     row.water_ml = int(payload.water_ml or 0)
     row.water_target_ml = int(payload.water_target_ml or 2000)
     db.commit()
 
 
+def _completed_item_values(user_id: int, log_date: str, payload: DayAdherencePayload) -> List[Dict]:
+    return [
+        {"user_id": user_id, "log_date": log_date, "position": i, "item_id": str(item_id)}
+        for i, item_id in enumerate(payload.completed_item_ids or [])
+    ]
+
+
+def _extra_food_values(user_id: int, log_date: str, payload: DayAdherencePayload) -> List[Dict]:
+    return [
+        {"user_id": user_id, "log_date": log_date, "position": i, "name": x.name, "calories": float(x.calories or 0)}
+        for i, x in enumerate(payload.extra_foods or [])
+    ]
+
+
+def _replace_children(db: Session, user_id: int, payloads: List[DayAdherencePayload]) -> None:
+    """Rewrite child rows for bulk-upserted days: one select, two deletes and two inserts."""
+    if not payloads:
+        return
+    dates = [p.date.isoformat() for p in payloads]
+    ids = dict(
+        db.execute(
+            select(AdherenceLog.log_date, AdherenceLog.id).where(
+                AdherenceLog.user_id == user_id, AdherenceLog.log_date.in_(dates)
+            )
+        ).all()
+    )
+    db.execute(delete(AdherenceCompletedItem).where(AdherenceCompletedItem.adherence_log_id.in_(ids.values())))
+    db.execute(delete(AdherenceExtraFood).where(AdherenceExtraFood.adherence_log_id.in_(ids.values())))
+    completed_rows: List[Dict] = []
+    extra_rows: List[Dict] = []
+    for payload in payloads:
+        log_date = payload.date.isoformat()
+        parent = {"adherence_log_id": ids[log_date]}
+        completed_rows.extend({**parent, **v} for v in _completed_item_values(user_id, log_date, payload))
+        extra_rows.extend({**parent, **v} for v in _extra_food_values(user_id, log_date, payload))
+    if completed_rows:
+        db.execute(insert(AdherenceCompletedItem), completed_rows)
+    if extra_rows:
+        db.execute(insert(AdherenceExtraFood), extra_rows)
+
+
+def _with_children(query):
+    return query.options(selectinload(AdherenceLog.extra_foods), selectinload(AdherenceLog.completed_items))
+
+
+def _day_row_values(user_id: int, payload: DayAdherencePayload) -> Dict:
+    return {
+        "user_id": user_id,
+        "log_date": payload.date.isoformat(),
+        "planned_calories": float(payload.planned_calories or 0),
+        "consumed_planned_calories": float(payload.consumed_planned_calories or 0),
+        "completed_items_count": int(payload.completed_items_count or 0),
+        "total_items_count": int(payload.total_items_count or 0),
+        "completed_item_ids_json": "[]",
+        "extra_foods_json": "[]",
+        "water_ml": int(payload.water_ml or 0),
+        "water_target_ml": int(payload.water_target_ml or 2000),
+    }
+
+
+def _bulk_upsert(db: Session, model, rows: List[Dict], keys=("user_id", "log_date")) -> None:
+    """Insert-or-update many rows (unique on `keys`) in one statement for the current dialect."""
+    if not rows:
+        return
+    now = datetime.utcnow()
+    stamps = {c: now for c in ("created_at", "updated_at") if c in model.__table__.c}
+    rows = [{**r, **stamps} for r in rows]
+    update_cols = [c for c in rows[0] if c not in (*keys, "created_at")]
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(model)
+        stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_cols})
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={c: stmt.excluded[c] for c in update_cols},
+        )
+    else:
+        # Unknown dialect: plain per-row upsert inside the same transaction.
+        for r in rows:
+            existing = db.query(model).filter(*(getattr(model, k) == r[k] for k in keys)).first()
+            if existing:
+                for c in update_cols:
+                    setattr(existing, c, r[c])
+            else:
+                db.add(model(**r))
+        db.flush()
+        return
+    db.execute(stmt, rows)
+
+
 def _get_or_default_day(db: Session, user_id: int, target_date: date, default_target: int) -> DayAdherencePayload:
     row = (
         db.query(AdherenceLog)
@@ -178,6 +306,330 @@ def _get_or_default_workout_day(db: Session, user_id: int, target_date: date) ->
     }
 
 
+def _fill_days(db: Session, user_id: int, dates: List[date], date_filter, default_target: int) -> Dict[str, DayAdherencePayload]:
+    rows = _with_children(db.query(AdherenceLog)).filter(AdherenceLog.user_id == user_id, *date_filter).all()
+    found = {row.log_date: _payload_from_row(row) for row in rows}
+    return {
+        d.isoformat(): found.get(d.isoformat()) or DayAdherencePayload(date=d, water_target_ml=default_target)
+        for d in dates
+    }
+
+
+def _fill_workout_days(db: Session, user_id: int, dates: List[date], date_filter) -> Dict[str, Dict[str, float | bool]]:
+    _ensure_workout_table(db)
+    rows = (
+        db.query(WorkoutDailyLog.log_date, WorkoutDailyLog.completed, WorkoutDailyLog.calories_burned)
+        .filter(WorkoutDailyLog.user_id == user_id, *date_filter)
+        .all()
+    )
+    found = {
+        log_date: {"completed": bool(completed), "calories_burned": float(calories_burned or 0)}
+        for log_date, completed, calories_burned in rows
+    }
+    return {d.isoformat(): found.get(d.isoformat()) or {"completed": False, "calories_burned": 0.0} for d in dates}
+
+
+def _date_span(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def _load_day_range(db: Session, user_id: int, start: date, end: date, default_target: int) -> Dict[str, DayAdherencePayload]:
+    """All food/water logs in [start, end] in one query, with default days filled in."""
+    date_filter = (AdherenceLog.log_date >= start.isoformat(), AdherenceLog.log_date <= end.isoformat())
+    return _fill_days(db, user_id, _date_span(start, end), date_filter, default_target)
+
+
+def _load_workout_range(db: Session, user_id: int, start: date, end: date) -> Dict[str, Dict[str, float | bool]]:
+    """All workout logs in [start, end] in one query, with default days filled in."""
+    date_filter = (WorkoutDailyLog.log_date >= start.isoformat(), WorkoutDailyLog.log_date <= end.isoformat())
+    return _fill_workout_days(db, user_id, _date_span(start, end), date_filter)
+
+
+def _load_days(db: Session, user_id: int, dates: List[date], default_target: int) -> Dict[str, DayAdherencePayload]:
+    """Food/water logs for specific (non-contiguous) dates in one query."""
+    date_filter = (AdherenceLog.log_date.in_([d.isoformat() for d in dates]),)
+    return _fill_days(db, user_id, dates, date_filter, default_target)
+
+
+def _load_workout_days(db: Session, user_id: int, dates: List[date]) -> Dict[str, Dict[str, float | bool]]:
+    date_filter = (WorkoutDailyLog.log_date.in_([d.isoformat() for d in dates]),)
+    return _fill_workout_days(db, user_id, dates, date_filter)
+
+
+def _summary_point(d: date, item: DayAdherencePayload, workout_item: Dict[str, float | bool], default_target: int) -> Dict:
+    extra_cal = sum(max(0, float(x.calories)) for x in item.extra_foods)
+    consumed_total = max(0.0, float(item.consumed_planned_calories) + extra_cal)
+    return {
+        "date": d.isoformat(),
+        "planned_calories": float(item.planned_calories),
+        "consumed_total_calories": round(consumed_total, 1),
+        "food_progress_percent": _food_progress_percent(item),
+        "water_ml": int(item.water_ml),
+        "water_target_ml": int(item.water_target_ml or default_target),
+        "water_progress_percent": _water_progress_percent(item),
+        "food_goal_met": _food_goal_met(item),
+        "water_goal_met": _water_goal_met(item),
+        "workout_completed": bool(workout_item["completed"]),
+        "workout_calories_burned": round(float(workout_item["calories_burned"] or 0), 1),
+    }
+
+
+def _scan_streaks(flags: List[tuple]) -> Dict[str, Optional[int]]:
+    """One pass over (logged, goal_met) pairs ordered from today backwards.
+
+    streak_from_today: consecutive goal-met days starting today.
+    active_streak: consecutive goal-met days starting at the most recent logged day.
+    latest_logged: index of the most recent logged day (None if nothing logged).
+    """
+    streak_from_today = 0
+    from_today_open = True
+    latest_logged: Optional[int] = None
+    active_streak = 0
+    active_open = True
+    for i, (logged, met) in enumerate(flags):
+        if from_today_open:
+            if met:
+                streak_from_today += 1
+            else:
+                from_today_open = False
+        if latest_logged is None and logged:
+            latest_logged = i
+        if latest_logged is not None and active_open:
+            if met:
+                active_streak += 1
+            else:
+                active_open = False
+        if not from_today_open and not active_open:
+            break
+    return {
+        "streak_from_today": streak_from_today,
+        "active_streak": active_streak,
+        "latest_logged": latest_logged,
+    }
+
+
+# Streaks are counted at most this far back; /summary allows up to the same window.
+ROLLUP_WINDOW_DAYS = 60
+ROLLUP_RATE_WINDOWS = (7, 14, 30)
+
+# Per-day bits kept in AdherenceRollup.day_flags_json (index 0 = as_of_date, then backwards),
+# so a log write only re-derives its own day instead of rescanning the window.
+FOOD_LOGGED, FOOD_MET, WATER_LOGGED, WATER_MET, WORKOUT_LOGGED, WORKOUT_MET = (1 << i for i in range(6))
+FOOD_WATER_BITS = FOOD_LOGGED | FOOD_MET | WATER_LOGGED | WATER_MET
+WORKOUT_BITS = WORKOUT_LOGGED | WORKOUT_MET
+
+_rollup_table_ready = False
+
+
+def _ensure_rollup_table(db: Session) -> None:
+    """Create the rollup table (or add day_flags_json to an older one) once per process."""
+    global _rollup_table_ready
+    if _rollup_table_ready:
+        return
+    try:
+        bind = db.get_bind()
+        AdherenceRollup.__table__.create(bind=bind, checkfirst=True)
+        columns = {c["name"] for c in sa_inspect(bind).get_columns(AdherenceRollup.__tablename__)}
+        if "day_flags_json" not in columns:
+            with bind.begin() as conn:
+                conn.execute(text("ALTER TABLE adherence_rollups ADD COLUMN day_flags_json TEXT"))
+        _rollup_table_ready = True
+    except Exception as e:
+        print(f"⚠ Adherence rollup table not ready: {e}")
+
+
+def _food_water_bits(item: DayAdherencePayload) -> int:
+    return (
+        (FOOD_LOGGED if _has_food_log(item) else 0)
+        | (FOOD_MET if _food_goal_met(item) else 0)
+        | (WATER_LOGGED if _has_water_log(item) else 0)
+        | (WATER_MET if _water_goal_met(item) else 0)
+    )
+
+
+def _workout_bits(completed: bool, calories_burned: float) -> int:
+    return (WORKOUT_LOGGED if _has_workout_log(completed, calories_burned) else 0) | (WORKOUT_MET if completed else 0)
+
+
+def _rollup_values(user_id: int, today: date, day_flags: List[int]) -> Dict:
+    """All rollup columns derived from the per-day bits (pure; O(ROLLUP_WINDOW_DAYS))."""
+    values: Dict = {
+        "user_id": user_id,
+        "as_of_date": today.isoformat(),
+        "day_flags_json": json.dumps(day_flags, separators=(",", ":")),
+    }
+
+    def _date_at(index: Optional[int]) -> Optional[str]:
+        return (today - timedelta(days=index)).isoformat() if index is not None else None
+
+    for name, logged_bit, met_bit in (
+        ("food", FOOD_LOGGED, FOOD_MET),
+        ("water", WATER_LOGGED, WATER_MET),
+        ("workout", WORKOUT_LOGGED, WORKOUT_MET),
+    ):
+        flags = [(bool(f & logged_bit), bool(f & met_bit)) for f in day_flags]
+        scan = _scan_streaks(flags)
+        values[f"{name}_streak_days"] = scan["streak_from_today"]
+        values[f"active_{name}_streak_days"] = scan["active_streak"]
+        values[f"latest_{name}_date"] = _date_at(scan["latest_logged"])
+        for window in ROLLUP_RATE_WINDOWS:
+            met = sum(1 for _, goal_met in flags[:window] if goal_met)
+            values[f"{name}_rate_{window}d"] = round(met / float(window), 4)
+    latest_any = next((i for i, f in enumerate(day_flags) if f & (FOOD_LOGGED | WATER_LOGGED)), None)
+    values["latest_logged_date"] = _date_at(latest_any)
+    return values
+
+
+def _save_rollup(db: Session, values: Dict) -> AdherenceRollup:
+    # Upsert on the unique user_id so concurrent first refreshes cannot collide
+    _bulk_upsert(db, AdherenceRollup, [values], keys=("user_id",))
+    db.commit()
+    return _transient_rollup(values)
+
+
+def _stored_day_flags(row: Optional[AdherenceRollup], today: date) -> Optional[List[int]]:
+    """The row's per-day bits shifted forward to `today`, or None when a full refresh is needed."""
+    if row is None or not row.day_flags_json:
+        return None
+    shift = (today - date.fromisoformat(row.as_of_date)).days
+    if shift < 0:
+        return None
+    flags = [0] * min(shift, ROLLUP_WINDOW_DAYS) + list(json.loads(row.day_flags_json))
+    return (flags + [0] * ROLLUP_WINDOW_DAYS)[:ROLLUP_WINDOW_DAYS]
+
+
+def _transient_rollup(values: Dict) -> AdherenceRollup:
+    """A rollup row that is served but not stored (read paths never write)."""
+    row = AdherenceRollup(**values)
+    _cache_metrics(row)
+    return row
+
+
+def _recomputed_values(db: Session, user_id: int, today: date) -> Dict:
+    """Rollup columns recomputed from the last ROLLUP_WINDOW_DAYS of logs (two range queries)."""
+    start = today - timedelta(days=ROLLUP_WINDOW_DAYS - 1)
+    day_lookup = _load_day_range(db, user_id, start, today, 2000)
+    workout_lookup = _load_workout_range(db, user_id, start, today)
+
+    day_flags: List[int] = []
+    for i in range(ROLLUP_WINDOW_DAYS):
+        key = (today - timedelta(days=i)).isoformat()
+        workout = workout_lookup[key]
+        day_flags.append(
+            _food_water_bits(day_lookup[key])
+            | _workout_bits(bool(workout["completed"]), float(workout["calories_burned"] or 0))
+        )
+    return _rollup_values(user_id, today, day_flags)
+
+
+def refresh_adherence_rollup(db: Session, user_id: int, today: Optional[date] = None) -> AdherenceRollup:
+    """Recompute and store a user's rollup row from the logs."""
+    _ensure_rollup_table(db)
+    return _save_rollup(db, _recomputed_values(db, user_id, today or date.today()))
+
+
+def update_adherence_rollup(
+    db: Session,
+    user_id: int,
+    log_date: date,
+    day: Optional[DayAdherencePayload] = None,
+    workout: Optional[WorkoutDayPayload] = None,
+) -> AdherenceRollup:
+    """Fold one written day (food/water and/or workout) into the rollup without rescanning the logs.
+
+    Falls back to a full refresh when the row is missing or predates the per-day bits.
+    """
+    _ensure_rollup_table(db)
+    today = date.today()
+    row = db.query(AdherenceRollup).filter(AdherenceRollup.user_id == user_id).first()
+    day_flags = _stored_day_flags(row, today)
+    if day_flags is None:
+        return refresh_adherence_rollup(db, user_id, today)
+    offset = (today - log_date).days
+    if 0 <= offset < ROLLUP_WINDOW_DAYS:
+        if day is not None:
+            day_flags[offset] = (day_flags[offset] & ~FOOD_WATER_BITS) | _food_water_bits(day)
+        if workout is not None:
+            bits = _workout_bits(bool(workout.completed), float(workout.calories_burned or 0))
+            day_flags[offset] = (day_flags[offset] & ~WORKOUT_BITS) | bits
+    return _save_rollup(db, _rollup_values(user_id, today, day_flags))
+
+
+def _update_rollup_after_write(db: Session, user_id: int, log_date: Optional[date] = None, **written) -> None:
+    """Rollup maintenance after a committed log write; a failure here never fails the write."""
+    try:
+        if log_date is None:
+            refresh_adherence_rollup(db, user_id)
+        else:
+            update_adherence_rollup(db, user_id, log_date, **written)
+    except Exception as e:
+        db.rollback()
+        _metrics_cache.pop(int(user_id), None)
+        print(f"⚠ Adherence rollup not updated for user {user_id}: {e}")
+
+
+def get_adherence_rollup(db: Session, user_id: int) -> AdherenceRollup:
+    """Return the user's rollup as of today without writing it.
+
+    A row computed on an earlier day is rolled forward in memory; a missing one is recomputed
+    from the logs. Only log writes and scripts/rebuild_adherence_rollups.py store rollups.
+    """
+    _ensure_rollup_table(db)
+    today = date.today()
+    row = db.query(AdherenceRollup).filter(AdherenceRollup.user_id == user_id).first()
+    if row is not None and row.as_of_date == today.isoformat():
+        return row
+    day_flags = _stored_day_flags(row, today)
+    if day_flags is None:
+        return _transient_rollup(_recomputed_values(db, user_id, today))
+    return _transient_rollup(_rollup_values(user_id, today, day_flags))
+
+
+# In-process copy of each user's workout adaptation features, written on every rollup refresh
+# (i.e. every log write) so recommendation paths read them without a query.
+# The TTL bounds staleness when a log was written by another worker process.
+METRICS_TTL_SECONDS = 60
+_metrics_cache: Dict[int, Dict] = {}
+
+
+def _cache_metrics(row: AdherenceRollup) -> Dict:
+    # Level adaptation has always looked at the last 14 days only; without a single workout
+    # log in that window there is nothing to adapt to (a 0.0 rate would downgrade new users).
+    window_start = (date.fromisoformat(row.as_of_date) - timedelta(days=13)).isoformat()
+    logged = row.latest_workout_date is not None and row.latest_workout_date >= window_start
+    entry = {
+        "as_of_date": row.as_of_date,
+        "adherence_rate_14d": float(row.workout_rate_14d or 0) if logged else None,
+        "workout_streak_days": min(int(row.workout_streak_days or 0), 14) if logged else None,
+        "cached_at": time.time(),
+    }
+    _metrics_cache[int(row.user_id)] = entry
+    return entry
+
+
+def get_adherence_metrics(db: Session, user_id: int) -> Dict[str, Optional[float]]:
+    """Rolling workout adherence for `logic.get_exercises` / `_effective_level`.
+
+    Returns `adherence_rate_14d` and `workout_streak_days`, so callers can pass it as keyword
+    arguments. Both are None when no workout was logged in the last 14 days or the logs cannot
+    be read (no adaptation, as before).
+    """
+    user_id = int(user_id)
+    entry = _metrics_cache.get(user_id)
+    if (
+        entry is None
+        or entry["as_of_date"] != date.today().isoformat()
+        or time.time() - entry["cached_at"] > METRICS_TTL_SECONDS
+    ):
+        try:
+            entry = _cache_metrics(get_adherence_rollup(db, user_id))
+        except Exception as e:
+            db.rollback()
+            print(f"⚠ Adherence metrics unavailable for user {user_id}: {e}")
+            return {"adherence_rate_14d": None, "workout_streak_days": None}
+    return {"adherence_rate_14d": entry["adherence_rate_14d"], "workout_streak_days": entry["workout_streak_days"]}
+
+
 def _ensure_workout_table(db: Session) -> None:
     """Create workout log table lazily if it doesn't exist yet."""
     try:
@@ -244,6 +696,7 @@ async def upsert_day_adherence(
 ):
     try:
         _upsert_row(db, int(user.id), payload)
+        _update_rollup_after_write(db, int(user.id), payload.date, day=payload)
         item = payload
         extra_cal = sum(max(0, float(x.calories)) for x in item.extra_foods)
         consumed_total = max(0.0, float(item.consumed_planned_calories) + extra_cal)
@@ -315,6 +768,7 @@ async def upsert_day_workout_adherence(
         row.completed = bool(payload.completed)
         row.calories_burned = float(payload.calories_burned or 0)
         db.commit()
+        _update_rollup_after_write(db, int(user.id), payload.date, workout=payload)
         return {
             "message": "Workout adherence updated",
             "date": log_date,
@@ -325,6 +779,81 @@ async def upsert_day_workout_adherence(
         raise HTTPException(status_code=500, detail=f"Error updating workout adherence: {str(e)}")
 
 
+@router.post("/sync")
+async def sync_adherence(
+    payload: AdherenceSyncPayload,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Apply many queued food/water and workout days in one transaction (offline client replay).
+
+    If the same date appears more than once for a log type, the last entry wins and the
+    earlier ones are reported as "superseded".
+    """
+    user_id = int(user.id)
+    results: List[Dict] = []
+    latest_day: Dict[str, int] = {}
+    latest_workout: Dict[str, int] = {}
+    for i, item in enumerate(payload.days):
+        latest_day[item.date.isoformat()] = i
+    for i, item in enumerate(payload.workouts):
+        latest_workout[item.date.isoformat()] = i
+
+    day_rows = [_day_row_values(user_id, payload.days[i]) for i in sorted(latest_day.values())]
+    workout_rows = [
+        {
+            "user_id": user_id,
+            "log_date": payload.workouts[i].date.isoformat(),
+            "completed": bool(payload.workouts[i].completed),
+            "calories_burned": float(payload.workouts[i].calories_burned or 0),
+        }
+        for i in sorted(latest_workout.values())
+    ]
+    try:
+        _ensure_workout_table(db)
+        _bulk_upsert(db, AdherenceLog, day_rows)
+        _replace_children(db, user_id, [payload.days[i] for i in sorted(latest_day.values())])
+        _bulk_upsert(db, WorkoutDailyLog, workout_rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error syncing adherence: {str(e)}")
+
+    for i, item in enumerate(payload.days):
+        if latest_day[item.date.isoformat()] != i:
+            results.append({"type": "food", "date": item.date.isoformat(), "status": "superseded"})
+            continue
+        results.append({
+            "type": "food",
+            "date": item.date.isoformat(),
+            "status": "upserted",
+            "food_progress_percent": _food_progress_percent(item),
+            "water_progress_percent": _water_progress_percent(item),
+            "food_goal_met": _food_goal_met(item),
+            "water_goal_met": _water_goal_met(item),
+        })
+    for i, item in enumerate(payload.workouts):
+        if latest_workout[item.date.isoformat()] != i:
+            results.append({"type": "workout", "date": item.date.isoformat(), "status": "superseded"})
+            continue
+        results.append({
+            "type": "workout",
+            "date": item.date.isoformat(),
+            "status": "upserted",
+            "workout_completed": bool(item.completed),
+            "workout_calories_burned": round(float(item.calories_burned or 0), 1),
+        })
+
+    if day_rows or workout_rows:
+        _update_rollup_after_write(db, user_id)
+    return {
+        "message": "Adherence synced",
+        "days_upserted": len(day_rows),
+        "workouts_upserted": len(workout_rows),
+        "results": results,
+    }
+
+
 @router.get("/summary")
 async def adherence_summary(
     days: int = 30,
@@ -339,120 +868,59 @@ async def adherence_summary(
         profile = db.query(Profile).filter(Profile.user_id == user_id).first()
         default_target = _default_water_target_ml(profile)
 
-        day_lookup: Dict[str, DayAdherencePayload] = {}
-        workout_lookup: Dict[str, Dict[str, float | bool]] = {}
-        for i in range(days):
-            d = today - timedelta(days=i)
-            item = _get_or_default_day(db, user_id, d, default_target)
-            day_lookup[d.isoformat()] = item
-            workout_lookup[d.isoformat()] = _get_or_default_workout_day(db, user_id, d)
-
-        series = []
-        for i in range(days):
-            d = today - timedelta(days=i)
-            item = day_lookup[d.isoformat()]
-            workout_item = workout_lookup[d.isoformat()]
-            extra_cal = sum(max(0, float(x.calories)) for x in item.extra_foods)
-            consumed_total = max(0.0, float(item.consumed_planned_calories) + extra_cal)
-            series.append(
-                {
-                    "date": d.isoformat(),
-                    "planned_calories": float(item.planned_calories),
-                    "consumed_total_calories": round(consumed_total, 1),
-                    "food_progress_percent": _food_progress_percent(item),
-                    "water_ml": int(item.water_ml),
-                    "water_target_ml": int(item.water_target_ml or default_target),
-                    "water_progress_percent": _water_progress_percent(item),
-                    "food_goal_met": _food_goal_met(item),
-                    "water_goal_met": _water_goal_met(item),
-                    "workout_completed": bool(workout_item["completed"]),
-                    "workout_calories_burned": round(float(workout_item["calories_burned"] or 0), 1),
-                }
-            )
+        rollup = get_adherence_rollup(db, user_id)
+
+        # Only the last 7 days are returned as a series; everything else comes from the rollup.
+        start_date = today - timedelta(days=6)
+        day_lookup = _load_day_range(db, user_id, start_date, today, default_target)
+        workout_lookup = _load_workout_range(db, user_id, start_date, today)
+        series = [
+            _summary_point(d, day_lookup[d.isoformat()], workout_lookup[d.isoformat()], default_target)
+            for d in (today - timedelta(days=i) for i in range(7))
+        ]
 
-        def _streak_from_today(flag: str) -> int:
-            count = 0
-            for point in series:
-                if point.get(flag):
-                    count += 1
-                else:
-                    break
-            return count
-
-        def _active_streak(mode: str) -> int:
-            cursor = None
-            for i in range(days):
-                d = today - timedelta(days=i)
-                item = day_lookup[d.isoformat()]
-                if mode == "food":
-                    if _has_food_log(item):
-                        cursor = d
-                        break
-                elif mode == "water":
-                    if _has_water_log(item):
-                        cursor = d
-                        break
-                elif mode == "workout":
-                    workout = workout_lookup.get(d.isoformat()) or {"completed": False, "calories_burned": 0}
-                    if _has_workout_log(bool(workout.get("completed")), float(workout.get("calories_burned") or 0)):
-                        cursor = d
-                        break
-            if cursor is None:
+        def _index_in_window(latest: Optional[str]) -> Optional[int]:
+            if not latest:
+                return None
+            index = (today - date.fromisoformat(latest)).days
+            return index if 0 <= index < days else None
+
+        latest_index = {
+            "any": _index_in_window(rollup.latest_logged_date),
+            "food": _index_in_window(rollup.latest_food_date),
+            "water": _index_in_window(rollup.latest_water_date),
+            "workout": _index_in_window(rollup.latest_workout_date),
+        }
+        older = sorted({i for i in latest_index.values() if i is not None and i >= 7})
+        older_points: Dict[int, Dict] = {}
+        if older:
+            older_dates = [today - timedelta(days=i) for i in older]
+            older_days = _load_days(db, user_id, older_dates, default_target)
+            older_workouts = _load_workout_days(db, user_id, older_dates)
+            for i, d in zip(older, older_dates):
+                older_points[i] = _summary_point(d, older_days[d.isoformat()], older_workouts[d.isoformat()], default_target)
+
+        def _point(index: Optional[int]) -> Optional[Dict]:
+            if index is None:
+                return None
+            return series[index] if index < 7 else older_points[index]
+
+        def _active(mode: str) -> int:
+            # The rollup counts back ROLLUP_WINDOW_DAYS; clip to the requested window
+            index = latest_index[mode]
+            if index is None:
                 return 0
+            return min(int(getattr(rollup, f"active_{mode}_streak_days") or 0), days - index)
 
-            streak = 0
-            while True:
-                item = day_lookup.get(cursor.isoformat())
-                if not item:
-                    break
-                if mode == "food":
-                    if _food_goal_met(item):
-                        streak += 1
-                    else:
-                        break
-                elif mode == "water":
-                    if _water_goal_met(item):
-                        streak += 1
-                    else:
-                        break
-                else:
-                    workout = workout_lookup.get(cursor.isoformat()) or {"completed": False}
-                    if bool(workout.get("completed")):
-                        streak += 1
-                    else:
-                        break
-                cursor = cursor - timedelta(days=1)
-            return streak
+        food = {"streak_from_today": min(int(rollup.food_streak_days or 0), days), "active_streak": _active("food")}
+        water = {"streak_from_today": min(int(rollup.water_streak_days or 0), days), "active_streak": _active("water")}
+        workout = {"streak_from_today": min(int(rollup.workout_streak_days or 0), days), "active_streak": _active("workout")}
 
         today_point = series[0]
-        latest_logged = None
-        latest_food_logged = None
-        latest_water_logged = None
-        latest_workout_logged = None
-        for point in series:
-            d = date.fromisoformat(point["date"])
-            item = day_lookup.get(d.isoformat())
-            if item and (_has_food_log(item) or _has_water_log(item)):
-                latest_logged = point
-                break
-        for point in series:
-            d = date.fromisoformat(point["date"])
-            item = day_lookup.get(d.isoformat())
-            if item and _has_food_log(item):
-                latest_food_logged = point
-                break
-        for point in series:
-            d = date.fromisoformat(point["date"])
-            item = day_lookup.get(d.isoformat())
-            if item and _has_water_log(item):
-                latest_water_logged = point
-                break
-        for point in series:
-            d = date.fromisoformat(point["date"])
-            workout = workout_lookup.get(d.isoformat()) or {"completed": False, "calories_burned": 0}
-            if _has_workout_log(bool(workout.get("completed")), float(workout.get("calories_burned") or 0)):
-                latest_workout_logged = point
-                break
+        latest_logged = _point(latest_index["any"])
+        latest_food_logged = _point(latest_index["food"])
+        latest_water_logged = _point(latest_index["water"])
+        latest_workout_logged = _point(latest_index["workout"])
 
         return {
             "today": today_point,
@@ -460,13 +928,198 @@ async def adherence_summary(
             "latest_food_logged": latest_food_logged,
             "latest_water_logged": latest_water_logged,
             "latest_workout_logged": latest_workout_logged,
-            "food_streak_days": _streak_from_today("food_goal_met"),
-            "water_streak_days": _streak_from_today("water_goal_met"),
-            "workout_streak_days": _streak_from_today("workout_completed"),
-            "active_food_streak_days": _active_streak("food"),
-            "active_water_streak_days": _active_streak("water"),
-            "active_workout_streak_days": _active_streak("workout"),
-            "last_7_days": list(reversed(series[:7])),
+            "food_streak_days": food["streak_from_today"],
+            "water_streak_days": water["streak_from_today"],
+            "workout_streak_days": workout["streak_from_today"],
+            "active_food_streak_days": food["active_streak"],
+            "active_water_streak_days": water["active_streak"],
+            "active_workout_streak_days": workout["active_streak"],
+            "last_7_days": list(reversed(series)),
+            "completion_rates": {
+                name: {f"{w}d": float(getattr(rollup, f"{name}_rate_{w}d") or 0) for w in ROLLUP_RATE_WINDOWS}
+                for name in ("food", "water", "workout")
+            },
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error building adherence summary: {str(e)}")
+
+
+ANALYTICS_GRANULARITY = {"month": 7, "year": 4}  # length of the YYYY-MM / YYYY prefix of log_date
+
+
+def _created_bucket(column, granularity: str, dialect: str):
+    """Bucket key for a DateTime column, formatted like the log_date prefix."""
+    if dialect == "mysql":
+        return func.date_format(column, "%Y-%m" if granularity == "month" else "%Y")
+    if dialect == "postgresql":
+        return func.to_char(column, "YYYY-MM" if granularity == "month" else "YYYY")
+    return func.strftime("%Y-%m" if granularity == "month" else "%Y", column)
+
+
+def ensure_analytics_indexes(bind) -> None:
+    """Create the (user_id, created_at) progress index on databases whose table predates it.
+
+    create_all only indexes new tables; this runs once at startup.
+    """
+    try:
+        for index in Progress.__table__.indexes:
+            index.create(bind=bind, checkfirst=True)
+    except Exception as e:
+        print(f"⚠ Progress analytics index not created: {e}")
+
+
+ANALYTICS_YIELD_PER = 100
+FOOD_SOURCE, EXTRA_SOURCE, WORKOUT_SOURCE, PROGRESS_SOURCE = range(4)
+
+
+def _analytics_query(user_id: int, start: date, end: date, granularity: str, dialect: str):
+    """The four GROUP BY aggregates as one UNION ALL ordered by bucket, so rows can be streamed.
+
+    Each row is (bucket, source, v1..v5); unused value columns are NULL.
+    """
+    width = ANALYTICS_GRANULARITY[granularity]
+    lo, hi = start.isoformat(), end.isoformat()
+
+    def _row(bucket, source: int, *values):
+        padded = list(values) + [cast(null(), Float)] * (5 - len(values))
+        return [bucket.label("bucket"), literal_column(str(source)).label("source")] + [
+            v.label(f"v{i}") for i, v in enumerate(padded, start=1)
+        ]
+
+    day_bucket = func.substr(AdherenceLog.log_date, 1, width)
+    water_target = case((func.coalesce(AdherenceLog.water_target_ml, 0) > 0, AdherenceLog.water_target_ml), else_=2000)
+    # Same threshold as _water_goal_met: rounded percentage >= 100, i.e. water/target >= 99.5%
+    water_hit = case((func.coalesce(AdherenceLog.water_ml, 0) * 200 >= water_target * 199, 1), else_=0)
+    food = (
+        select(*_row(
+            day_bucket,
+            FOOD_SOURCE,
+            func.count(AdherenceLog.id),
+            func.avg(AdherenceLog.planned_calories),
+            func.avg(AdherenceLog.consumed_planned_calories),
+            func.sum(water_hit),
+            func.avg(AdherenceLog.water_ml),
+        ))
+        .where(AdherenceLog.user_id == user_id, AdherenceLog.log_date >= lo, AdherenceLog.log_date <= hi)
+        .group_by(day_bucket)
+    )
+
+    # Extra foods summed from the child table; same positive-only rule as _summary_point
+    extra_bucket = func.substr(AdherenceExtraFood.log_date, 1, width)
+    extras = (
+        select(*_row(
+            extra_bucket,
+            EXTRA_SOURCE,
+            func.sum(case((AdherenceExtraFood.calories > 0, AdherenceExtraFood.calories), else_=0)),
+        ))
+        .where(AdherenceExtraFood.user_id == user_id, AdherenceExtraFood.log_date >= lo, AdherenceExtraFood.log_date <= hi)
+        .group_by(extra_bucket)
+    )
+
+    workout_bucket = func.substr(WorkoutDailyLog.log_date, 1, width)
+    workouts = (
+        select(*_row(
+            workout_bucket,
+            WORKOUT_SOURCE,
+            func.count(WorkoutDailyLog.id),
+            func.sum(case((WorkoutDailyLog.completed.is_(True), 1), else_=0)),
+            func.sum(WorkoutDailyLog.calories_burned),
+        ))
+        .where(WorkoutDailyLog.user_id == user_id, WorkoutDailyLog.log_date >= lo, WorkoutDailyLog.log_date <= hi)
+        .group_by(workout_bucket)
+    )
+
+    progress_bucket = _created_bucket(Progress.created_at, granularity, dialect)
+    progress = (
+        select(*_row(
+            progress_bucket,
+            PROGRESS_SOURCE,
+            func.count(Progress.id),
+            func.avg(Progress.weight_kg),
+            func.min(Progress.weight_kg),
+            func.max(Progress.weight_kg),
+        ))
+        .where(
+            Progress.user_id == user_id,
+            Progress.created_at >= datetime.combine(start, datetime.min.time()),
+            Progress.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+        )
+        .group_by(progress_bucket)
+    )
+
+    combined = union_all(food, extras, workouts, progress).subquery()
+    return select(combined).order_by(combined.c.bucket, combined.c.source)
+
+
+def _analytics_buckets(rows):
+    """Yield one dict per bucket from the bucket-ordered rows of _analytics_query."""
+    previous_weight: Optional[float] = None
+    for key, group in groupby(rows, key=lambda r: r.bucket):
+        by_source = {r.source: r for r in group}
+        f = by_source.get(FOOD_SOURCE)
+        w = by_source.get(WORKOUT_SOURCE)
+        p = by_source.get(PROGRESS_SOURCE)
+        if f is None and w is None and p is None:
+            continue  # extra foods alone do not make a bucket
+        extra = by_source.get(EXTRA_SOURCE)
+        logged_days = int(f.v1) if f else 0
+        avg_weight = round(float(p.v2), 2) if p else None
+        avg_extra = float(extra.v1 or 0) / logged_days if extra is not None and logged_days else 0.0
+        yield {
+            "bucket": key,
+            "food_days_logged": logged_days,
+            "avg_planned_calories": round(float(f.v2 or 0), 1) if f else 0.0,
+            "avg_consumed_planned_calories": round(float(f.v3 or 0), 1) if f else 0.0,
+            "avg_extra_calories": round(avg_extra, 1),
+            "avg_consumed_total_calories": round(float(f.v3 or 0) + avg_extra, 1) if f else 0.0,
+            "water_goal_hit_rate": round(int(f.v4 or 0) / logged_days, 4) if logged_days else 0.0,
+            "avg_water_ml": round(float(f.v5 or 0), 1) if f else 0.0,
+            "workout_days_logged": int(w.v1) if w else 0,
+            "workout_days_completed": int(w.v2 or 0) if w else 0,
+            "workout_calories_burned": round(float(w.v3 or 0), 1) if w else 0.0,
+            "weight_entries": int(p.v1) if p else 0,
+            "avg_weight_kg": avg_weight,
+            "min_weight_kg": round(float(p.v3), 2) if p else None,
+            "max_weight_kg": round(float(p.v4), 2) if p else None,
+            "weight_delta_kg": round(avg_weight - previous_weight, 2) if avg_weight is not None and previous_weight is not None else None,
+        }
+        if avg_weight is not None:
+            previous_weight = avg_weight
+
+
+@router.get("/analytics")
+async def adherence_analytics(
+    granularity: str = Query("month", pattern="^(month|year)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user=Depends(get_current_user),
+):
+    """Monthly or yearly adherence and weight trends, aggregated in the database and streamed as JSON.
+
+    The response streams after the request's own session is closed, so it reads from its own.
+    """
+    end = end or date.today()
+    start = start or (end - timedelta(days=365 if granularity == "month" else 5 * 365))
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    db = SessionLocal()
+    try:
+        stmt = _analytics_query(int(user.id), start, end, granularity, db.get_bind().dialect.name)
+        rows = db.execute(stmt.execution_options(yield_per=ANALYTICS_YIELD_PER))
+    except Exception as e:
+        db.close()
+        raise HTTPException(status_code=500, detail=f"Error building adherence analytics: {str(e)}")
+
+    def _stream():
+        try:
+            yield json.dumps({"granularity": granularity, "start": start.isoformat(), "end": end.isoformat()})[:-1]
+            yield ', "buckets": ['
+            for i, bucket in enumerate(_analytics_buckets(rows)):
+                yield ("," if i else "") + json.dumps(bucket)
+            yield "]}"
+        finally:
+            rows.close()
+            db.close()
+
+    return StreamingResponse(_stream(), media_type="application/json")
+
@@ -3,14 +3,24 @@ from fastapi.responses import JSONResponse
 from typing import Optional
 import os
 import shutil
+import threading
 from pathlib import Path
 from ..ai_trainer import AITrainer
 
 router = APIRouter(prefix="/ai-trainer", tags=["AI Trainer"])
 
-# Initialize AI Trainer
+# AI Trainer is heavy (pose model + TTS engine); build it once on first use or at warmup
 EXERCISES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "exercises.csv")
-trainer = AITrainer(EXERCISES_PATH)
+_trainer: Optional[AITrainer] = None
+_trainer_lock = threading.Lock()
+
+def get_trainer() -> AITrainer:
+    global _trainer
+    if _trainer is None:
+        with _trainer_lock:
+            if _trainer is None:
+                _trainer = AITrainer(EXERCISES_PATH)
+    return _trainer
 
 @router.post("/analyze-gif")
 async def analyze_gif(file: UploadFile = File(...)):
@@ -31,7 +41,7 @@ async def analyze_gif(file: UploadFile = File(...)):
             shutil.copyfileobj(file.file, buffer)
         
         # Process GIF
-        result = trainer.process_gif(str(file_path))
+        result = get_trainer().process_gif(str(file_path))
         
         # Clean up
         os.remove(file_path)
@@ -54,7 +64,7 @@ async def get_exercise_info(exercise_name: str):
     - GIF URL
     """
     try:
-        info = trainer.analyzer.get_exercise_info(exercise_name)
+        info = get_trainer().analyzer.get_exercise_info(exercise_name)
         
         if not info:
             raise HTTPException(status_code=404, detail="Exercise not found")
@@ -82,7 +92,7 @@ async def search_exercises(
     - Search by name
     """
     try:
-        df = trainer.analyzer.exercises_df
+        df = get_trainer().analyzer.exercises_df
         
         if query:
             df = df[df['name'].str.contains(query, case=False, na=False)]
@@ -63,18 +63,18 @@ def _food_from_text(text: str) -> Optional[str]:
 def _match_food_from_dataset(text: str) -> Optional[str]:
     t = (text or "").lower()
     try:
-        foods = logic.df_food["food"].astype(str).str.lower().unique().tolist()
+        index = logic.get_food_index()
     except Exception:
-        foods = []
-    candidates = [f for f in foods if f in t]
+        return None
+    candidates = [index.names[pos] for pos in index.mentioned_in(t)]
     if candidates:
         candidates.sort(key=len, reverse=True)
         return candidates[0]
+    # First catalog food containing any longer token
     tokens = [tok for tok in t.split() if len(tok) > 2]
-    if tokens and foods:
-        for f in foods:
-            if any(tok in f for tok in tokens):
-                return f
+    hits = [h[0] for h in (index.contains(tok, limit=1) for tok in tokens) if h]
+    if hits:
+        return index.names[min(hits)]
     return None
 
 def _extract_float(pattern: str, text: str) -> Optional[float]:
@@ -396,13 +396,12 @@ async def ask(
                 prot_per100 = 0.0
                 carbs_per100 = 0.0
                 fat_per100 = 0.0
-                try:
-                    row = logic.df_food[logic.df_food["food"].str.lower() == food.lower()].iloc[0]
+                pos = logic.get_food_index().exact(food)
+                if pos is not None:
+                    row = logic.get_food_catalog().iloc[pos]
                     prot_per100 = float(row.get("protein", 0) or 0)
                     carbs_per100 = float(row.get("carbs", 0) or 0)
                     fat_per100 = float(row.get("fat", 0) or 0)
-                except Exception:
-                    pass
                 prot_serv = round(prot_per100 * grams / 100, 2)
                 carbs_serv = round(carbs_per100 * grams / 100, 2)
                 fat_serv = round(fat_per100 * grams / 100, 2)
@@ -3,8 +3,9 @@ CONVERSATIONAL CHATBOT API ENDPOINTS
 FastAPI routes for ChatGPT-like conversational interface
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import uuid
@@ -14,6 +15,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from conversational_chatbot import process_conversational_message, get_conversation_history, conversational_chatbot
+from .. import chat_store
 
 router = APIRouter()
 
@@ -38,6 +40,9 @@ class ConversationHistory(BaseModel):
     context: Dict
     current_topic: Optional[str]
     last_activity: str
+    total_messages: int = 0
+    summary: Dict = {}
+    next_cursor: Optional[int] = None  # pass as ?cursor= to fetch the previous page
 
 class UserProfile(BaseModel):
     user_id: str
@@ -54,10 +59,6 @@ class FeedbackRequest(BaseModel):
     rating: int  # 1-5 stars
     feedback: Optional[str] = None
 
-# In-memory storage for demo (use database in production)
-user_profiles = {}
-feedback_data = []
-
 @router.post("/chat/conversation", response_model=ChatResponse)
 async def chat_conversation(message: ChatMessage):
     """
@@ -86,12 +87,12 @@ async def chat_conversation(message: ChatMessage):
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
 @router.get("/chat/history/{session_id}", response_model=ConversationHistory)
-async def get_chat_history(session_id: str):
+async def get_chat_history(session_id: str, cursor: Optional[int] = Query(None, ge=0), limit: int = Query(20, ge=1, le=200)):
     """
-    Get conversation history for a session
+    Get conversation history for a session, one page at a time (newest page first)
     """
     try:
-        history = get_conversation_history(session_id)
+        history = get_conversation_history(session_id, cursor, limit)
         if not history:
             raise HTTPException(status_code=404, detail="Session not found")
         
@@ -108,7 +109,7 @@ async def update_user_profile(profile: UserProfile):
     Update user profile for personalization
     """
     try:
-        user_profiles[profile.user_id] = profile.dict()
+        await run_in_threadpool(chat_store.save_profile, profile.user_id, profile.dict())
         
         return {
             "message": "Profile updated successfully",
@@ -125,10 +126,11 @@ async def get_user_profile(user_id: str):
     Get user profile
     """
     try:
-        if user_id not in user_profiles:
+        profile = await run_in_threadpool(chat_store.get_profile, user_id)
+        if profile is None:
             raise HTTPException(status_code=404, detail="User profile not found")
         
-        return user_profiles[user_id]
+        return profile
         
     except HTTPException:
         raise
@@ -141,16 +143,19 @@ async def submit_feedback(feedback: FeedbackRequest):
     Submit feedback on chatbot responses
     """
     try:
+        conversation = conversational_chatbot.conversations.get(feedback.session_id)
         feedback_entry = {
             "id": str(uuid.uuid4()),
             "session_id": feedback.session_id,
+            "user_id": conversation.user_id if conversation else None,
             "message_id": feedback.message_id,
             "rating": feedback.rating,
             "feedback": feedback.feedback,
             "timestamp": datetime.now().isoformat()
         }
         
-        feedback_data.append(feedback_entry)
+        # Buffered and inserted in batches; analytics aggregate the table
+        await run_in_threadpool(chat_store.feedback_log.append, feedback_entry)
         
         return {
             "message": "Feedback submitted successfully",
@@ -170,7 +175,7 @@ async def get_personalized_suggestions(user_id: str):
         suggestions = []
         
         # Get user profile if available
-        profile = user_profiles.get(user_id, {})
+        profile = await run_in_threadpool(chat_store.get_profile, user_id) or {}
         
         # Generate suggestions based on profile
         if profile.get('fitness_goals'):
@@ -212,8 +217,8 @@ async def end_chat_session(session_id: str):
     End a chat session and clean up
     """
     try:
-        if session_id in conversational_chatbot.conversations:
-            del conversational_chatbot.conversations[session_id]
+        if conversational_chatbot.conversations.delete(session_id):
+            conversational_chatbot.archive.delete_session(session_id)
             return {"message": "Session ended successfully"}
         else:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -224,31 +229,35 @@ async def end_chat_session(session_id: str):
         raise HTTPException(status_code=500, detail=f"Error ending session: {str(e)}")
 
 @router.get("/chat/analytics")
-async def get_chat_analytics():
+async def get_chat_analytics(window_minutes: Optional[int] = Query(None, ge=1, le=30 * 24 * 60)):
     """
-    Get basic analytics about chatbot usage
+    Get basic analytics about chatbot usage (optionally for the last N minutes)
     """
     try:
-        total_conversations = len(conversational_chatbot.conversations)
-        total_messages = sum(
-            len(conv.messages) 
-            for conv in conversational_chatbot.conversations.values()
-        )
-        total_feedback = len(feedback_data)
+        totals = conversational_chatbot.analytics.snapshot()
+        feedback_stats = await run_in_threadpool(chat_store.feedback_log.stats)
+        active_sessions = await run_in_threadpool(len, conversational_chatbot.conversations)
         
-        if total_feedback > 0:
-            avg_rating = sum(f['rating'] for f in feedback_data) / total_feedback
-        else:
-            avg_rating = 0
-        
-        return {
-            "total_conversations": total_conversations,
-            "total_messages": total_messages,
-            "total_feedback": total_feedback,
-            "average_rating": round(avg_rating, 2),
-            "active_sessions": total_conversations,
+        result = {
+            "total_conversations": totals["conversations"],
+            "total_messages": totals["messages"],
+            "total_feedback": feedback_stats["count"],
+            "average_rating": feedback_stats["average_rating"],
+            "active_sessions": active_sessions,
+            "topics": totals["topics"],
             "timestamp": datetime.now().isoformat()
         }
+        if window_minutes:
+            window = conversational_chatbot.analytics.window(window_minutes * 60)
+            window_feedback = await run_in_threadpool(chat_store.feedback_log.stats, window_minutes * 60)
+            result["window"] = {
+                "minutes": window_minutes,
+                "conversations": window["conversations"],
+                "messages": window["messages"],
+                "feedback": window_feedback["count"],
+                "average_rating": window_feedback["average_rating"]
+            }
+        return result
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving analytics: {str(e)}")
@@ -12,7 +12,7 @@ async def analyze_image(file: UploadFile = File(...), user=Depends(get_current_u
 @router.get("/foods", response_model=List[str])
 async def list_foods(user=Depends(get_current_user)):
     try:
-        df = logic.load_foods(logic.CSV_PATH)
+        df = logic.get_food_catalog()
         foods = df["food"].astype(str).str.strip().tolist()
         uniq = sorted(set([f for f in foods if f]))
         return uniq
@@ -22,14 +22,15 @@ async def list_foods(user=Depends(get_current_user)):
 @router.get("/nutrition")
 async def get_nutrition(food: str, user=Depends(get_current_user)):
     try:
-        df = logic.load_foods(logic.CSV_PATH)
-        f = (food or "").strip().lower()
-        row = df[df["food"].str.lower() == f]
-        if row.empty:
-            row = df[df["food"].str.lower().str.contains(f)]
-        if row.empty:
+        df = logic.get_food_catalog()
+        index = logic.get_food_index()
+        pos = index.exact(food)
+        if pos is None:
+            hits = index.contains(food, limit=1)
+            pos = hits[0] if hits else None
+        if pos is None:
             return {"food_name": food, "calories_per_100g": 0, "protein_g": 0, "carbs_g": 0, "fat_g": 0}
-        r = row.iloc[0]
+        r = df.iloc[pos]
         return {
             "food_name": str(r.get("food", "")),
             "calories_per_100g": float(r.get("calories", 0) or 0),
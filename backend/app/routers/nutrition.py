@@ -5,12 +5,17 @@ Handle macronutrient tracking and daily nutrition data
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
 from datetime import datetime, date, timedelta
+import threading
+import time
 from ..deps import get_current_user
 from ..deps import get_db
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from ..models import Profile
+from ..models import Profile, NutritionDailyLog
 from .. import logic
 
 router = APIRouter()
@@ -34,11 +39,150 @@ class NutritionEntry(BaseModel):
     macros: MacroData
     calories: int
 
-# In-memory storage for demo (use database in production)
-nutrition_data = {}
+# Daily entries live in the nutrition_daily_logs table. Single-day reads go through a small
+# write-through cache; its TTL bounds staleness when another worker wrote the same day.
+LEDGER_CACHE_SIZE = 4096
+LEDGER_CACHE_TTL_SECONDS = 30
+_ledger_cache: "OrderedDict[Tuple[str, str], Tuple[float, DailyNutrition]]" = OrderedDict()
+_ledger_lock = threading.Lock()
 
-def _user_date_key(user_id: str, target_date: date) -> str:
-    return f"{user_id}:{target_date.isoformat()}"
+def _ensure_ledger_table(db: Session) -> None:
+    try:
+        NutritionDailyLog.__table__.create(bind=db.get_bind(), checkfirst=True)
+    except Exception:
+        pass
+
+def _nutrition_from_row(row: NutritionDailyLog) -> DailyNutrition:
+    return DailyNutrition(
+        date=date.fromisoformat(row.log_date),
+        consumed=MacroData(protein=row.protein_g or 0, carbs=row.carbs_g or 0, fats=row.fats_g or 0),
+        target=MacroData(protein=row.target_protein_g or 0, carbs=row.target_carbs_g or 0, fats=row.target_fats_g or 0),
+        calories=int(row.calories or 0),
+        water_ml=int(row.water_ml or 0),
+    )
+
+def _cache_put(user_id: str, nutrition: DailyNutrition) -> None:
+    with _ledger_lock:
+        key = (user_id, nutrition.date.isoformat())
+        _ledger_cache[key] = (time.time(), nutrition)
+        _ledger_cache.move_to_end(key)
+        while len(_ledger_cache) > LEDGER_CACHE_SIZE:
+            _ledger_cache.popitem(last=False)
+
+def _cache_get(user_id: str, target_date: date) -> Optional[DailyNutrition]:
+    with _ledger_lock:
+        hit = _ledger_cache.get((user_id, target_date.isoformat()))
+    if hit is None or time.time() - hit[0] > LEDGER_CACHE_TTL_SECONDS:
+        return None
+    return hit[1]
+
+def _ledger_get(db: Session, user_id: str, target_date: date) -> Optional[DailyNutrition]:
+    cached = _cache_get(user_id, target_date)
+    if cached is not None:
+        return cached
+    _ensure_ledger_table(db)
+    row = (
+        db.query(NutritionDailyLog)
+        .filter(NutritionDailyLog.user_id == user_id, NutritionDailyLog.log_date == target_date.isoformat())
+        .first()
+    )
+    if row is None:
+        return None
+    nutrition = _nutrition_from_row(row)
+    _cache_put(user_id, nutrition)
+    return nutrition
+
+def _ledger_put(db: Session, user_id: str, nutrition: DailyNutrition) -> DailyNutrition:
+    """Write-through upsert of one (user_id, date) row."""
+    _ensure_ledger_table(db)
+    log_date = nutrition.date.isoformat()
+    for attempt in range(2):
+        row = (
+            db.query(NutritionDailyLog)
+            .filter(NutritionDailyLog.user_id == user_id, NutritionDailyLog.log_date == log_date)
+            .first()
+        )
+        if row is None:
+            row = NutritionDailyLog(user_id=user_id, log_date=log_date)
+            db.add(row)
+        row.protein_g = float(nutrition.consumed.protein)
+        row.carbs_g = float(nutrition.consumed.carbs)
+        row.fats_g = float(nutrition.consumed.fats)
+        row.target_protein_g = float(nutrition.target.protein)
+        row.target_carbs_g = float(nutrition.target.carbs)
+        row.target_fats_g = float(nutrition.target.fats)
+        row.calories = int(nutrition.calories)
+        row.water_ml = int(nutrition.water_ml)
+        try:
+            db.commit()
+            break
+        except IntegrityError:
+            # Another worker inserted the same (user_id, date) first; retry as an update
+            db.rollback()
+            if attempt:
+                raise
+    _cache_put(user_id, nutrition)
+    return nutrition
+
+def _ledger_range(db: Session, user_id: str, start: date, end: date) -> List[DailyNutrition]:
+    """Entries in [start, end], newest first, in one query."""
+    _ensure_ledger_table(db)
+    rows = (
+        db.query(NutritionDailyLog)
+        .filter(
+            NutritionDailyLog.user_id == user_id,
+            NutritionDailyLog.log_date >= start.isoformat(),
+            NutritionDailyLog.log_date <= end.isoformat(),
+        )
+        .order_by(NutritionDailyLog.log_date.desc())
+        .all()
+    )
+    return [_nutrition_from_row(r) for r in rows]
+
+def _ledger_averages(
+    db: Session,
+    user_id: str,
+    today: date,
+    windows: Tuple[int, ...] = (7, 30),
+    unsaved: Optional[DailyNutrition] = None,
+) -> Dict[int, dict]:
+    """Per-window day counts and macro averages over logged days, all windows in one query.
+
+    `unsaved` is a day served without a ledger row (today's profile snapshot); it counts like a row.
+    """
+    _ensure_ledger_table(db)
+    columns = []
+    for days in windows:
+        in_window = NutritionDailyLog.log_date >= (today - timedelta(days=days - 1)).isoformat()
+        columns.append(func.count(case((in_window, NutritionDailyLog.id))))
+        for col in (NutritionDailyLog.calories, NutritionDailyLog.protein_g, NutritionDailyLog.carbs_g, NutritionDailyLog.fats_g):
+            columns.append(func.sum(case((in_window, col))))
+    row = (
+        db.query(*columns)
+        .filter(
+            NutritionDailyLog.user_id == user_id,
+            NutritionDailyLog.log_date >= (today - timedelta(days=max(windows) - 1)).isoformat(),
+            NutritionDailyLog.log_date <= today.isoformat(),
+        )
+        .one()
+    )
+    out = {}
+    for i, days in enumerate(windows):
+        count, *sums = row[i * 5:(i + 1) * 5]
+        count, sums = int(count or 0), [float(v or 0) for v in sums]
+        if unsaved is not None and today - timedelta(days=days - 1) <= unsaved.date <= today:
+            count += 1
+            extra = (unsaved.calories, unsaved.consumed.protein, unsaved.consumed.carbs, unsaved.consumed.fats)
+            sums = [total + float(value) for total, value in zip(sums, extra)]
+        calories, protein, carbs, fats = (total / count if count else 0.0 for total in sums)
+        out[days] = {
+            "days_logged": count,
+            "calories": round(calories),
+            "protein": round(protein, 1),
+            "carbs": round(carbs, 1),
+            "fats": round(fats, 1),
+        }
+    return out
 
 def _build_user_data_from_profile(profile: Optional[Profile]) -> dict:
     if not profile:
@@ -79,28 +223,33 @@ def _build_user_data_from_profile(profile: Optional[Profile]) -> dict:
         "water_consumption_l": profile.water_consumption_l or 2.0
     }
 
-def _profile_nutrition_snapshot(profile: Optional[Profile]) -> DailyNutrition:
-    user_data = _build_user_data_from_profile(profile)
-    daily_calories = logic.daily_calorie_target(
-        user_data["weight_kg"],
-        user_data["height_cm"],
-        user_data["lifestyle_level"],
-        user_data["motive"],
-        user_data["age"],
-        user_data["gender"],
-    )
-    target_macros = calculate_macros_from_calories(int(round(daily_calories)))
+# Plan-derived nutrition per profile fingerprint. Any profile edit changes the fingerprint,
+# so stale entries are never served and simply age out of the LRU.
+PROFILE_SNAPSHOT_CACHE_SIZE = 1024
+_profile_snapshots: "OrderedDict[Tuple, dict]" = OrderedDict()
+_profile_snapshot_lock = threading.Lock()
+
+def _profile_fingerprint(user_data: dict) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in user_data.items()))
+
+def _plan_nutrition(user_data: dict) -> dict:
+    """Consumed macros/calories and sodium/fibre/iron of the recommended plan (one generate_recommendations per profile)."""
+    key = _profile_fingerprint(user_data)
+    with _profile_snapshot_lock:
+        cached = _profile_snapshots.get(key)
+        if cached is not None:
+            _profile_snapshots.move_to_end(key)
+            return cached
 
-    # Build consumed values from current recommendation engine output
     rec = logic.generate_recommendations(user_data)
     diet_totals = rec.get("diet_totals") or {}
+    diet_items = rec.get("diet", []) or []
     if diet_totals:
         consumed_protein = float(diet_totals.get("daily_protein_g", 0) or 0)
         consumed_carbs = float(diet_totals.get("daily_carbs_g", 0) or 0)
         consumed_fats = float(diet_totals.get("daily_fat_g", 0) or 0)
         consumed_calories = float(diet_totals.get("daily_calories", 0) or 0)
     else:
-        diet_items = rec.get("diet", []) or []
         consumed_protein = float(sum(float(m.get("protein_g", 0) or 0) for m in diet_items))
         consumed_carbs = float(sum(float(m.get("carbs_g", 0) or 0) for m in diet_items))
         consumed_fats = float(sum(float(m.get("fat_g", 0) or 0) for m in diet_items))
@@ -109,11 +258,43 @@ def _profile_nutrition_snapshot(profile: Optional[Profile]) -> DailyNutrition:
             for m in diet_items
         ))
 
+    # Full nutrient profile from the plan's nutrient matrix totals
+    nutrients = diet_totals.get("nutrients") or {}
+    facts = {
+        "protein": consumed_protein,
+        "carbs": consumed_carbs,
+        "fats": consumed_fats,
+        "calories": consumed_calories,
+        "sodium_mg": float(nutrients["sodium_mg"]) if "sodium_mg" in nutrients else _sodium_for_items(diet_items),
+        "fibre_g": float(nutrients.get("fibre_g", 0) or 0),
+        "iron_mg": float(nutrients.get("iron_mg", 0) or 0),
+    }
+    with _profile_snapshot_lock:
+        _profile_snapshots[key] = facts
+        while len(_profile_snapshots) > PROFILE_SNAPSHOT_CACHE_SIZE:
+            _profile_snapshots.popitem(last=False)
+    return facts
+
+def _profile_nutrition_snapshot(profile: Optional[Profile]) -> DailyNutrition:
+    user_data = _build_user_data_from_profile(profile)
+    daily_calories = logic.daily_calorie_target(
+        user_data["weight_kg"],
+        user_data["height_cm"],
+        user_data["lifestyle_level"],
+        user_data["motive"],
+        user_data["age"],
+        user_data["gender"],
+    )
+    target_macros = calculate_macros_from_calories(int(round(daily_calories)))
+
+    # Build consumed values from current recommendation engine output
+    facts = _plan_nutrition(user_data)
     consumed = MacroData(
-        protein=round(consumed_protein, 1),
-        carbs=round(consumed_carbs, 1),
-        fats=round(consumed_fats, 1),
+        protein=round(facts["protein"], 1),
+        carbs=round(facts["carbs"], 1),
+        fats=round(facts["fats"], 1),
     )
+    consumed_calories = facts["calories"]
     calories = int(round(consumed_calories if consumed_calories > 0 else (consumed.protein * 4 + consumed.carbs * 4 + consumed.fats * 9)))
     water_ml = int(round(float(user_data.get("water_consumption_l", 2.0)) * 1000))
 
@@ -125,49 +306,52 @@ def _profile_nutrition_snapshot(profile: Optional[Profile]) -> DailyNutrition:
         water_ml=water_ml
     )
 
-def _estimate_sodium_mg(user_data: dict) -> float:
-    """
-    Estimate sodium for the day from recommendation foods and serving sizes.
-    Returns 0 when sodium data is unavailable.
-    """
+def _sodium_for_items(diet_items: List[dict]) -> float:
     try:
-        rec = logic.generate_recommendations(user_data)
-        diet_items = rec.get("diet", []) or []
-        df = logic.load_foods(logic.CSV_PATH)
-        if "sodium (mg)" not in df.columns:
+        micros = logic.get_food_micronutrients()
+        if "sodium (mg)" not in micros.columns:
             return 0.0
-
-        # Build lookup by normalized food name
-        lookup = {}
-        for _, row in df.iterrows():
-            food = str(row.get("food", "")).strip().lower()
-            if not food:
-                continue
-            sodium_100g = float(row.get("sodium (mg)", 0) or 0)
-            if food not in lookup:
-                lookup[food] = sodium_100g
-
         total_sodium = 0.0
         for item in diet_items:
-            food_name = str(item.get("food_name", "")).strip().lower()
             serving_g = float(item.get("serving_g", 100) or 100)
-            sodium_100g = lookup.get(food_name)
-            if sodium_100g is None:
-                # fuzzy fallback by partial match
-                match = next((lookup[k] for k in lookup.keys() if food_name and food_name in k), None)
-                sodium_100g = match if match is not None else 0.0
+            # exact name, else first catalog food containing it
+            sodium_100g = micros.value(str(item.get("food_name", "")), "sodium (mg)") or 0.0
             total_sodium += float(sodium_100g) * (serving_g / 100.0)
         return round(total_sodium, 1)
     except Exception:
         return 0.0
 
+def _estimate_sodium_mg(user_data: dict) -> float:
+    """
+    Estimate sodium for the day from recommendation foods and serving sizes.
+    Returns 0 when sodium data is unavailable.
+    """
+    try:
+        return _plan_nutrition(user_data)["sodium_mg"]
+    except Exception:
+        return 0.0
+
+def _estimate_plan_micros(user_data: dict) -> Dict[str, float]:
+    """Fibre (g) and iron (mg) of the recommended plan; empty when unavailable."""
+    try:
+        facts = _plan_nutrition(user_data)
+        return {"fibre_g": facts["fibre_g"], "iron_mg": facts["iron_mg"]}
+    except Exception:
+        return {}
+
+# Daily reference intakes used by the fibre/iron alerts
+FIBRE_TARGET_G = 25.0
+IRON_TARGET_MG = {"female": 18.0, "male": 8.0}
+
 def _build_smart_alerts(
     consumed_protein: float,
     target_protein: float,
     consumed_calories: float,
     target_calories: float,
     estimated_sodium_mg: float,
-    user_data: Optional[dict] = None
+    user_data: Optional[dict] = None,
+    estimated_fibre_g: Optional[float] = None,
+    estimated_iron_mg: Optional[float] = None
 ) -> List[dict]:
     alerts: List[dict] = []
     user_data = user_data or {}
@@ -219,6 +403,34 @@ def _build_smart_alerts(
             "suggestions": sodium_suggestions
         })
 
+    if estimated_fibre_g is not None and 0 < estimated_fibre_g < FIBRE_TARGET_G * 0.7:
+        alerts.append({
+            "type": "low_fibre_day",
+            "severity": "medium",
+            "message": f"Low fibre day: estimated fibre is below {int(FIBRE_TARGET_G * 0.7)} g.",
+            "suggestions": [
+                "Keep the salad side with each main meal.",
+                "Swap refined grains for whole grains, millets or brown rice.",
+                "Add a fruit or a bowl of sprouts/legumes at snacks."
+            ]
+        })
+
+    iron_target = IRON_TARGET_MG.get(str(user_data.get("gender", "")).lower(), IRON_TARGET_MG["male"])
+    if estimated_iron_mg is not None and 0 < estimated_iron_mg < iron_target * 0.7:
+        iron_suggestions = [
+            "Include leafy greens (spinach, methi) or legumes in lunch and dinner.",
+            "Pair iron-rich foods with vitamin C (lemon, amla, citrus) to improve absorption.",
+            "Avoid tea/coffee right after meals."
+        ]
+        if "non" in diet_type:
+            iron_suggestions[0] = "Include eggs, fish or lean meat, or legumes, in lunch and dinner."
+        alerts.append({
+            "type": "low_iron_day",
+            "severity": "medium",
+            "message": "Low iron day: estimated iron is below 70% of the daily reference intake.",
+            "suggestions": iron_suggestions
+        })
+
     return alerts
 
 def calculate_macros_from_calories(calories: int, target_ratio: Optional[dict] = None) -> MacroData:
@@ -246,20 +458,16 @@ async def get_daily_nutrition(
     """Get daily nutrition data for a specific date"""
     try:
         user_id = str(user.id) if hasattr(user, 'id') else "demo_user"
-        key = _user_date_key(user_id, target_date)
-        legacy_key = target_date.isoformat()
+        nutrition = _ledger_get(db, user_id, target_date)
 
-        # Backward compatibility for previously stored global date keys
-        if key not in nutrition_data and legacy_key in nutrition_data:
-            nutrition_data[key] = nutrition_data[legacy_key]
-
-        if key not in nutrition_data:
+        if nutrition is None:
             profile = db.query(Profile).filter(Profile.user_id == user_id).first()
             snap = _profile_nutrition_snapshot(profile)
             snap.date = target_date
-            nutrition_data[key] = snap
+            # Served, not persisted: only the user's own POST writes a ledger row
+            nutrition = snap
         
-        return nutrition_data[key]
+        return nutrition
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching nutrition data: {str(e)}")
@@ -268,14 +476,14 @@ async def get_daily_nutrition(
 async def update_daily_nutrition(
     target_date: date,
     nutrition: DailyNutrition,
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """Update daily nutrition data"""
     try:
         user_id = str(user.id) if hasattr(user, 'id') else "demo_user"
-        key = _user_date_key(user_id, target_date)
         
-        nutrition_data[key] = nutrition
+        _ledger_put(db, user_id, nutrition.model_copy(update={"date": target_date}))
         
         return {
             "message": "Nutrition data updated successfully",
@@ -304,36 +512,20 @@ async def get_weekly_nutrition(
         today = date.today()
         today_data = await get_daily_nutrition(today, user, db)
 
-        # Collect only real available entries for last 7 days (avoid fake constant backfill)
-        weekly_data = []
-        
-        for i in range(7):
-            target_date = today - timedelta(days=i)
-            key = _user_date_key(user_id, target_date)
-            legacy_key = target_date.isoformat()
-
-            if key in nutrition_data:
-                weekly_data.append(nutrition_data[key])
-            elif legacy_key in nutrition_data:
-                legacy = nutrition_data[legacy_key]
-                nutrition_data[key] = legacy
-                weekly_data.append(legacy)
-            elif i == 0:
-                weekly_data.append(today_data)
-
-        if not weekly_data:
-            weekly_data = [today_data]
-        
-        days_count = max(1, len(weekly_data))
+        # Collect only real available entries for last 7 days (avoid fake constant backfill);
+        # today is always included, as its unsaved profile snapshot when nothing was logged yet
+        weekly_data = _ledger_range(db, user_id, today - timedelta(days=6), today)
+        unsaved = None
+        if not weekly_data or weekly_data[0].date != today:
+            unsaved = today_data
+            weekly_data.insert(0, today_data)
+        averages = _ledger_averages(db, user_id, today, unsaved=unsaved)
+        weekly, monthly = averages[7], averages[30]
 
         return {
             "weekly_data": weekly_data,
-            "averages": {
-                "calories": round(sum(d.calories for d in weekly_data) / days_count),
-                "protein": round(sum(d.consumed.protein for d in weekly_data) / days_count, 1),
-                "carbs": round(sum(d.consumed.carbs for d in weekly_data) / days_count, 1),
-                "fats": round(sum(d.consumed.fats for d in weekly_data) / days_count, 1)
-            }
+            "averages": {k: weekly[k] for k in ("calories", "protein", "carbs", "fats")},
+            "monthly_averages": monthly,
         }
         
     except Exception as e:
@@ -422,13 +614,16 @@ async def get_nutrition_summary(
             daily_data.target.fats * 9
         )
         estimated_sodium_mg = _estimate_sodium_mg(user_data)
+        plan_micros = _estimate_plan_micros(user_data)
         smart_alerts = _build_smart_alerts(
             consumed_protein=daily_data.consumed.protein,
             target_protein=daily_data.target.protein,
             consumed_calories=daily_data.calories,
             target_calories=target_calories,
             estimated_sodium_mg=estimated_sodium_mg,
-            user_data=user_data
+            user_data=user_data,
+            estimated_fibre_g=plan_micros.get("fibre_g"),
+            estimated_iron_mg=plan_micros.get("iron_mg")
         )
         
         # Calculate completion percentages
@@ -455,6 +650,8 @@ async def get_nutrition_summary(
             "water_ml": daily_data.water_ml,
             "on_track": protein_completion >= 90 and carbs_completion >= 90 and fats_completion >= 90,
             "estimated_sodium_mg": estimated_sodium_mg,
+            "estimated_fibre_g": plan_micros.get("fibre_g"),
+            "estimated_iron_mg": plan_micros.get("iron_mg"),
             "alerts": smart_alerts
         }
         
@@ -9,6 +9,7 @@ import re
 from ..schemas import ProfileIn, ProfileOut, Recommendation
 from ..models import Profile, Report
 from ..deps import get_db, get_current_user
+from .adherence import get_adherence_metrics
 from ..logic import (
     compute_bmi,
     bmi_category,
@@ -45,6 +46,14 @@ def _split_csv(value: Optional[str]) -> list[str]:
             dedup.append(x)
     return dedup
 
+def _workout_adaptation(db: Session, user_id: int) -> Dict[str, Optional[float]]:
+    """Adherence features in the keys generate_recommendations reads."""
+    metrics = get_adherence_metrics(db, user_id)
+    return {
+        "workout_completion_rate_14d": metrics["adherence_rate_14d"],
+        "workout_streak_days": metrics["workout_streak_days"],
+    }
+
 def _extract_profile_injuries(health_diseases: Optional[str]) -> Dict[str, str]:
     text = (health_diseases or "")
     lower = text.lower()
@@ -74,10 +83,9 @@ def _merge_health_with_injuries(health_diseases: Optional[str], injured_body_par
 def _invalidate_weekly_plan_cache(user_id: int) -> None:
     """Invalidate cached weekly meal plans after profile/medical changes."""
     try:
-        from .weekly_meal_plan import weekly_plans
-        weekly_plans.pop(f"user:{user_id}", None)
-        # Keep public demo endpoint in sync as well.
-        weekly_plans.pop("current", None)
+        from .weekly_meal_plan import invalidate_user_plan
+        # Also drops the public demo plan; the kept inputs let a partial edit regenerate incrementally.
+        invalidate_user_plan(user_id, keep_inputs=True)
     except Exception:
         pass
 
@@ -225,6 +233,7 @@ def upload_medical_report(
         "injured_body_parts": _extract_profile_injuries(profile.health_diseases).get("injured_body_parts", ""),
         "age": profile.age,
         "gender": profile.gender,
+        **_workout_adaptation(db, user.id),
     })
 
     return {
@@ -285,6 +294,7 @@ def get_personalized_recommendations(
             "injured_body_parts": _extract_profile_injuries(profile.health_diseases).get("injured_body_parts", ""),
             "age": profile.age,
             "gender": profile.gender,
+            **_workout_adaptation(db, user.id),
         })
 
         weight_val = profile.weight_kg
@@ -331,6 +341,7 @@ def get_ab_exercises(
     profile = db.query(Profile).filter(Profile.user_id == user.id).first()
     level = str(profile.lifestyle_level) if profile and profile.lifestyle_level else "sedentary"
     injuries = _extract_profile_injuries(getattr(profile, "health_diseases", "")).get("injured_body_parts", "")
+    adaptation = get_adherence_metrics(db, user.id)
     exercises = get_exercises(
         level,
         target_count=8,
@@ -339,6 +350,7 @@ def get_ab_exercises(
         weight_kg=getattr(profile, "weight_kg", None),
         medical_conditions=_split_csv(getattr(profile, "health_diseases", "")),
         injured_body_parts=_split_csv(injuries),
+        **adaptation,
     )
     
     return {
@@ -367,6 +379,7 @@ def get_upper_body_exercises(
     profile = db.query(Profile).filter(Profile.user_id == user.id).first()
     level = str(profile.lifestyle_level) if profile and profile.lifestyle_level else "sedentary"
     injuries = _extract_profile_injuries(getattr(profile, "health_diseases", "")).get("injured_body_parts", "")
+    adaptation = get_adherence_metrics(db, user.id)
     exercises = get_exercises(
         level,
         target_count=10,
@@ -375,6 +388,7 @@ def get_upper_body_exercises(
         weight_kg=getattr(profile, "weight_kg", None),
         medical_conditions=_split_csv(getattr(profile, "health_diseases", "")),
         injured_body_parts=_split_csv(injuries),
+        **adaptation,
     )
     
     # Fallback: if no exercises returned, try without target_area filter
@@ -387,6 +401,7 @@ def get_upper_body_exercises(
             weight_kg=getattr(profile, "weight_kg", None),
             medical_conditions=_split_csv(getattr(profile, "health_diseases", "")),
             injured_body_parts=_split_csv(injuries),
+            **adaptation,
         )
     
     return {
@@ -413,6 +428,7 @@ def get_full_body_exercises(
     profile = db.query(Profile).filter(Profile.user_id == user.id).first()
     level = str(profile.lifestyle_level) if profile and profile.lifestyle_level else "sedentary"
     injuries = _extract_profile_injuries(getattr(profile, "health_diseases", "")).get("injured_body_parts", "")
+    adaptation = get_adherence_metrics(db, user.id)
     exercises = get_exercises(
         level,
         target_count=12,
@@ -421,6 +437,7 @@ def get_full_body_exercises(
         weight_kg=getattr(profile, "weight_kg", None),
         medical_conditions=_split_csv(getattr(profile, "health_diseases", "")),
         injured_body_parts=_split_csv(injuries),
+        **adaptation,
     )
     
     if not exercises:
@@ -432,6 +449,7 @@ def get_full_body_exercises(
             weight_kg=getattr(profile, "weight_kg", None),
             medical_conditions=_split_csv(getattr(profile, "health_diseases", "")),
             injured_body_parts=_split_csv(injuries),
+            **adaptation,
         )
     
     return {
@@ -459,6 +477,7 @@ def get_exercises_by_bodypart(
     profile = db.query(Profile).filter(Profile.user_id == user.id).first()
     level = str(profile.lifestyle_level) if profile and profile.lifestyle_level else "sedentary"
     injuries = _extract_profile_injuries(getattr(profile, "health_diseases", "")).get("injured_body_parts", "")
+    adaptation = get_adherence_metrics(db, user.id)
     exercises = get_exercises(
         level,
         target_count=10,
@@ -467,6 +486,7 @@ def get_exercises_by_bodypart(
         weight_kg=getattr(profile, "weight_kg", None),
         medical_conditions=_split_csv(getattr(profile, "health_diseases", "")),
         injured_body_parts=_split_csv(injuries),
+        **adaptation,
     )
     
     if not exercises:
@@ -478,6 +498,7 @@ def get_exercises_by_bodypart(
             weight_kg=getattr(profile, "weight_kg", None),
             medical_conditions=_split_csv(getattr(profile, "health_diseases", "")),
             injured_body_parts=_split_csv(injuries),
+            **adaptation,
         )
     
     return {
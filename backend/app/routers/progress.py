@@ -10,9 +10,8 @@ router = APIRouter()
 
 def _invalidate_weekly_plan_cache(user_id: int) -> None:
     try:
-        from .weekly_meal_plan import weekly_plans
-        weekly_plans.pop(f"user:{user_id}", None)
-        weekly_plans.pop("current", None)
+        from .weekly_meal_plan import invalidate_user_plan
+        invalidate_user_plan(user_id, keep_inputs=True)
     except Exception:
         pass
 
@@ -8,7 +8,6 @@ from .nutrition import (
     get_nutrition_summary, 
     get_weekly_nutrition,
     get_nutrition_targets,
-    nutrition_data,
     calculate_macros_from_calories
 )
 from datetime import date
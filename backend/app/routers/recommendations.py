@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from ..schemas import Recommendation
-from ..models import Profile, Report, WorkoutDailyLog
+from ..models import Profile, Report
 from ..deps import get_db, get_current_user
+from .adherence import get_adherence_metrics
 from .. import logic
 import json
-from datetime import date, timedelta
 
 router = APIRouter()
 
@@ -179,23 +179,7 @@ def get_recommendations(
     report_consume = report_ctx.get("consume", [])
     merged_injuries = _dedupe_keep_order(report_injuries + report_ctx.get("injuries", []))
 
-    today = date.today()
-    start = today - timedelta(days=13)
-    workout_logs = (
-        db.query(WorkoutDailyLog)
-        .filter(WorkoutDailyLog.user_id == user.id, WorkoutDailyLog.log_date >= start.isoformat())
-        .all()
-    )
-    completion_rate_14d = 0.0
-    workout_streak_days = 0
-    if workout_logs:
-        completed = sum(1 for r in workout_logs if bool(getattr(r, "completed", False)))
-        completion_rate_14d = completed / 14.0
-    recent_lookup = {str(getattr(r, "log_date", "")): bool(getattr(r, "completed", False)) for r in workout_logs}
-    cursor = today
-    while recent_lookup.get(cursor.isoformat(), False):
-        workout_streak_days += 1
-        cursor = cursor - timedelta(days=1)
+    metrics = get_adherence_metrics(db, int(user.id))
 
     # ---------------- GENERATE RECOMMENDATIONS ----------------
     user_data = {
@@ -216,8 +200,8 @@ def get_recommendations(
         "gender": gender,
         "bmi": bmi,
         "report_injuries": merged_injuries,
-        "workout_completion_rate_14d": completion_rate_14d,
-        "workout_streak_days": workout_streak_days,
+        "workout_completion_rate_14d": metrics["adherence_rate_14d"],
+        "workout_streak_days": metrics["workout_streak_days"],
     }
 
     rec = logic.generate_recommendations(user_data)
@@ -5,14 +5,20 @@ Dynamically updates recommendations based on weight changes and health reports
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any, cast
+from typing import List, Optional, Dict, Any, Tuple, cast
 from datetime import datetime, date, timedelta
 from sqlalchemy.orm import Session
 from ..deps import get_db, get_current_user
 from ..models import Profile, Report
-from .. import logic
+from .. import logic, plan_store
+from ..nutrient_matrix import NUTRIENT_KEYS, profile_dict
+from ..single_flight import SingleFlight
+from ..portion_optimizer import PortionCandidate, MealTargets, day_targets, optimize_day, optimize_meal
 import json
+import numpy as np
+import os
 import re
+import threading
 
 router = APIRouter()
 
@@ -26,6 +32,7 @@ class MealItem(BaseModel):
     fiber: float = 0.0
     preparation_time: int  # minutes
     difficulty: str  # easy, medium, hard
+    portion: float = 1.0  # multiplier of the listed serving chosen by the portion optimizer
 
 class DailyMealPlan(BaseModel):
     day: str
@@ -37,6 +44,7 @@ class DailyMealPlan(BaseModel):
     total_protein: float
     total_carbs: float
     total_fats: float
+    nutrients: Dict[str, float] = {}  # full profile (see nutrient_matrix.NUTRIENT_KEYS)
 
 class WeeklyMealPlan(BaseModel):
     week_start: date
@@ -46,11 +54,22 @@ class WeeklyMealPlan(BaseModel):
     weekly_protein: float
     weekly_carbs: float
     weekly_fats: float
+    weekly_nutrients: Dict[str, float] = {}
     based_on_weight: float
     based_on_health_report: Optional[str] = None
     last_updated: datetime
     personalized_items: int = 0  # Number of personalized recommendation items used
 
+class WeeklyPlanInputs(BaseModel):
+    """Per-slot inputs a weekly plan was built from (kept server-side, not part of the API response)."""
+    week_start: date
+    daily_calories: float
+    daily_protein: float
+    avoid_tokens: List[str] = []
+    recommendations: List[Dict[str, Any]] = []
+    alternatives: List[List[Dict[str, Any]]] = []  # alternative daily plans; later horizon weeks rotate through them
+    slots: Dict[str, Dict[str, List[MealItem]]] = {}  # day -> meal -> items before the portion optimizer
+
 class HealthTrigger(BaseModel):
     weight_change_threshold: float = 1.0  # kg
     new_health_condition: bool = True
@@ -58,7 +77,33 @@ class HealthTrigger(BaseModel):
 
 # In-memory storage for demo (use database in production)
 weekly_plans = {}
+# Entries invalidated by a profile edit: their per-slot inputs seed an incremental regeneration
+_previous_plans: Dict[str, Dict[str, Any]] = {}
 health_triggers = HealthTrigger()
+# Concurrent requests for the same user + plan signature share one generation
+_plan_flights = SingleFlight()
+
+
+def invalidate_user_plan(user_id: int, keep_inputs: bool = False) -> None:
+    """Drop a user's cached plan (and the public demo plan). With keep_inputs the entry is kept aside
+    so the next request can regenerate only what the profile change touched."""
+    entry = weekly_plans.pop(f"user:{user_id}", None)
+    weekly_plans.pop("current", None)
+    if keep_inputs and isinstance(entry, dict) and entry.get("inputs") is not None:
+        _previous_plans[f"user:{user_id}"] = entry
+    else:
+        _previous_plans.pop(f"user:{user_id}", None)
+
+
+def _week_start(today: Optional[date] = None) -> date:
+    today = today or date.today()
+    return today - timedelta(days=today.weekday())
+
+
+def _day_index(day: date) -> int:
+    """Variety index of a calendar day: the weekday within a week, and it keeps counting across weeks
+    so rotations continue instead of repeating the same week."""
+    return (day - HORIZON_EPOCH).days
 
 
 def _to_float(value: Any) -> Optional[float]:
@@ -260,6 +305,28 @@ def _parse_report_context(latest_report: Optional[Report]) -> Dict[str, Any]:
     ctx["summary_text"] = text
     return ctx
 
+def _daily_nutrient_profiles(day_plans: List[DailyMealPlan]) -> "np.ndarray":
+    """days x NUTRIENT_KEYS: day-membership matrix @ per-item nutrient matrix.
+
+    Item kcal/macros (and fibre when set) are the plan's own numbers; the other nutrients come
+    from the item's catalog food scaled to its calories.
+    """
+    day_items = [[*p.breakfast, *p.lunch, *p.snacks, *p.dinner] for p in day_plans]
+    items = [item for items in day_items for item in items]
+    item_matrix = logic.get_nutrient_matrix().scaled_rows([(item.name, item.calories) for item in items])
+    fibre_col = NUTRIENT_KEYS.index("fibre_g")
+    for i, item in enumerate(items):
+        item_matrix[i, :4] = [item.calories, item.protein, item.carbs, item.fats]
+        if item.fiber:
+            item_matrix[i, fibre_col] = item.fiber
+
+    membership = np.zeros((len(day_items), len(items)), dtype=float)
+    start = 0
+    for d, items_of_day in enumerate(day_items):
+        membership[d, start:start + len(items_of_day)] = 1.0
+        start += len(items_of_day)
+    return membership @ item_matrix
+
 def generate_meal_item(food_name: str, food_data: Dict) -> MealItem:
     """Generate a meal item from food data"""
     return MealItem(
@@ -367,133 +434,116 @@ def _enforce_meal_rules(
     dinner_foods = normalize_rice_pair(dinner_foods, 3)
     return snack_foods, lunch_foods, dinner_foods
 
-def select_foods_for_target(food_list, target_calories):
-    """Select foods from a list to match target calories as closely as possible"""
-    
-    selected_foods = []
-    current_calories = 0
-    
-    # Convert food list to MealItem objects
-    meal_items = []
-    for food in food_list:
-        meal_items.append(MealItem(
-            name=food['name'], calories=food['calories'], protein=food['protein'],
-            carbs=food['carbs'], fats=food['fat'],
-            fiber=float(food.get('fiber', food.get('fibre', 0)) or 0),
-            preparation_time=20, difficulty="medium"
-        ))
-    
-    # Sort by calorie density (moderate calories first for balance)
-    meal_items.sort(key=lambda x: abs(x.calories - target_calories/2))
-    
-    # Select foods to get close to target
-    for item in meal_items:
-        if current_calories >= target_calories:
-            break
-        selected_foods.append(item)
-        current_calories += item.calories
-    
-    # If we're still short, add more items
-    if current_calories < target_calories * 0.8:
-        for item in meal_items:
-            if item not in selected_foods and current_calories < target_calories:
-                selected_foods.append(item)
-                current_calories += item.calories
-    
-    return selected_foods
+WEEK_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MEAL_SLOTS = ("breakfast", "lunch", "snacks", "dinner")
+
+# Plan horizon: weeks kept ahead per user, how far ahead requests materialize days, and the Monday
+# day indices count from (so _day_index(day) % 7 == day.weekday())
+PLAN_HORIZON_WEEKS = max(1, int(os.getenv("MEAL_PLAN_HORIZON_WEEKS", "2")))
+MAX_HORIZON_WEEKS = 8
+HORIZON_LOOKAHEAD_DAYS = 7
+HORIZON_EPOCH = date(2024, 1, 1)
+
+# Optional extras the portion optimizer may add when a meal cannot reach its targets by portions alone
+PORTION_FILLERS = {
+    "breakfast": [
+        {"name": "Sprouts", "calories": 100, "protein": 6, "carbs": 12, "fat": 2},
+        {"name": "Banana", "calories": 105, "protein": 1.3, "carbs": 27, "fat": 0.4},
+    ],
+    "lunch": [
+        {"name": "Mixed Bean Curry", "calories": 260, "protein": 14, "carbs": 28, "fat": 9},
+        {"name": "Roti", "calories": 120, "protein": 3, "carbs": 24, "fat": 1},
+    ],
+    "snacks": [
+        {"name": "Roasted Chana", "calories": 120, "protein": 7, "carbs": 18, "fat": 2},
+        {"name": "Mixed Nuts", "calories": 180, "protein": 6, "carbs": 8, "fat": 15},
+    ],
+    "dinner": [
+        {"name": "Chana Masala", "calories": 230, "protein": 11, "carbs": 30, "fat": 8},
+        {"name": "Phulka", "calories": 100, "protein": 3, "carbs": 20, "fat": 1},
+    ],
+}
+
+def _food_to_item(food: Dict[str, Any], preparation_time: int = 20, difficulty: str = "medium") -> MealItem:
+    return MealItem(
+        name=food['name'], calories=food['calories'], protein=food['protein'],
+        carbs=food['carbs'], fats=food['fat'],
+        fiber=float(food.get('fiber', food.get('fibre', 0)) or 0),
+        preparation_time=preparation_time, difficulty=difficulty
+    )
 
-def adjust_calories_to_target(breakfast_foods, lunch_foods, snack_foods, dinner_foods,
-                            target_calories, target_protein, current_calories, current_protein, 
-                            current_carbs, current_fats):
-    """Adjust meal portions to meet target calories and protein"""
-    
-    calorie_diff = target_calories - current_calories
-    protein_diff = target_protein - current_protein
-    
-    print(f"DEBUG: Calorie difference: {calorie_diff}")
-    
-    # If we need to add calories
-    if calorie_diff > 50:
-        # Add multiple high-calorie foods to meet the target
-        additional_foods = []
-        remaining_calories = calorie_diff
-        
-        while remaining_calories > 100:
-            if remaining_calories > 400:
-                # Add a substantial meal item
-                additional_foods.append(MealItem(
-                    name="Rice with Mixed Vegetable Curry", calories=350, protein=12, carbs=60, fats=8,
-                    preparation_time=25, difficulty="medium"
-                ))
-                remaining_calories -= 350
-            elif remaining_calories > 200:
-                # Add a moderate meal item
-                additional_foods.append(MealItem(
-                    name="Mixed Bean Curry", calories=260, protein=14, carbs=28, fats=9,
-                    preparation_time=30, difficulty="medium"
-                ))
-                remaining_calories -= 260
-            elif remaining_calories > 100:
-                # Add a snack
-                additional_foods.append(MealItem(
-                    name="Mixed Nuts", calories=180, protein=6, carbs=8, fats=15,
-                    preparation_time=5, difficulty="easy"
-                ))
-                remaining_calories -= 180
-            else:
-                # Add a small snack
-                additional_foods.append(MealItem(
-                    name="Banana", calories=105, protein=1.3, carbs=27, fats=0.4,
-                    preparation_time=2, difficulty="easy"
-                ))
-                remaining_calories -= 105
-        
-        # Distribute additional foods across meals
-        for i, food in enumerate(additional_foods):
-            if i % 4 == 0:
-                breakfast_foods.append(food)
-            elif i % 4 == 1:
-                lunch_foods.append(food)
-            elif i % 4 == 2:
-                snack_foods.append(food)
-            else:
-                dinner_foods.append(food)
-        
-        print(f"DEBUG: Added {len(additional_foods)} additional foods")
-    
-    # If we need to reduce calories (remove some high-calorie items)
-    elif calorie_diff < -50:
-        # Find and remove some high-calorie items
-        all_meals = breakfast_foods + lunch_foods + snack_foods + dinner_foods
-        
-        # Sort by calories (highest first)
-        sorted_meals = sorted(all_meals, key=lambda x: x.calories, reverse=True)
-        
-        # Remove items until we're close to target
-        calories_to_remove = abs(calorie_diff)
-        for meal in sorted_meals:
-            if calories_to_remove <= 0:
-                break
-            if meal.calories > 150:  # Only remove higher calorie items
-                if meal in breakfast_foods:
-                    breakfast_foods.remove(meal)
-                elif meal in lunch_foods:
-                    lunch_foods.remove(meal)
-                elif meal in snack_foods:
-                    snack_foods.remove(meal)
-                elif meal in dinner_foods:
-                    dinner_foods.remove(meal)
-                calories_to_remove -= meal.calories
-    
-    # Recalculate totals
-    all_meals = breakfast_foods + lunch_foods + snack_foods + dinner_foods
-    new_total_calories = sum(item.calories for item in all_meals)
-    new_total_protein = sum(item.protein for item in all_meals)
-    new_total_carbs = sum(item.carbs for item in all_meals)
-    new_total_fats = sum(item.fats for item in all_meals)
-    
-    print(f"DEBUG: Final calories after adjustment: {new_total_calories}")
-    return new_total_calories, new_total_protein, new_total_carbs, new_total_fats
+def _candidate(item: MealItem, optional: bool = False) -> PortionCandidate:
+    return PortionCandidate(float(item.calories), float(item.protein), float(item.carbs), float(item.fats), optional)
+
+def _scale_item(item: MealItem, multiplier: float) -> MealItem:
+    if multiplier == 1.0:
+        return item
+    return item.model_copy(update={
+        "calories": int(round(item.calories * multiplier)),
+        "protein": round(item.protein * multiplier, 1),
+        "carbs": round(item.carbs * multiplier, 1),
+        "fats": round(item.fats * multiplier, 1),
+        "fiber": round(item.fiber * multiplier, 1),
+        "portion": round(item.portion * multiplier, 2),
+    })
+
+def _rescale_serving(item: MealItem, multiplier: float) -> MealItem:
+    """The item with its listed serving rescaled; the portion stays, so repeated rescales never compound it."""
+    return _scale_item(item, multiplier).model_copy(update={"portion": item.portion})
+
+def _listed_serving(item: MealItem) -> MealItem:
+    """The item at its listed serving (portion 1.0), so portion bounds stay absolute when re-optimized."""
+    if not item.portion or item.portion == 1.0:
+        return item
+    return _scale_item(item, 1.0 / item.portion).model_copy(update={"portion": 1.0})
+
+def select_foods_for_target(food_list, target_calories, target_protein: float = 0.0):
+    """Pick which foods of a list fit the meal's calorie/protein target, at their listed serving.
+
+    Portions are left to optimize_portions, which sizes the whole day at once.
+    """
+    items = [_food_to_item(food) for food in food_list]
+    if not items:
+        return []
+    multipliers = optimize_meal([_candidate(item, optional=True) for item in items], MealTargets(target_calories, target_protein))
+    selected = [item for item, m in zip(items, multipliers) if m > 0]
+    return selected or [items[0]]
+
+def optimize_portions(
+    meals: Dict[str, List[MealItem]],
+    target_calories: float,
+    target_protein: float,
+    avoid_tokens: Optional[List[str]] = None,
+    taken: Optional[List[str]] = None,
+) -> Dict[str, List[MealItem]]:
+    """Portion each meal's items (0.5x-2x of the listed serving) and add at most the PORTION_FILLERS
+    extras to hit the day's calorie, protein and macro targets. Deterministic; a day solves in a
+    few milliseconds.
+
+    Items are re-portioned from their listed serving, so running this again on its own output
+    never compounds portions. `meals` may be a subset of the day; `taken` names the foods in its
+    other meals so no filler repeats them.
+    """
+    avoid = [a.lower() for a in (avoid_tokens or []) if a]
+    meals = {meal: [_listed_serving(item) for item in items] for meal, items in meals.items()}
+    taken = {name.strip().lower() for name in (taken or [])}
+    taken |= {item.name.strip().lower() for items in meals.values() for item in items}
+    pools: Dict[str, List[MealItem]] = {}
+    candidates: Dict[str, List[PortionCandidate]] = {}
+    for meal, items in meals.items():
+        fillers = [
+            _food_to_item(food, preparation_time=10, difficulty="easy")
+            for food in PORTION_FILLERS.get(meal, [])
+            if food["name"].lower() not in taken and not any(tok in food["name"].lower() for tok in avoid)
+        ]
+        pools[meal] = list(items) + fillers
+        candidates[meal] = [_candidate(item) for item in items] + [_candidate(item, optional=True) for item in fillers]
+
+    multipliers = optimize_day(candidates, day_targets(target_calories, target_protein))
+    return {
+        meal: [_scale_item(item, m) for item, m in zip(pools[meal], multipliers[meal]) if m > 0]
+        for meal in meals
+    }
 
 def generate_daily_meals(
     target_calories: int,
@@ -508,6 +558,35 @@ def generate_daily_meals(
     recent_foods: Optional[List[str]] = None
 ) -> DailyMealPlan:
     """Generate meals for a single day using personalized nutrition recommendations"""
+    slots, avoid_tokens = build_day_slots(
+        target_calories, target_protein, diet_type, diseases, allergies, day_index,
+        personalized_recommendations, user_context, report_context, recent_foods
+    )
+    return finish_day(slots, target_calories, target_protein, avoid_tokens)
+
+def _avoid_tokens(allergies: List[str], diseases: List[str], report_context: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Allergies merged with the report's and the diseases' avoid cues: foods a plan must never hold."""
+    report_avoid = [str(x).strip() for x in (report_context or {}).get("avoid", []) if str(x).strip()]
+    disease_recs = logic.get_disease_recommendations(diseases or []) if diseases else {"consume": [], "avoid": []}
+    return _dedupe_keep_order(allergies + report_avoid + [str(x) for x in (disease_recs.get("avoid", []) or []) if str(x).strip()])
+
+def build_day_slots(
+    target_calories: int,
+    target_protein: float,
+    diet_type: str,
+    diseases: List[str],
+    allergies: List[str],
+    day_index: int = 0,
+    personalized_recommendations: Optional[List[Any]] = None,
+    user_context: Optional[Dict[str, Any]] = None,
+    report_context: Optional[Dict[str, Any]] = None,
+    recent_foods: Optional[List[str]] = None
+) -> Tuple[Dict[str, List[MealItem]], List[str]]:
+    """A day's meal slots before the portion optimizer, plus the merged avoid tokens.
+
+    These are the per-slot inputs of a plan: finish_day turns them into the day's plan, and
+    incremental regeneration re-runs only the slots a profile change touches.
+    """
     effective_allergies: List[str] = []
 
     try:
@@ -519,7 +598,7 @@ def generate_daily_meals(
         report_avoid = [str(x).strip() for x in report_context.get("avoid", []) if str(x).strip()]
         report_consume = [str(x).strip() for x in report_context.get("consume", []) if str(x).strip()]
         disease_recs = logic.get_disease_recommendations(diseases or []) if diseases else {"consume": [], "avoid": []}
-        effective_allergies = _dedupe_keep_order(allergies + report_avoid + [str(x) for x in (disease_recs.get("avoid", []) or []) if str(x).strip()])
+        effective_allergies = _avoid_tokens(allergies, diseases, report_context)
         effective_consume = _dedupe_keep_order(report_consume + [str(x) for x in (disease_recs.get("consume", []) or []) if str(x).strip()])
 
         # Get personalized food recommendations from the existing nutrition system
@@ -542,13 +621,11 @@ def generate_daily_meals(
             "water_consumption_l": user_context.get("water_consumption_l", 2.5)
         }
         
-        # Generate recommendations using the existing logic
-        recommendations = logic.generate_recommendations(user_data)
-        diet_recommendations = recommendations.get("diet", [])
-        
-        # If personalized recommendations are provided, use them
+        # Personalized recommendations when provided, else generate them with the existing logic
         if personalized_recommendations:
             diet_recommendations = personalized_recommendations
+        else:
+            diet_recommendations = logic.generate_recommendations(user_data).get("diet", [])
 
         # Improve day-to-day diversity while preserving safety constraints.
         recent_tokens = {str(x).strip().lower() for x in (recent_foods or []) if str(x).strip()}
@@ -606,9 +683,11 @@ def generate_daily_meals(
         
         # Distribute personalized recommendations by their intended meal_type first.
         for i, meal in enumerate(diet_recommendations):
+            # "calories" is the food's kcal per 100 g; the macros are already per serving
+            serving_g = float(meal.get("serving_g", 100) or 100)
             meal_item = MealItem(
                 name=meal.get("food_name", "Unknown Food"),
-                calories=int(meal.get("calories", 0)),
+                calories=int(round(float(meal.get("calories", 0) or 0) * serving_g / 100.0)),
                 protein=float(meal.get("protein_g", 0)),
                 carbs=float(meal.get("carbs_g", 0)),
                 fats=float(meal.get("fat_g", 0)),
@@ -702,10 +781,10 @@ def generate_daily_meals(
             dinner_target = int(target_calories * 0.30)    # 30% for dinner
             
             # Select foods to match meal targets
-            breakfast_foods = select_foods_for_target(indian_foods['breakfast'], breakfast_target)
-            lunch_foods = select_foods_for_target(indian_foods['lunch'], lunch_target)
-            snack_foods = select_foods_for_target(indian_foods['snacks'], snack_target)
-            dinner_foods = select_foods_for_target(indian_foods['dinner'], dinner_target)
+            breakfast_foods = select_foods_for_target(indian_foods['breakfast'], breakfast_target, target_protein * 0.25)
+            lunch_foods = select_foods_for_target(indian_foods['lunch'], lunch_target, target_protein * 0.35)
+            snack_foods = select_foods_for_target(indian_foods['snacks'], snack_target, target_protein * 0.10)
+            dinner_foods = select_foods_for_target(indian_foods['dinner'], dinner_target, target_protein * 0.30)
         
         # Filter foods based on diet type
         if diet_type.lower() == 'vegetarian':
@@ -758,33 +837,7 @@ def generate_daily_meals(
         day_index, snack_foods, lunch_foods, dinner_foods
     )
     
-    # Calculate totals
-    all_meals = breakfast_foods + lunch_foods + snack_foods + dinner_foods
-    total_calories = sum(item.calories for item in all_meals)
-    total_protein = sum(item.protein for item in all_meals)
-    total_carbs = sum(item.carbs for item in all_meals)
-    total_fats = sum(item.fats for item in all_meals)
-    
-    # Debug logging
-    print(f"DEBUG: Target calories: {target_calories}, Current calories: {total_calories}")
-    print(f"DEBUG: Meal counts - Breakfast: {len(breakfast_foods)}, Lunch: {len(lunch_foods)}, Snacks: {len(snack_foods)}, Dinner: {len(dinner_foods)}")
-    
-    # Adjust calories to meet target if needed
-    if abs(total_calories - target_calories) > 100:  # If off by more than 100 calories
-        print(f"DEBUG: Adjusting calories - difference: {target_calories - total_calories}")
-        total_calories, total_protein, total_carbs, total_fats = adjust_calories_to_target(
-            breakfast_foods, lunch_foods, snack_foods, dinner_foods,
-            target_calories, target_protein, total_calories, total_protein, total_carbs, total_fats
-        )
-        print(f"DEBUG: After adjustment - calories: {total_calories}")
-    else:
-        print(f"DEBUG: No adjustment needed - calories are within range")
-
-    # Re-apply strict meal rules after calorie adjustment.
-    snack_foods, lunch_foods, dinner_foods = _enforce_meal_rules(
-        day_index, snack_foods, lunch_foods, dinner_foods
-    )
-    # Re-apply merged avoid filters after adjustment so blocked foods never leak back.
+    # Re-apply merged avoid filters after the meal rules so blocked foods never leak back.
     if effective_allergies:
         avoid_tokens = [a.lower() for a in effective_allergies]
         breakfast_foods = [m for m in breakfast_foods if not any(tok in m.name.lower() for tok in avoid_tokens)]
@@ -803,27 +856,41 @@ def generate_daily_meals(
             seen_foods.add(k)
             out.append(it)
         return out
-    breakfast_foods = _dedupe(breakfast_foods)
-    lunch_foods = _dedupe(lunch_foods)
-    snack_foods = _dedupe(snack_foods)
-    dinner_foods = _dedupe(dinner_foods)
-    all_meals = breakfast_foods + lunch_foods + snack_foods + dinner_foods
-    total_calories = sum(item.calories for item in all_meals)
-    total_protein = sum(item.protein for item in all_meals)
-    total_carbs = sum(item.carbs for item in all_meals)
-    total_fats = sum(item.fats for item in all_meals)
-    
-    return DailyMealPlan(
+    slots = {
+        "breakfast": _dedupe(breakfast_foods),
+        "lunch": _dedupe(lunch_foods),
+        "snacks": _dedupe(snack_foods),
+        "dinner": _dedupe(dinner_foods),
+    }
+    return slots, effective_allergies
+
+def _day_totals(day_plan: DailyMealPlan) -> DailyMealPlan:
+    all_meals = [item for meal in MEAL_SLOTS for item in getattr(day_plan, meal)]
+    day_plan.total_calories = sum(item.calories for item in all_meals)
+    day_plan.total_protein = sum(item.protein for item in all_meals)
+    day_plan.total_carbs = sum(item.carbs for item in all_meals)
+    day_plan.total_fats = sum(item.fats for item in all_meals)
+    return day_plan
+
+def finish_day(
+    slots: Dict[str, List[MealItem]],
+    target_calories: float,
+    target_protein: float,
+    avoid_tokens: Optional[List[str]] = None,
+) -> DailyMealPlan:
+    """Portions (and at most a couple of extras) toward the day's calorie/protein/macro targets."""
+    optimized = optimize_portions(slots, target_calories, target_protein, avoid_tokens)
+    return _day_totals(DailyMealPlan(
         day="",
-        breakfast=breakfast_foods,
-        lunch=lunch_foods,
-        snacks=snack_foods,
-        dinner=dinner_foods,
-        total_calories=total_calories,
-        total_protein=total_protein,
-        total_carbs=total_carbs,
-        total_fats=total_fats
-    )
+        breakfast=optimized["breakfast"],
+        lunch=optimized["lunch"],
+        snacks=optimized["snacks"],
+        dinner=optimized["dinner"],
+        total_calories=0,
+        total_protein=0.0,
+        total_carbs=0.0,
+        total_fats=0.0
+    ))
 
 def get_indian_food_supplements(day_index: int, diet_type: str) -> dict:
     """Get Indian food supplements to complement personalized recommendations"""
@@ -1012,9 +1079,8 @@ def get_indian_food_variety(day_index: int, diet_type: str) -> dict:
     
     return food_varieties.get(day_index % 7, food_varieties[0])
 
-def generate_weekly_plan(profile_data: Dict, latest_report: Optional[Report] = None) -> WeeklyMealPlan:
-    """Generate a complete weekly meal plan using personalized recommendations"""
-    
+def _plan_context(profile_data: Dict, latest_report: Optional[Report] = None) -> Dict[str, Any]:
+    """Recommendation context and daily targets of a profile (+ latest report)."""
     # Extract profile data
     weight_kg = profile_data.get('weight_kg', 70)
     height_cm = profile_data.get('height_cm', 170)
@@ -1068,62 +1134,75 @@ def generate_weekly_plan(profile_data: Dict, latest_report: Optional[Report] = N
         "water_consumption_l": profile_data.get("water_consumption_l", 2.5)
     }
 
-    # Generate personalized recommendations from Indian + disease dataset logic
-    recommendations = logic.generate_recommendations(user_data)
-    personalized_recommendations = recommendations.get("diet", [])
-    
-    # Calculate daily calorie and protein targets
-    daily_calories = logic.daily_calorie_target(weight_kg, height_cm, lifestyle_level, motive, age, gender)
-    daily_protein = logic.daily_protein_target(weight_kg, motive, lifestyle_level, age)
-    
-    # Create meals for each day of the week
-    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    meals = {}
-    recent_foods: List[str] = []
-    
-    for day in days:
+    return {
+        "user_data": user_data,
+        "diet_type": diet_type,
+        "diseases": diseases_list,
+        "allergies": allergies_list,
+        "report_ctx": report_ctx,
+        "weight_kg": weight_kg,
         # Keep each day aligned to the user's daily target
-        day_calories = int(daily_calories)
-        day_protein = daily_protein
-
-        # Generate daily meals with personalized recommendations
-        daily_plan = generate_daily_meals(
-            day_calories,
-            day_protein,
-            diet_type,
-            diseases_list,
-            allergies_list,
-            days.index(day),  # Pass day index for variety
-            personalized_recommendations,  # Pass personalized recommendations
-            user_context=user_data,
-            report_context=report_ctx,
-            recent_foods=recent_foods
-        )
-        daily_plan.day = day
-        meals[day] = daily_plan
+        "daily_calories": int(logic.daily_calorie_target(weight_kg, height_cm, lifestyle_level, motive, age, gender)),
+        "daily_protein": logic.daily_protein_target(weight_kg, motive, lifestyle_level, age),
+    }
 
-        # Track recent foods to reduce repetition in subsequent days.
-        day_foods = [
-            *(m.name for m in daily_plan.breakfast),
-            *(m.name for m in daily_plan.lunch),
-            *(m.name for m in daily_plan.snacks),
-            *(m.name for m in daily_plan.dinner),
-        ]
-        recent_foods.extend([str(x).strip().lower() for x in day_foods if str(x).strip()])
-        if len(recent_foods) > 24:
-            recent_foods = recent_foods[-24:]
-    
-    # Calculate weekly totals
-    weekly_calories = sum(plan.total_calories for plan in meals.values())
-    weekly_protein = sum(plan.total_protein for plan in meals.values())
-    weekly_carbs = sum(plan.total_carbs for plan in meals.values())
-    weekly_fats = sum(plan.total_fats for plan in meals.values())
+def _plan_foods(plan: DailyMealPlan) -> List[str]:
+    return [item.name for meal in MEAL_SLOTS for item in getattr(plan, meal)]
+
+def _recent_foods(
+    previous_days: List[DailyMealPlan],
+    same_day_last_week: Optional[DailyMealPlan] = None,
+    limit: int = 24,
+) -> List[str]:
+    """Foods to push back in the next day's order: the last `limit` foods of the days planned so far
+    (latest last), plus everything the same weekday had a week earlier (cross-week variety)."""
+    names = [name for plan in previous_days for name in _plan_foods(plan)]
+    recent = [str(x).strip().lower() for x in names if str(x).strip()][-limit:]
+    if same_day_last_week is not None:
+        recent += [str(x).strip().lower() for x in _plan_foods(same_day_last_week) if str(x).strip()]
+    return recent
+
+def _day_slots(
+    ctx: Dict[str, Any],
+    day: date,
+    recommendations: List[Dict[str, Any]],
+    previous_days: List[DailyMealPlan],
+    same_day_last_week: Optional[DailyMealPlan] = None,
+):
+    return build_day_slots(
+        ctx["daily_calories"],
+        ctx["daily_protein"],
+        ctx["diet_type"],
+        ctx["diseases"],
+        ctx["allergies"],
+        _day_index(day),  # Pass day index for variety
+        recommendations,  # Pass personalized recommendations
+        user_context=ctx["user_data"],
+        report_context=ctx["report_ctx"],
+        recent_foods=_recent_foods(previous_days, same_day_last_week)
+    )
+
+def _assemble_weekly_plan(
+    meals: Dict[str, DailyMealPlan],
+    ctx: Dict[str, Any],
+    personalized_items: int,
+    week_start: Optional[date] = None,
+) -> WeeklyMealPlan:
+    # Daily and weekly totals from the nutrient matrix
+    daily_profiles = _daily_nutrient_profiles(list(meals.values()))
+    for plan, vector in zip(meals.values(), daily_profiles):
+        plan.nutrients = profile_dict(vector)
+        plan.total_calories = int(round(vector[0]))
+        plan.total_protein, plan.total_carbs, plan.total_fats = (float(v) for v in vector[1:4])
+    weekly_vector = daily_profiles.sum(axis=0)
+    weekly_calories = int(round(weekly_vector[0]))
+    weekly_protein, weekly_carbs, weekly_fats = (float(v) for v in weekly_vector[1:4])
     
     # Calculate week dates
-    today = date.today()
-    start_of_week = today - timedelta(days=today.weekday())
+    start_of_week = week_start or _week_start()
     end_of_week = start_of_week + timedelta(days=6)
     
+    report_ctx = ctx["report_ctx"]
     return WeeklyMealPlan(
         week_start=start_of_week,
         week_end=end_of_week,
@@ -1132,11 +1211,346 @@ def generate_weekly_plan(profile_data: Dict, latest_report: Optional[Report] = N
         weekly_protein=weekly_protein,
         weekly_carbs=weekly_carbs,
         weekly_fats=weekly_fats,
-        based_on_weight=weight_kg,
+        weekly_nutrients=profile_dict(weekly_vector),
+        based_on_weight=ctx["weight_kg"],
         based_on_health_report=report_ctx.get("summary_text") if report_ctx.get("summary_text") else None,
         last_updated=datetime.now(),
-        personalized_items=len(personalized_recommendations)
+        personalized_items=personalized_items
+    )
+
+def build_weekly_plan(
+    profile_data: Dict,
+    latest_report: Optional[Report] = None,
+    week_start: Optional[date] = None,
+) -> Tuple[WeeklyMealPlan, WeeklyPlanInputs]:
+    """Full weekly plan plus the per-slot inputs it was built from."""
+    ctx = _plan_context(profile_data, latest_report)
+    week_start = week_start or _week_start()
+
+    # Generate personalized recommendations from Indian + disease dataset logic
+    result = logic.generate_recommendations(ctx["user_data"])
+    recommendations = result.get("diet", [])
+    alternatives = [plan.get("plan_meals", []) for plan in result.get("alternative_meal_plans", [])]
+
+    # Create meals for each day of the week; recent foods reduce repetition in later days
+    meals: Dict[str, DailyMealPlan] = {}
+    slots: Dict[str, Dict[str, List[MealItem]]] = {}
+    avoid_tokens: List[str] = []
+    for offset, day in enumerate(WEEK_DAYS):
+        slots[day], avoid_tokens = _day_slots(ctx, week_start + timedelta(days=offset), recommendations, list(meals.values()))
+        daily_plan = finish_day(slots[day], ctx["daily_calories"], ctx["daily_protein"], avoid_tokens)
+        daily_plan.day = day
+        meals[day] = daily_plan
+
+    inputs = WeeklyPlanInputs(
+        week_start=week_start,
+        daily_calories=ctx["daily_calories"],
+        daily_protein=ctx["daily_protein"],
+        avoid_tokens=avoid_tokens,
+        recommendations=recommendations,
+        alternatives=alternatives,
+        slots=slots,
     )
+    return _assemble_weekly_plan(meals, ctx, len(recommendations), week_start), inputs
+
+def generate_weekly_plan(profile_data: Dict, latest_report: Optional[Report] = None) -> WeeklyMealPlan:
+    """Generate a complete weekly meal plan using personalized recommendations"""
+    return build_weekly_plan(profile_data, latest_report)[0]
+
+def _change_scope(old_signature: Optional[str], new_signature: str) -> Optional[Tuple[str, ...]]:
+    """What a profile change touches: ("portions",) for a weight change within the same BMI category,
+    ("allergies",) for an allergy change, ("meal", <meal>) for one meal preference; None = rebuild."""
+    try:
+        old, new = json.loads(old_signature or ""), json.loads(new_signature)
+    except (TypeError, ValueError):
+        return None
+    changed = {k for k in set(old) | set(new) if old.get(k) != new.get(k)}
+    if len(changed) != 1:
+        return None
+    field = next(iter(changed))
+    if field == "weight_kg":
+        height, weights = _to_float(new.get("height_cm")), (_to_float(old.get("weight_kg")), _to_float(new.get("weight_kg")))
+        if not height or None in weights:
+            return None
+        categories = {calculate_bmi_category(logic.compute_bmi(height, w)) for w in weights}
+        return ("portions",) if len(categories) == 1 else None
+    if field == "food_allergies":
+        return ("allergies",)
+    if field in MEAL_SLOTS:
+        return ("meal", field)
+    return None
+
+def _meal_rank(rec: Dict[str, Any]) -> int:
+    meal_type = str(rec.get("meal_type", "")).strip().lower()
+    meal_type = "snacks" if meal_type == "snack" else meal_type
+    return MEAL_SLOTS.index(meal_type) if meal_type in MEAL_SLOTS else len(MEAL_SLOTS)
+
+def update_weekly_plan(
+    previous: WeeklyMealPlan,
+    inputs: WeeklyPlanInputs,
+    scope: Tuple[str, ...],
+    profile_data: Dict,
+    latest_report: Optional[Report] = None,
+) -> Tuple[WeeklyMealPlan, WeeklyPlanInputs]:
+    """Regenerate only what a `_change_scope` touches, reusing the previous plan's per-slot inputs.
+
+    portions: every slot is rescaled to the new calorie target and re-portioned; foods stay.
+    allergies: only slots holding a food that matches an allergy are rebuilt.
+    meal: that meal is rebuilt on every day from fresh recommendations; other meals stay.
+    """
+    ctx = _plan_context(profile_data, latest_report)
+    target_calories, target_protein = ctx["daily_calories"], ctx["daily_protein"]
+    meals: Dict[str, DailyMealPlan] = {}
+    slots: Dict[str, Dict[str, List[MealItem]]] = {}
+    # Rebuilt every time: the stored tokens predate this change and may miss a new allergy
+    avoid_tokens = _avoid_tokens(ctx["allergies"], ctx["diseases"], ctx["report_ctx"])
+    recommendations = inputs.recommendations
+    alternatives = inputs.alternatives
+
+    if scope[0] == "portions":
+        ratio = target_calories / inputs.daily_calories if inputs.daily_calories else 1.0
+        recommendations = [logic.scale_plan_item(rec, ratio) for rec in recommendations]
+        alternatives = [[logic.scale_plan_item(rec, ratio) for rec in plan] for plan in alternatives]
+        for day in WEEK_DAYS:
+            slots[day] = {meal: [_rescale_serving(item, ratio) for item in items] for meal, items in inputs.slots[day].items()}
+            meals[day] = finish_day(slots[day], target_calories, target_protein, avoid_tokens)
+            meals[day].day = day
+    else:
+        if scope[0] == "meal":
+            # Only this meal's recommendation is recomputed; like the full pipeline, it excludes the
+            # foods picked for the meals before it
+            rank = MEAL_SLOTS.index(scope[1])
+            earlier = [str(r.get("food_name", "")) for r in recommendations if _meal_rank(r) < rank]
+            # Alternatives for this meal were picked for the old preference; later weeks keep the new pick
+            alternatives = [[r for r in plan if _meal_rank(r) != rank] for plan in alternatives]
+            recommendations = sorted(
+                [r for r in recommendations if _meal_rank(r) != rank]
+                + logic.recommend_meal(ctx["user_data"], scope[1], earlier),
+                key=_meal_rank,
+            )
+        allergy_tokens = [a.lower() for a in ctx["allergies"]]
+        for offset, day in enumerate(WEEK_DAYS):
+            old_plan = previous.meals[day].model_copy()
+            slots[day] = dict(inputs.slots[day])
+            if scope[0] == "meal":
+                touched = [scope[1]]
+            else:
+                touched = [
+                    meal for meal in MEAL_SLOTS
+                    if any(tok in item.name.lower() for item in [*getattr(old_plan, meal), *slots[day][meal]] for tok in allergy_tokens)
+                ]
+            if not touched:
+                meals[day] = old_plan
+                continue
+            fresh_slots, _ = _day_slots(ctx, inputs.week_start + timedelta(days=offset), recommendations, list(meals.values()))
+            kept = [item.name for meal in MEAL_SLOTS if meal not in touched for item in getattr(old_plan, meal)]
+            kept_keys = {name.strip().lower() for name in kept}
+            for meal in touched:
+                slots[day][meal] = [i for i in fresh_slots[meal] if i.name.strip().lower() not in kept_keys] or fresh_slots[meal]
+            optimized = optimize_portions(
+                {meal: slots[day][meal] for meal in touched}, target_calories, target_protein, avoid_tokens, taken=kept
+            )
+            meals[day] = _day_totals(old_plan.model_copy(update=optimized))
+
+    new_inputs = WeeklyPlanInputs(
+        week_start=inputs.week_start,
+        daily_calories=target_calories,
+        daily_protein=target_protein,
+        avoid_tokens=avoid_tokens,
+        recommendations=recommendations,
+        alternatives=alternatives,
+        slots=slots,
+    )
+    return _assemble_weekly_plan(meals, ctx, len(recommendations), inputs.week_start), new_inputs
+
+
+class PlanHorizon:
+    """Rolling multi-week meal plan of one user + plan signature.
+
+    The window starts at the current week's Monday and spans `weeks` weeks. Days are materialized
+    lazily and in date order, since a day's variety depends on the days before it and on the same
+    weekday a week earlier. Rolling the window to a new week drops the past days, so only days that
+    were never materialized get computed. Recommendations are generated once per horizon: the base
+    week uses the main picks and each later week the next alternative daily plan.
+    """
+
+    def __init__(
+        self,
+        ctx: Dict[str, Any],
+        recommendations: List[Dict[str, Any]],
+        alternatives: Optional[List[List[Dict[str, Any]]]] = None,
+        weeks: int = PLAN_HORIZON_WEEKS,
+        base_week: Optional[date] = None,
+    ):
+        self.ctx = ctx
+        self.recommendations = recommendations
+        self.alternatives = alternatives or []
+        self.weeks = min(max(1, weeks), MAX_HORIZON_WEEKS)
+        self.base_week = base_week or _week_start()
+        self.start = self.base_week
+        self.avoid_tokens: List[str] = []
+        self.days: Dict[date, DailyMealPlan] = {}
+        self.slots: Dict[date, Dict[str, List[MealItem]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_week(cls, ctx: Dict[str, Any], plan: WeeklyMealPlan, inputs: WeeklyPlanInputs, weeks: int = PLAN_HORIZON_WEEKS) -> "PlanHorizon":
+        """Seed a horizon with an already built week (its days are not recomputed)."""
+        horizon = cls(ctx, inputs.recommendations, inputs.alternatives, weeks, inputs.week_start)
+        horizon.avoid_tokens = list(inputs.avoid_tokens)
+        for offset, name in enumerate(WEEK_DAYS):
+            if name in plan.meals and name in inputs.slots:
+                day = inputs.week_start + timedelta(days=offset)
+                horizon.days[day] = plan.meals[name]
+                horizon.slots[day] = inputs.slots[name]
+        return horizon
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=7 * self.weeks - 1)
+
+    def roll(self, today: Optional[date] = None) -> int:
+        """Move the window to the current week; returns the number of past days dropped."""
+        with self._lock:
+            start = _week_start(today)
+            if start <= self.start:
+                return 0
+            self.start = start
+            past = [day for day in self.days if day < start]
+            for day in past:
+                del self.days[day]
+                self.slots.pop(day, None)
+            return len(past)
+
+    def pending(self, until: date) -> int:
+        """Days from the window start through `until` (at most the window end) not materialized yet."""
+        days = (min(until, self.end) - self.start).days + 1
+        return sum(1 for offset in range(max(days, 0)) if self.start + timedelta(days=offset) not in self.days)
+
+    def materialize(self, until: date) -> int:
+        """Compute the missing days from the window start through `until` (at most the window end)."""
+        computed = 0
+        with self._lock:
+            day, until = self.start, min(until, self.end)
+            while day <= until:
+                if day not in self.days:
+                    self._compute_day(day)
+                    computed += 1
+                day += timedelta(days=1)
+        return computed
+
+    def week_recommendations(self, week_start: date) -> List[Dict[str, Any]]:
+        """Main picks in the base week; later weeks take each meal from the next alternative daily plan
+        unless that plan lacks the meal or its food hits an avoid token."""
+        offset = (week_start - self.base_week).days // 7
+        if offset <= 0 or not self.alternatives:
+            return self.recommendations
+        avoid = [tok.lower() for tok in self.avoid_tokens + self.ctx["allergies"] if tok]
+        alternative = {
+            _meal_rank(rec): rec
+            for rec in self.alternatives[(offset - 1) % len(self.alternatives)]
+            if not any(tok in str(rec.get("food_name", "")).lower() for tok in avoid)
+        }
+        return [alternative.get(_meal_rank(rec), rec) for rec in self.recommendations]
+
+    def _compute_day(self, day: date) -> None:
+        previous_days = [self.days[d] for d in sorted(self.days) if d < day]
+        slots, self.avoid_tokens = _day_slots(
+            self.ctx, day, self.week_recommendations(_week_start(day)), previous_days,
+            self.days.get(day - timedelta(days=7))
+        )
+        daily_plan = finish_day(slots, self.ctx["daily_calories"], self.ctx["daily_protein"], self.avoid_tokens)
+        daily_plan.day = WEEK_DAYS[day.weekday()]
+        self.days[day] = daily_plan
+        self.slots[day] = slots
+
+    def week(self, week_start: date) -> Tuple[WeeklyMealPlan, WeeklyPlanInputs]:
+        """One week of the window (materialized on demand) as a plan plus its per-slot inputs."""
+        self.materialize(week_start + timedelta(days=6))
+        dates = [week_start + timedelta(days=offset) for offset in range(7)]
+        meals = {WEEK_DAYS[d.weekday()]: self.days[d].model_copy() for d in dates}
+        recommendations = self.week_recommendations(week_start)
+        inputs = WeeklyPlanInputs(
+            week_start=week_start,
+            daily_calories=self.ctx["daily_calories"],
+            daily_protein=self.ctx["daily_protein"],
+            avoid_tokens=self.avoid_tokens,
+            recommendations=recommendations,
+            alternatives=self.alternatives,
+            slots={WEEK_DAYS[d.weekday()]: self.slots[d] for d in dates},
+        )
+        return _assemble_weekly_plan(meals, self.ctx, len(recommendations), week_start), inputs
+
+    def weeks_ahead(self, count: int) -> List[WeeklyMealPlan]:
+        """The first `count` weeks from the window start. Weeks past the window are computed on a
+        scratch copy and not kept, so one long request never widens what the horizon holds."""
+        count = min(max(1, count), MAX_HORIZON_WEEKS)
+        plans = [self.week(self.start + timedelta(days=7 * i))[0] for i in range(min(count, self.weeks))]
+        if count > self.weeks:
+            with self._lock:
+                scratch = PlanHorizon(self.ctx, self.recommendations, self.alternatives, count, self.base_week)
+                scratch.start = self.start
+                scratch.avoid_tokens = list(self.avoid_tokens)
+                scratch.days, scratch.slots = dict(self.days), dict(self.slots)
+            plans += [scratch.week(self.start + timedelta(days=7 * i))[0] for i in range(self.weeks, count)]
+        return plans
+
+def _generate_and_store(
+    plan_key: str,
+    signature: str,
+    profile_data: Dict,
+    latest_report: Optional[Report],
+    incremental: bool = True,
+) -> WeeklyMealPlan:
+    week_start = _week_start()
+    previous = weekly_plans.get(plan_key) or _previous_plans.get(plan_key)
+    new_plan: Optional[WeeklyMealPlan] = None
+    inputs: Optional[WeeklyPlanInputs] = None
+
+    # A partial profile change regenerates only the slots it touches
+    if incremental and isinstance(previous, dict) and previous.get("inputs") is not None \
+            and previous["inputs"].week_start == week_start:
+        scope = _change_scope(previous.get("signature"), signature)
+        if scope:
+            new_plan, inputs = update_weekly_plan(previous["plan"], previous["inputs"], scope, profile_data, latest_report)
+            print(f"✓ Weekly plan {plan_key} regenerated incrementally ({scope[0]})")
+
+    if new_plan is None:
+        # Generation is deterministic, so a plan stored under the same inputs + week by any worker is reused
+        content_key = plan_store.content_key("weekly_meal", signature, week_start.isoformat())
+        inputs_key = plan_store.content_key("weekly_meal_inputs", signature, week_start.isoformat())
+        payload = plan_store.get(content_key)
+        if payload is not None:
+            new_plan = WeeklyMealPlan.model_validate_json(payload)
+            inputs_payload = plan_store.get(inputs_key)
+            inputs = WeeklyPlanInputs.model_validate_json(inputs_payload) if inputs_payload is not None else None
+        else:
+            new_plan, inputs = build_weekly_plan(profile_data, latest_report)
+            plan_store.put(content_key, "weekly_meal", new_plan.model_dump_json())
+            plan_store.put(inputs_key, "weekly_meal_inputs", inputs.model_dump_json())
+
+    horizon = None
+    if inputs is not None:
+        horizon = PlanHorizon.from_week(_plan_context(profile_data, latest_report), new_plan, inputs)
+    weekly_plans[plan_key] = {
+        "plan": new_plan,
+        "signature": signature,
+        "inputs": inputs,
+        "horizon": horizon,
+    }
+    _previous_plans.pop(plan_key, None)
+    return new_plan
+
+def _roll_plan(plan_key: str) -> WeeklyMealPlan:
+    """Roll a cached plan's horizon to the current week; only never-materialized days are computed."""
+    entry = weekly_plans[plan_key]
+    horizon: PlanHorizon = entry["horizon"]
+    dropped = horizon.roll()
+    computed = horizon.materialize(horizon.start + timedelta(days=6))
+    plan, inputs = horizon.week(horizon.start)
+    entry["plan"], entry["inputs"] = plan, inputs
+    print(f"✓ Weekly plan {plan_key} rolled to {horizon.start}: {dropped} past days dropped, {computed} days computed")
+    return plan
 
 @router.get("/weekly-plan")
 async def get_weekly_meal_plan(
@@ -1205,29 +1619,75 @@ async def get_weekly_meal_plan(
             except Exception:
                 should_update = False
 
+        # A new week rolls the plan horizon forward instead of regenerating from scratch
+        horizon = cached_entry.get("horizon") if isinstance(cached_entry, dict) else None
+        rolled = False
+        if not should_update and cached_plan.week_start != _week_start():
+            if horizon is not None:
+                cached_plan = await _plan_flights.run((plan_key, latest_signature, "roll"), _roll_plan, plan_key)
+                rolled = True
+            else:
+                should_update = True
+
         if should_update:
-            # Generate new plan
-            new_plan = generate_weekly_plan(profile_data, latest_report)
-            weekly_plans[plan_key] = {
-                "plan": new_plan,
-                "signature": latest_signature
-            }
-            
-            return {
+            # Generate new plan (joined by concurrent callers with the same signature)
+            new_plan = await _plan_flights.run(
+                (plan_key, latest_signature, force_refresh), _generate_and_store,
+                plan_key, latest_signature, profile_data, latest_report, not force_refresh
+            )
+            response = {
                 "weekly_plan": new_plan,
                 "message": "New meal plan generated!",
                 "is_fresh": True
             }
         else:
-            return {
+            response = {
                 "weekly_plan": cached_plan,
-                "message": "Using existing meal plan (no significant health changes detected)",
-                "is_fresh": False
+                "message": "Rolled meal plan forward to the new week" if rolled
+                else "Using existing meal plan (no significant health changes detected)",
+                "is_fresh": rolled
             }
+
+        # Keep the next days materialized a little at a time, so the week rollover finds them ready
+        entry = weekly_plans.get(plan_key)
+        horizon = entry.get("horizon") if isinstance(entry, dict) else None
+        lookahead = date.today() + timedelta(days=HORIZON_LOOKAHEAD_DAYS)
+        if horizon is not None and horizon.pending(lookahead):
+            await _plan_flights.run((plan_key, latest_signature, "lookahead"), horizon.materialize, lookahead)
+        return response
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating meal plan: {str(e)}")
 
+@router.get("/horizon")
+async def get_meal_plan_horizon(
+    weeks: int = PLAN_HORIZON_WEEKS,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    """Get the upcoming weeks of the rolling meal plan (future days are computed on first request)"""
+    try:
+        await get_weekly_meal_plan(False, db, user)
+        plan_key = f"user:{user.id}"
+        entry = weekly_plans.get(plan_key)
+        horizon = entry.get("horizon") if isinstance(entry, dict) else None
+        if horizon is None:
+            raise HTTPException(status_code=404, detail="No meal plan horizon available")
+
+        weeks = min(max(1, weeks), MAX_HORIZON_WEEKS)
+        plans = await _plan_flights.run((plan_key, entry.get("signature"), "horizon", weeks), horizon.weeks_ahead, weeks)
+        return {
+            "weeks": plans,
+            "window_start": horizon.start,
+            "window_end": horizon.end,
+            "materialized_days": len(horizon.days)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting meal plan horizon: {str(e)}")
+
 @router.get("/daily/{day}")
 async def get_daily_meal_plan(
     day: str,  # Monday, Tuesday, etc.
@@ -1325,6 +1785,8 @@ async def get_nutrition_summary(
                 "carbs": round(daily_avg_carbs, 1),
                 "fats": round(daily_avg_fats, 1)
             },
+            "weekly_nutrients": weekly_plan.weekly_nutrients,
+            "daily_average_nutrients": {k: round(v / 7, 1) for k, v in weekly_plan.weekly_nutrients.items()},
             "based_on": {
                 "weight_kg": weekly_plan.based_on_weight,
                 "health_report": weekly_plan.based_on_health_report,
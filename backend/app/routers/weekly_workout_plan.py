@@ -4,8 +4,10 @@ from pydantic import BaseModel
 from typing import List, Dict, Optional
 from datetime import date, datetime, timedelta
 from ..deps import get_db, get_current_user
-from ..models import Profile, Report, WorkoutDailyLog
+from ..models import Profile, Report
+from .adherence import get_adherence_metrics
 from .. import logic
+from ..single_flight import SingleFlight
 import json
 
 router = APIRouter()
@@ -44,6 +46,16 @@ class WeeklyWorkoutPlan(BaseModel):
 
 # In-memory storage for demo (use database in production)
 weekly_workout_plans = {}
+# Concurrent requests for the same user + profile inputs share one generation
+_plan_flights = SingleFlight()
+
+def _generate_and_store(plan_key: str, profile_data: Dict) -> WeeklyWorkoutPlan:
+    new_plan = generate_weekly_workout_plan(profile_data)
+    weekly_workout_plans[plan_key] = new_plan
+    return new_plan
+
+def _profile_signature(profile_data: Dict) -> str:
+    return json.dumps(profile_data, sort_keys=True, default=str)
 
 def _split_csv(value: Optional[str]) -> List[str]:
     if not value:
@@ -419,20 +431,7 @@ async def get_weekly_workout_plan(
                 .first()
             )
             report_injuries = _extract_report_injuries(getattr(latest_report, "summary", "") if latest_report else "")
-            today = date.today()
-            start = today - timedelta(days=13)
-            workout_logs = (
-                db.query(WorkoutDailyLog)
-                .filter(WorkoutDailyLog.user_id == user.id, WorkoutDailyLog.log_date >= start.isoformat())
-                .all()
-            )
-            completion_rate_14d = (sum(1 for r in workout_logs if bool(getattr(r, "completed", False))) / 14.0) if workout_logs else 0.0
-            recent_lookup = {str(getattr(r, "log_date", "")): bool(getattr(r, "completed", False)) for r in workout_logs}
-            streak = 0
-            cursor = today
-            while recent_lookup.get(cursor.isoformat(), False):
-                streak += 1
-                cursor = cursor - timedelta(days=1)
+            metrics = get_adherence_metrics(db, int(user.id))
             profile_data = {
                 "weight_kg": float(profile_weight) if profile_weight is not None else 70,
                 "level": profile_level,
@@ -440,12 +439,14 @@ async def get_weekly_workout_plan(
                 "age": getattr(profile, "age", None),
                 "health_diseases": getattr(profile, "health_diseases", "") or "",
                 "injured_body_parts": list(dict.fromkeys(_split_csv(getattr(profile, "health_diseases", "")) + report_injuries)),
-                "workout_completion_rate_14d": completion_rate_14d,
-                "workout_streak_days": streak,
+                "workout_completion_rate_14d": metrics["adherence_rate_14d"],
+                "workout_streak_days": metrics["workout_streak_days"],
             }
             
-            new_plan = generate_weekly_workout_plan(profile_data)
-            weekly_workout_plans[str(user.id)] = new_plan
+            plan_key = str(user.id)
+            new_plan = await _plan_flights.run(
+                (plan_key, _profile_signature(profile_data)), _generate_and_store, plan_key, profile_data
+            )
             
             return {
                 "weekly_workout_plan": new_plan,
@@ -533,8 +534,9 @@ async def get_public_weekly_workout_plan(force_refresh: bool = False):
         
         if should_update:
             # Generate new plan
-            new_plan = generate_weekly_workout_plan(profile_data)
-            weekly_workout_plans["demo"] = new_plan
+            new_plan = await _plan_flights.run(
+                ("demo", _profile_signature(profile_data)), _generate_and_store, "demo", profile_data
+            )
             
             return {
                 "weekly_workout_plan": new_plan,
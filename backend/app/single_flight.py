@@ -0,0 +1,43 @@
+"""
+Single-flight request coalescing: concurrent callers with the same key share one in-flight call.
+
+The call runs in the threadpool, so a slow synchronous generator (weekly meal/workout plans) no
+longer blocks the event loop, and the dashboard's parallel requests for the same user and plan
+signature wait on one generation instead of each starting their own.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable
+
+from starlette.concurrency import run_in_threadpool
+
+
+class SingleFlight:
+    """Per-process registry of in-flight calls, keyed by caller-chosen keys."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Task"] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        task = self._calls.get(key)
+        return task is not None and not task.done()
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn(*args, **kwargs) in the threadpool, or join the identical call already running.
+
+        Every caller awaits through asyncio.shield, so a disconnecting client never cancels the
+        shared call for the others. Errors propagate to all joined callers.
+        """
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(run_in_threadpool(fn, *args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so an error nobody awaited is not logged as unhandled
@@ -0,0 +1,144 @@
+"""Eager warmup of the heavy in-process singletons (chatbot, diet KNN, exercise data, food index).
+
+Each component is loaded at most once: concurrent callers of `warm_up` or `ensure` wait on the
+same per-component lock instead of building a second copy. A failed load is retried by the next
+`ensure` or `/ready` probe once its backoff has elapsed. Load state and timings are kept in
+`status()` and exposed through the `/ready` endpoint.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def _load_chatbot():
+    from .chatbot_logic import get_chatbot
+    return get_chatbot()
+
+
+def _load_diet_knn():
+    # Importing logic fits the food scaler/KNN and the diet recommendation KNN
+    from . import logic
+    logic.knn.kneighbors(logic.scaler.transform(logic.df_food[logic.NUTRIENTS].head(1)))
+    return logic.knn
+
+
+def _load_exercise_indexes():
+    from . import logic
+    from .routers import exercises
+    return {"logic": len(logic.df_ex), "router": len(exercises.df)}
+
+
+def _load_food_index():
+    from . import logic
+    index = logic.get_food_index()
+    index.mentions("warmup")  # compiles the mention automaton
+    logic.get_food_micronutrients()
+    return index
+
+
+# name -> (loader, required for readiness)
+COMPONENTS: Dict[str, Tuple[Callable[[], object], bool]] = {
+    "chatbot": (_load_chatbot, True),
+    "diet_knn": (_load_diet_knn, True),
+    "exercise_indexes": (_load_exercise_indexes, True),
+    "food_index": (_load_food_index, False),
+}
+
+# Backoff before retrying a failed load: doubles per attempt, capped
+RETRY_BASE_S = 5.0
+RETRY_MAX_S = 300.0
+
+_state: Dict[str, Dict] = {
+    name: {"status": "pending", "required": required, "load_ms": None, "error": None,
+           "attempts": 0, "retry_at": None}
+    for name, (_, required) in COMPONENTS.items()
+}
+_locks: Dict[str, threading.Lock] = {name: threading.Lock() for name in COMPONENTS}
+_started_at: Optional[float] = None
+_finished_at: Optional[float] = None
+_retry_thread: Optional[threading.Thread] = None
+_retry_lock = threading.Lock()
+
+
+def _retry_due(entry: Dict) -> bool:
+    return entry["status"] == "failed" and time.time() >= (entry["retry_at"] or 0.0)
+
+
+def ensure(name: str) -> bool:
+    """Load one component if it is not loaded yet; returns True when it is ready.
+
+    A failed component is loaded again once its backoff has elapsed.
+    """
+    loader, _ = COMPONENTS[name]
+    entry = _state[name]
+    if entry["status"] == "ready":
+        return True
+    with _locks[name]:
+        if entry["status"] == "ready" or (entry["status"] == "failed" and not _retry_due(entry)):
+            return entry["status"] == "ready"
+        entry["status"] = "loading"
+        entry["attempts"] += 1
+        t0 = time.perf_counter()
+        try:
+            loader()
+            entry["status"] = "ready"
+            entry["error"] = None
+            entry["retry_at"] = None
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = f"{type(e).__name__}: {e}"
+            backoff = min(RETRY_MAX_S, RETRY_BASE_S * (2 ** (entry["attempts"] - 1)))
+            entry["retry_at"] = time.time() + backoff
+            print(f"⚠ Warmup of {name} failed (attempt {entry['attempts']}, retry in {backoff:.0f}s): {entry['error']}")
+        entry["load_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+    return entry["status"] == "ready"
+
+
+def retry_failed() -> Optional[threading.Thread]:
+    """Reload failed components whose backoff has elapsed, in the background.
+
+    Called from the `/ready` probe so readiness recovers without a restart; at most one
+    retry thread runs at a time.
+    """
+    global _retry_thread
+    due = [name for name, entry in _state.items() if _retry_due(entry)]
+    if not due:
+        return None
+    with _retry_lock:
+        if _retry_thread is not None and _retry_thread.is_alive():
+            return None
+        _retry_thread = threading.Thread(target=warm_up, args=(due,), name="warmup-retry", daemon=True)
+        _retry_thread.start()
+        return _retry_thread
+
+
+def warm_up(names: Optional[List[str]] = None) -> Dict:
+    global _started_at, _finished_at
+    if _started_at is None:
+        _started_at = time.time()
+    for name in names or list(COMPONENTS):
+        ensure(name)
+    if all(e["status"] in ("ready", "failed") for e in _state.values()):
+        _finished_at = _finished_at or time.time()
+    return status()
+
+
+def start_background_warmup() -> threading.Thread:
+    thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready() -> bool:
+    return all(e["status"] == "ready" for e in _state.values() if e["required"])
+
+
+def status() -> Dict:
+    total_ms = None
+    if _started_at is not None and _finished_at is not None:
+        total_ms = round((_finished_at - _started_at) * 1000.0, 1)
+    return {
+        "ready": is_ready(),
+        "total_ms": total_ms,
+        "components": {name: dict(entry) for name, entry in _state.items()},
+    }
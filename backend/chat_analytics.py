@@ -0,0 +1,83 @@
+"""
+INCREMENTAL ANALYTICS FOR THE CONVERSATIONAL CHATBOT
+Counters, rating sums and per-topic tallies updated as messages and feedback arrive,
+plus per-minute and per-hour rollups for windowed queries.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+MINUTE_BUCKETS_KEPT = 24 * 60  # one day of per-minute rollups
+HOUR_BUCKETS_KEPT = 30 * 24    # thirty days of per-hour rollups
+
+_FIELDS = ("conversations", "messages", "user_messages", "feedback", "rating_sum")
+
+
+def _empty() -> Dict[str, int]:
+    return {name: 0 for name in _FIELDS}
+
+
+class ChatAnalytics:
+    """Running totals plus bounded time-bucketed rollups; every update is O(1)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[str, int] = _empty()
+        self.topics: Counter = Counter()
+        self._minutes: "OrderedDict[int, Dict[str, int]]" = OrderedDict()
+        self._hours: "OrderedDict[int, Dict[str, int]]" = OrderedDict()
+
+    def _bump(self, now: Optional[float] = None, **deltas: int) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            for rollup, width, kept in ((self._minutes, 60, MINUTE_BUCKETS_KEPT), (self._hours, 3600, HOUR_BUCKETS_KEPT)):
+                key = int(now // width)
+                bucket = rollup.get(key)
+                if bucket is None:
+                    bucket = rollup[key] = _empty()
+                    while len(rollup) > kept:
+                        rollup.popitem(last=False)
+                for name, delta in deltas.items():
+                    bucket[name] += delta
+            for name, delta in deltas.items():
+                self.totals[name] += delta
+
+    def record_conversation(self, now: Optional[float] = None) -> None:
+        self._bump(now, conversations=1)
+
+    def record_message(self, role: str, topic: Optional[str] = None, now: Optional[float] = None) -> None:
+        self._bump(now, messages=1, user_messages=1 if role == 'user' else 0)
+        if topic and role == 'assistant':
+            with self._lock:
+                self.topics[topic] += 1
+
+    def record_feedback(self, rating: int, now: Optional[float] = None) -> None:
+        self._bump(now, feedback=1, rating_sum=int(rating))
+
+    def window(self, seconds: int, now: Optional[float] = None) -> Dict[str, float]:
+        """Sum the rollups covering the last `seconds` (minute buckets up to a day, hour buckets beyond)."""
+        now = time.time() if now is None else now
+        width, rollup = (60, self._minutes) if seconds <= MINUTE_BUCKETS_KEPT * 60 else (3600, self._hours)
+        first = int((now - seconds) // width) + 1
+        out = _empty()
+        with self._lock:
+            # At most MINUTE_BUCKETS_KEPT / HOUR_BUCKETS_KEPT buckets, so this is bounded work
+            for key, bucket in rollup.items():
+                if key >= first:
+                    for name in _FIELDS:
+                        out[name] += bucket[name]
+        return self._with_average(out)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            totals = dict(self.totals)
+            topics = dict(self.topics.most_common())
+        return {**self._with_average(totals), "topics": topics}
+
+    @staticmethod
+    def _with_average(counts: Dict[str, int]) -> Dict:
+        out: Dict = dict(counts)
+        out["average_rating"] = round(counts["rating_sum"] / counts["feedback"], 2) if counts["feedback"] else 0
+        return out
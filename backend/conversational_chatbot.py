@@ -3,12 +3,14 @@ BASIC CONVERSATIONAL CHATBOT IMPLEMENTATION
 Phase 1: Conversation Management + Basic Follow-up Questions
 """
 
-import json
+import os
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from app.chatbot_logic import answer_fitness_question
+from chat_analytics import ChatAnalytics
+from session_store import create_session_store, MessageArchive, DEFAULT_ARCHIVE_PATH
 
 @dataclass
 class Message:
@@ -16,6 +18,17 @@ class Message:
     content: str
     timestamp: datetime
     metadata: Optional[Dict] = None
+    seq: int = 0  # position in the session, used as the history pagination cursor
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Message":
+        return cls(
+            role=data['role'],
+            content=data['content'],
+            timestamp=datetime.fromisoformat(str(data['timestamp'])),
+            metadata=data.get('metadata'),
+            seq=int(data.get('seq', 0))
+        )
 
 @dataclass
 class ConversationState:
@@ -25,6 +38,8 @@ class ConversationState:
     context: Dict[str, Any]
     current_topic: Optional[str]
     last_activity: datetime
+    total_messages: int = 0  # including messages spilled to the archive
+    summary: Dict[str, Any] = field(default_factory=dict)  # rolling context of archived turns
     
     def to_dict(self):
         return {
@@ -33,17 +48,41 @@ class ConversationState:
             'messages': [asdict(msg) for msg in self.messages],
             'context': self.context,
             'current_topic': self.current_topic,
-            'last_activity': self.last_activity.isoformat()
+            'last_activity': self.last_activity.isoformat(),
+            'total_messages': self.total_messages,
+            'summary': self.summary
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ConversationState":
+        return cls(
+            user_id=data['user_id'],
+            session_id=data['session_id'],
+            messages=[Message.from_dict(m) for m in data.get('messages', [])],
+            context=data.get('context') or {},
+            current_topic=data.get('current_topic'),
+            last_activity=datetime.fromisoformat(data['last_activity']),
+            total_messages=int(data.get('total_messages', len(data.get('messages', [])))),
+            summary=data.get('summary') or {}
+        )
+
 class ConversationalChatbot:
     """
     Basic conversational chatbot with follow-up questions
     """
     
     def __init__(self):
-        self.conversations = {}  # session_id -> ConversationState
-        self.session_timeout = 30 * 60  # 30 minutes
+        # session_id -> ConversationState; bounded LRU with idle TTL (memory or SQLite, see session_store)
+        self.conversations = create_session_store(ConversationState.to_dict, ConversationState.from_dict)
+        self.session_timeout = self.conversations.ttl_seconds
+        # Only the most recent messages stay in the session; older ones spill to the archive
+        self.max_recent_messages = int(os.getenv("CHAT_HISTORY_RECENT", 20))
+        self.history_retention = int(os.getenv("CHAT_HISTORY_RETENTION_DAYS", 7)) * 24 * 3600
+        self.archive = MessageArchive(os.getenv("CHAT_HISTORY_DB", str(DEFAULT_ARCHIVE_PATH)))
+        # The TTL sweeper also drops archived messages past the retention window
+        self.conversations.start_sweeper(on_sweep=lambda: self.archive.prune(self.history_retention))
+        self.summary_topics = 5
+        self.analytics = ChatAnalytics()
         
         # Response templates
         self.greetings = [
@@ -68,11 +107,16 @@ class ConversationalChatbot:
     
     def get_or_create_conversation(self, user_id: str, session_id: Optional[str] = None) -> str:
         """Get existing conversation or create new one"""
+        return self._conversation_for(user_id, session_id).session_id
+
+    def _conversation_for(self, user_id: str, session_id: Optional[str] = None) -> ConversationState:
+        """Load the session's state with a single store read, creating it when missing"""
         if not session_id:
             session_id = str(uuid.uuid4())
         
-        if session_id not in self.conversations:
-            self.conversations[session_id] = ConversationState(
+        conversation = self.conversations.get(session_id)
+        if conversation is None:
+            conversation = ConversationState(
                 user_id=user_id,
                 session_id=session_id,
                 messages=[],
@@ -80,8 +124,36 @@ class ConversationalChatbot:
                 current_topic=None,
                 last_activity=datetime.now()
             )
+            self.conversations.put(session_id, conversation)
+            self.analytics.record_conversation()
         
-        return session_id
+        return conversation
+    
+    def add_message(self, conversation: ConversationState, message: Message):
+        """Append to the ring buffer, spilling the oldest messages to the archive"""
+        message.seq = conversation.total_messages
+        conversation.total_messages += 1
+        conversation.messages.append(message)
+        self.analytics.record_message(message.role, (message.metadata or {}).get('topic'))
+        overflow = len(conversation.messages) - self.max_recent_messages
+        if overflow > 0:
+            for old in conversation.messages[:overflow]:
+                self.archive.append(conversation.session_id, old.seq, asdict(old))
+                self._summarize(conversation, old)
+            del conversation.messages[:overflow]
+    
+    def _summarize(self, conversation: ConversationState, message: Message):
+        """Fold an archived message into the session's compact rolling summary"""
+        summary = conversation.summary
+        summary['archived_messages'] = summary.get('archived_messages', 0) + 1
+        summary.setdefault('started_at', message.timestamp.isoformat())
+        topic = (message.metadata or {}).get('topic')
+        if topic:
+            topics = [t for t in summary.get('topics', []) if t != topic]
+            topics.append(topic)
+            summary['topics'] = topics[-self.summary_topics:]
+        if message.role == 'user':
+            summary['last_archived_question'] = message.content[:200]
     
     def is_greeting(self, message: str) -> bool:
         """Check if message is a greeting"""
@@ -191,8 +263,8 @@ class ConversationalChatbot:
     def process_message(self, user_id: str, message: str, session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process user message and generate response"""
         # Get or create conversation
-        session_id = self.get_or_create_conversation(user_id, session_id)
-        conversation = self.conversations[session_id]
+        conversation = self._conversation_for(user_id, session_id)
+        session_id = conversation.session_id
         
         # Add user message
         user_message = Message(
@@ -200,7 +272,7 @@ class ConversationalChatbot:
             content=message,
             timestamp=datetime.now()
         )
-        conversation.messages.append(user_message)
+        self.add_message(conversation, user_message)
         
         # Generate response
         response_content = ""
@@ -255,8 +327,10 @@ class ConversationalChatbot:
                 'topic': conversation.current_topic
             }
         )
-        conversation.messages.append(assistant_message)
+        self.add_message(conversation, assistant_message)
         conversation.last_activity = datetime.now()
+        # Write back so persistent stores see the new turn and the LRU/TTL position is refreshed
+        self.conversations.put(session_id, conversation)
         
         return {
             'session_id': session_id,
@@ -264,36 +338,43 @@ class ConversationalChatbot:
             'follow_up_questions': follow_up_questions,
             'suggestions': suggestions,
             'topic': conversation.current_topic,
-            'conversation_length': len(conversation.messages)
+            'conversation_length': conversation.total_messages
         }
     
-    def get_conversation_history(self, session_id: str) -> Optional[Dict]:
-        """Get conversation history"""
-        if session_id not in self.conversations:
+    def get_conversation_history(self, session_id: str, cursor: Optional[int] = None, limit: Optional[int] = None) -> Optional[Dict]:
+        """Get one page of conversation history, newest first by page, oldest first within a page.
+        
+        Without a cursor the page ends at the latest message; pass the returned next_cursor to
+        walk back into older (archived) messages.
+        """
+        conversation = self.conversations.get(session_id)
+        if conversation is None:
             return None
         
-        conversation = self.conversations[session_id]
+        limit = limit or self.max_recent_messages
+        end = conversation.total_messages if cursor is None else max(0, min(cursor, conversation.total_messages))
+        page = [asdict(msg) for msg in conversation.messages if msg.seq < end][-limit:]
+        buffer_start = conversation.messages[0].seq if conversation.messages else conversation.total_messages
+        if len(page) < limit and min(end, buffer_start) > 0:
+            older = self.archive.page(session_id, min(end, buffer_start), limit - len(page))
+            page = older + page
+        first_seq = page[0]['seq'] if page else 0
+        
         return {
             'session_id': session_id,
-            'messages': [asdict(msg) for msg in conversation.messages],
+            'messages': page,
             'context': conversation.context,
             'current_topic': conversation.current_topic,
-            'last_activity': conversation.last_activity.isoformat()
+            'last_activity': conversation.last_activity.isoformat(),
+            'total_messages': conversation.total_messages,
+            'summary': conversation.summary,
+            'next_cursor': first_seq if first_seq > 0 else None
         }
     
     def cleanup_expired_sessions(self):
-        """Remove expired conversations"""
-        current_time = datetime.now()
-        expired_sessions = []
-        
-        for session_id, conversation in self.conversations.items():
-            if current_time - conversation.last_activity > timedelta(seconds=self.session_timeout):
-                expired_sessions.append(session_id)
-        
-        for session_id in expired_sessions:
-            del self.conversations[session_id]
-        
-        return len(expired_sessions)
+        """Remove expired conversations (the store's sweeper also does this in the background)"""
+        self.archive.prune(self.history_retention)
+        return self.conversations.expire()
 
 # Global instance
 conversational_chatbot = ConversationalChatbot()
@@ -302,9 +383,9 @@ def process_conversational_message(user_id: str, message: str, session_id: Optio
     """Main function to process conversational messages"""
     return conversational_chatbot.process_message(user_id, message, session_id)
 
-def get_conversation_history(session_id: str) -> Optional[Dict]:
+def get_conversation_history(session_id: str, cursor: Optional[int] = None, limit: Optional[int] = None) -> Optional[Dict]:
     """Get conversation history"""
-    return conversational_chatbot.get_conversation_history(session_id)
+    return conversational_chatbot.get_conversation_history(session_id, cursor, limit)
 
 if __name__ == "__main__":
     # Test the conversational chatbot
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Move legacy adherence JSON columns (completed_item_ids_json / extra_foods_json) into the
+adherence_completed_items and adherence_extra_foods child tables.
+Rows are read through the API's own parser, so the stored payload does not change. Safe to re-run.
+Usage:
+  python scripts/backfill_adherence_items.py                # every user
+  python scripts/backfill_adherence_items.py --user 42      # a single user
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import or_  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import AdherenceCompletedItem, AdherenceExtraFood, AdherenceLog  # noqa: E402
+from app.routers.adherence import _payload_from_row  # noqa: E402
+
+BATCH_SIZE = 500
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user", type=int, action="append", help="only backfill these user ids")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        query = db.query(AdherenceLog).filter(
+            or_(AdherenceLog.completed_item_ids_json != "[]", AdherenceLog.extra_foods_json != "[]")
+        )
+        if args.user:
+            query = query.filter(AdherenceLog.user_id.in_(sorted(set(args.user))))
+        t0 = time.perf_counter()
+        migrated = 0
+        while True:
+            rows = query.order_by(AdherenceLog.id).limit(BATCH_SIZE).all()
+            if not rows:
+                break
+            for row in rows:
+                payload = _payload_from_row(row)
+                row.completed_items = [
+                    AdherenceCompletedItem(user_id=row.user_id, log_date=row.log_date, position=i, item_id=str(item_id))
+                    for i, item_id in enumerate(payload.completed_item_ids)
+                ]
+                row.extra_foods = [
+                    AdherenceExtraFood(
+                        user_id=row.user_id, log_date=row.log_date, position=i, name=x.name, calories=float(x.calories or 0)
+                    )
+                    for i, x in enumerate(payload.extra_foods)
+                ]
+                row.completed_item_ids_json = "[]"
+                row.extra_foods_json = "[]"
+            db.commit()
+            migrated += len(rows)
+        print(f"✅ Moved item lists of {migrated} adherence rows to child tables in {time.perf_counter() - t0:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
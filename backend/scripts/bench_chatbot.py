@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Replay benchmark for the dataset-first fitness chatbot.
+Replays every question from fitness_qa_enhanced.csv and fitness_related_questions.csv,
+plus a deterministic typo-perturbed variant of each, through answer_fitness_question.
+Reports p50/p95/p99 latency, throughput, cache hit ratios and answer-stability diffs
+against a stored baseline. Runs fully offline (only the local CSV datasets are read) and
+with PYTHONHASHSEED pinned to 0 unless already set.
+Usage:
+  python scripts/bench_chatbot.py                      # run and compare with baseline (stored on the first run)
+  python scripts/bench_chatbot.py --update-baseline    # run and store answers as the new baseline
+  python scripts/bench_chatbot.py --limit 200 --repeat 2 --show-diffs 5
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app import chatbot_logic  # noqa: E402
+
+QA_FILES = [
+    BACKEND_DIR / "app" / "fitness_qa_enhanced.csv",
+    BACKEND_DIR / "app" / "fitness_related_questions.csv",
+]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "chatbot_bench_baseline.json"
+
+
+def load_questions(limit: int = 0) -> List[str]:
+    seen = set()
+    questions: List[str] = []
+    for path in QA_FILES:
+        if not path.exists():
+            continue
+        df = pd.read_csv(path)
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        if "question" not in df.columns:
+            continue
+        for q in df["question"].dropna().astype(str):
+            q = q.strip()
+            if q and q not in seen:
+                seen.add(q)
+                questions.append(q)
+    return questions[:limit] if limit else questions
+
+
+def perturb(question: str, rng: random.Random) -> str:
+    """Introduce one keyboard-style typo (swap, drop or double a letter) per longer word."""
+    words = question.split()
+    out = []
+    for w in words:
+        if len(w) > 3 and w.isalpha() and rng.random() < 0.5:
+            i = rng.randrange(1, len(w) - 1)
+            op = rng.choice(["swap", "drop", "double"])
+            if op == "swap":
+                w = w[:i] + w[i + 1] + w[i] + w[i + 2:]
+            elif op == "drop":
+                w = w[:i] + w[i + 1:]
+            else:
+                w = w[:i] + w[i] + w[i:]
+        out.append(w)
+    return " ".join(out)
+
+
+def build_workload(questions: List[str], seed: int, typos: bool) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    workload = [("original", q) for q in questions]
+    if typos:
+        for q in questions:
+            variant = perturb(q, rng)
+            if variant != q:
+                workload.append(("typo", variant))
+    return workload
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def answer_hash(answer: str) -> str:
+    return hashlib.sha1(answer.encode("utf-8")).hexdigest()
+
+
+def run(workload: List[Tuple[str, str]], repeat: int) -> Tuple[Dict[str, str], Dict[str, List[float]], float]:
+    answers: Dict[str, str] = {}
+    latencies: Dict[str, List[float]] = {"original": [], "typo": []}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for kind, q in workload:
+            t0 = time.perf_counter()
+            try:
+                a = chatbot_logic.answer_fitness_question(q)
+            except Exception as e:  # a crash is a regression worth recording, not a reason to stop
+                a = f"<error: {type(e).__name__}: {e}>"
+            latencies[kind].append((time.perf_counter() - t0) * 1000.0)
+            answers.setdefault(f"{kind}::{q}", a)
+    return answers, latencies, time.perf_counter() - start
+
+
+def print_latency(label: str, values: List[float]) -> None:
+    if not values:
+        return
+    s = sorted(values)
+    print(
+        f"  {label:<9} n={len(s):<6} p50={percentile(s, 50):8.2f}ms  p95={percentile(s, 95):8.2f}ms  "
+        f"p99={percentile(s, 99):8.2f}ms  max={s[-1]:8.2f}ms"
+    )
+
+
+def compare_baseline(answers: Dict[str, str], baseline_path: Path, show_diffs: int) -> None:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    stored = baseline.get("answers", {})
+    common = [k for k in answers if k in stored]
+    changed = [k for k in common if answer_hash(answers[k]) != stored[k]["sha1"]]
+    missing = [k for k in stored if k not in answers]
+    added = [k for k in answers if k not in stored]
+    stable = (1 - len(changed) / len(common)) * 100 if common else 100.0
+    print(f"\nAnswer stability vs baseline ({baseline.get('created_at', 'unknown')}):")
+    print(f"  compared={len(common)} changed={len(changed)} stable={stable:.2f}% new={len(added)} missing={len(missing)}")
+    for key in changed[:show_diffs]:
+        old = stored[key].get("answer", "").splitlines()
+        new = answers[key].splitlines()
+        print(f"\n--- {key}")
+        for line in difflib.unified_diff(old, new, "baseline", "current", lineterm="", n=1):
+            print(f"  {line}")
+
+
+def write_baseline(answers: Dict[str, str], baseline_path: Path) -> None:
+    payload = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "answers": {k: {"sha1": answer_hash(a), "answer": a} for k, a in answers.items()},
+    }
+    baseline_path.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
+    print(f"\nBaseline written to {baseline_path} ({len(answers)} answers)")
+
+
+def main():
+    # Ties in the chatbot's fuzzy matching are broken by set iteration order, which
+    # follows Python's randomized string hashing; pin it so diffs reflect code changes.
+    if os.environ.get("PYTHONHASHSEED") is None:
+        os.environ["PYTHONHASHSEED"] = "0"
+        os.execv(sys.executable, [sys.executable, *sys.argv])
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=0, help="only replay the first N unique questions")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the workload N times (warm-cache passes)")
+    parser.add_argument("--seed", type=int, default=13, help="seed for the typo perturbation")
+    parser.add_argument("--no-typos", action="store_true", help="skip the typo-perturbed variant set")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--show-diffs", type=int, default=10, help="number of changed answers to diff")
+    args = parser.parse_args()
+
+    questions = load_questions(args.limit)
+    workload = build_workload(questions, args.seed, typos=not args.no_typos)
+
+    t0 = time.perf_counter()
+    bot = chatbot_logic.get_chatbot()
+    build_ms = (time.perf_counter() - t0) * 1000.0
+
+    answers, latencies, elapsed = run(workload, max(1, args.repeat))
+    total = sum(len(v) for v in latencies.values())
+
+    print(f"\nChatbot build: {build_ms:.1f}ms")
+    print(f"Replayed {total} questions ({len(questions)} unique, {len(workload) - len(questions)} typo variants) in {elapsed:.2f}s")
+    print(f"Throughput: {total / elapsed if elapsed else 0.0:.1f} questions/s")
+    print("Latency:")
+    print_latency("all", latencies["original"] + latencies["typo"])
+    print_latency("original", latencies["original"])
+    print_latency("typo", latencies["typo"])
+
+    print("Cache hit ratios:")
+    if not bot.cache_stats:
+        print("  (no cache activity recorded)")
+    for name, stats in sorted(bot.cache_stats.items()):
+        lookups = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / lookups * 100 if lookups else 0.0
+        print(f"  {name:<16} hits={stats['hits']:<6} misses={stats['misses']:<6} ratio={ratio:.1f}%")
+
+    if args.update_baseline or not args.baseline.exists():
+        # Without a stored baseline, this run's answers become the one later runs compare with
+        write_baseline(answers, args.baseline)
+    else:
+        compare_baseline(answers, args.baseline, args.show_diffs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Precompute archetype base diet plans for the most common profile archetypes.
+Stored plans land in the shared plan_cache table, so every worker serves those users with a
+portion overlay instead of running the full recommendation pipeline.
+Usage:
+  python scripts/precompute_archetype_plans.py            # top 50 archetypes over all profiles
+  python scripts/precompute_archetype_plans.py --top 200
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app import logic  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Profile  # noqa: E402
+from app.routers.nutrition import _build_user_data_from_profile  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=50, help="number of most common archetypes to build")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        counts = Counter()
+        skipped = 0
+        for profile in db.query(Profile).all():
+            key = logic.archetype_key(_build_user_data_from_profile(profile))
+            if key is None:
+                skipped += 1
+            else:
+                counts[key] += 1
+    finally:
+        db.close()
+
+    top = counts.most_common(args.top)
+    covered = sum(n for _, n in top)
+    t0 = time.perf_counter()
+    for key, _ in top:
+        logic.get_archetype_plan(key)
+    print(f"✅ Built {len(top)} archetype plans in {time.perf_counter() - t0:.2f}s "
+          f"covering {covered} profiles ({skipped} with meal preferences use the full pipeline)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Rebuild the materialized adherence_rollups rows from raw adherence and workout logs.
+Run after deploying the rollup table, or whenever logs were changed outside the API.
+Usage:
+  python scripts/rebuild_adherence_rollups.py             # every user with any log
+  python scripts/rebuild_adherence_rollups.py --user 42   # a single user
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import AdherenceLog, WorkoutDailyLog  # noqa: E402
+from app.routers.adherence import refresh_adherence_rollup  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user", type=int, action="append", help="only rebuild these user ids")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.user:
+            user_ids = sorted(set(args.user))
+        else:
+            ids = {r[0] for r in db.query(AdherenceLog.user_id).distinct()}
+            ids |= {r[0] for r in db.query(WorkoutDailyLog.user_id).distinct()}
+            user_ids = sorted(ids)
+        t0 = time.perf_counter()
+        for user_id in user_ids:
+            refresh_adherence_rollup(db, user_id)
+        print(f"✅ Rebuilt adherence rollups for {len(user_ids)} users in {time.perf_counter() - t0:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
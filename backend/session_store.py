@@ -0,0 +1,327 @@
+"""
+SESSION STORES FOR THE CONVERSATIONAL CHATBOT
+Bounded session storage: max-size LRU eviction, idle TTL and background expiry.
+
+Stored values only need a `last_activity` datetime attribute. Both stores support the
+dict-style access the API layer already uses (`in`, `[]`, `del`, `len`, `values()`).
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_TTL_SECONDS = 30 * 60
+DEFAULT_SWEEP_SECONDS = 60
+DEFAULT_SQLITE_PATH = Path(__file__).resolve().parent / "storage" / "chat_sessions.sqlite3"
+DEFAULT_ARCHIVE_PATH = Path(__file__).resolve().parent / "storage" / "chat_history.sqlite3"
+
+
+def _activity_ts(value: Any) -> float:
+    last = getattr(value, "last_activity", None)
+    return last.timestamp() if isinstance(last, datetime) else time.time()
+
+
+class SessionStore:
+    """Base class: subclasses implement get/put/delete/expire/keys/__len__."""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def get(self, session_id: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def put(self, session_id: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop sessions idle for longer than the TTL; returns how many were removed."""
+        raise NotImplementedError
+
+    def keys(self) -> List[str]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def values(self) -> Iterator[Any]:
+        for session_id in self.keys():
+            value = self.get(session_id)
+            if value is not None:
+                yield value
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __getitem__(self, session_id: str) -> Any:
+        value = self.get(session_id)
+        if value is None:
+            raise KeyError(session_id)
+        return value
+
+    def __setitem__(self, session_id: str, value: Any) -> None:
+        self.put(session_id, value)
+
+    def __delitem__(self, session_id: str) -> None:
+        if not self.delete(session_id):
+            raise KeyError(session_id)
+
+    def _is_expired(self, value: Any, now: float) -> bool:
+        return now - _activity_ts(value) > self.ttl_seconds
+
+    def start_sweeper(
+        self, interval_seconds: int = DEFAULT_SWEEP_SECONDS, on_sweep: Optional[Callable[[], Any]] = None
+    ) -> None:
+        """Run expire() (and on_sweep, if given) periodically in a daemon thread (idempotent)."""
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._stop.clear()
+
+            def _loop():
+                while not self._stop.wait(interval_seconds):
+                    try:
+                        removed = self.expire()
+                        if removed:
+                            print(f"Session sweeper expired {removed} conversations")
+                        if on_sweep is not None:
+                            on_sweep()
+                    except Exception as e:
+                        print(f"⚠ Session sweeper error: {e}")
+
+            self._sweeper = threading.Thread(target=_loop, name="chat-session-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop.set()
+
+
+class InMemorySessionStore(SessionStore):
+    """LRU-ordered dict with a deadline heap so expiry only touches sessions that are due."""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        super().__init__(max_sessions, ttl_seconds)
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+        self._deadlines: List[Tuple[float, str]] = []  # (expires_at, session_id), lazily corrected
+        self._scheduled: Dict[str, float] = {}
+
+    def _schedule(self, session_id: str, value: Any) -> None:
+        if session_id in self._scheduled:
+            return  # an earlier deadline is queued; expire() re-checks and re-queues it
+        deadline = _activity_ts(value) + self.ttl_seconds
+        self._scheduled[session_id] = deadline
+        heapq.heappush(self._deadlines, (deadline, session_id))
+
+    def _forget(self, session_id: str) -> bool:
+        """Drop a session and its deadline; compacts the heap once stale entries dominate."""
+        found = self._items.pop(session_id, None) is not None
+        if self._scheduled.pop(session_id, None) is not None and len(self._deadlines) > 2 * len(self._scheduled) + 64:
+            self._deadlines = [(deadline, sid) for sid, deadline in self._scheduled.items()]
+            heapq.heapify(self._deadlines)
+        return found
+
+    def get(self, session_id: str) -> Optional[Any]:
+        with self._lock:
+            value = self._items.get(session_id)
+            if value is None:
+                return None
+            if self._is_expired(value, time.time()):
+                self._forget(session_id)
+                return None
+            self._items.move_to_end(session_id)
+            return value
+
+    def put(self, session_id: str, value: Any) -> None:
+        with self._lock:
+            self._items[session_id] = value
+            self._items.move_to_end(session_id)
+            self._schedule(session_id, value)
+            while len(self._items) > self.max_sessions:
+                self._forget(next(iter(self._items)))
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._forget(session_id)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                deadline, session_id = heapq.heappop(self._deadlines)
+                if self._scheduled.get(session_id) != deadline:
+                    continue
+                del self._scheduled[session_id]
+                value = self._items.get(session_id)
+                if value is None:
+                    continue
+                if self._is_expired(value, now):
+                    del self._items[session_id]
+                    removed += 1
+                else:
+                    self._schedule(session_id, value)
+        return removed
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._items.keys())
+
+    def values(self) -> Iterator[Any]:
+        with self._lock:
+            return iter(list(self._items.values()))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions persisted in SQLite so they survive restarts and are shared across workers."""
+
+    def __init__(
+        self,
+        path: Path,
+        dumps: Callable[[Any], Dict],
+        loads: Callable[[Dict], Any],
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ):
+        super().__init__(max_sessions, ttl_seconds)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._dumps = dumps
+        self._loads = loads
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " user_id TEXT,"
+            " last_activity REAL NOT NULL,"
+            " payload TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_chat_sessions_activity ON chat_sessions(last_activity)")
+
+    def get(self, session_id: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_activity, payload FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl_seconds:
+            return None
+        return self._loads(json.loads(row[1]))
+
+    def put(self, session_id: str, value: Any) -> None:
+        payload = json.dumps(self._dumps(value), default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO chat_sessions (session_id, user_id, last_activity, payload) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET user_id = excluded.user_id, "
+                "last_activity = excluded.last_activity, payload = excluded.payload",
+                (session_id, getattr(value, "user_id", None), _activity_ts(value), payload),
+            )
+            # LRU bound: keep only the most recently active max_sessions rows
+            self._conn.execute(
+                "DELETE FROM chat_sessions WHERE session_id IN ("
+                " SELECT session_id FROM chat_sessions ORDER BY last_activity DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+        return cur.rowcount > 0
+
+    def expire(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM chat_sessions WHERE last_activity < ?", (now - self.ttl_seconds,)
+            )
+        return cur.rowcount
+
+    def keys(self) -> List[str]:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id FROM chat_sessions WHERE last_activity >= ? ORDER BY last_activity", (cutoff,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def __len__(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM chat_sessions WHERE last_activity >= ?", (cutoff,)
+            ).fetchone()[0]
+
+
+class MessageArchive:
+    """Append-only SQLite archive for messages that fell out of a session's recent-history buffer."""
+
+    def __init__(self, path: Path = DEFAULT_ARCHIVE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_history ("
+            " session_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " archived_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, seq))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_chat_history_archived ON chat_history(archived_at)")
+
+    def append(self, session_id: str, seq: int, message: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_history (session_id, seq, payload, archived_at) VALUES (?, ?, ?, ?)",
+                (session_id, seq, json.dumps(message, default=str), time.time()),
+            )
+
+    def page(self, session_id: str, before_seq: int, limit: int) -> List[Dict]:
+        """Up to `limit` archived messages with seq < before_seq, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM chat_history WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+                (session_id, before_seq, limit),
+            ).fetchall()
+        return [json.loads(r[0]) for r in reversed(rows)]
+
+    def delete_session(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_history WHERE session_id = ?", (session_id,))
+
+    def prune(self, older_than_seconds: float) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM chat_history WHERE archived_at < ?", (time.time() - older_than_seconds,)
+            )
+        return cur.rowcount
+
+
+def create_session_store(dumps: Callable[[Any], Dict], loads: Callable[[Dict], Any]) -> SessionStore:
+    """Build the store selected by CHAT_SESSION_STORE ("memory" or "sqlite")."""
+    kind = os.getenv("CHAT_SESSION_STORE", "memory").lower()
+    max_sessions = int(os.getenv("CHAT_SESSION_MAX", DEFAULT_MAX_SESSIONS))
+    ttl_seconds = int(os.getenv("CHAT_SESSION_TTL", DEFAULT_TTL_SECONDS))
+    if kind == "sqlite":
+        path = Path(os.getenv("CHAT_SESSION_DB", str(DEFAULT_SQLITE_PATH)))
+        return SQLiteSessionStore(path, dumps, loads, max_sessions, ttl_seconds)
+    return InMemorySessionStore(max_sessions, ttl_seconds)
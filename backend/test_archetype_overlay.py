@@ -0,0 +1,52 @@
+"""
+Archetype overlay: scaled plans keep servings within the cap and still total the user's calories.
+Run: python -m pytest -q test_archetype_overlay.py
+"""
+
+import os
+import sys
+
+os.environ.setdefault("DB_DRIVER", "sqlite")
+os.environ.setdefault("SQLITE_URL", "sqlite:///:memory:")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import logic  # noqa: E402
+
+# Heavy, tall and very active: the archetype's servings hit MAX_SERVING_G when scaled up
+HEAVY_USER = {
+    "height_cm": 190, "weight_kg": 140, "motive": "weight loss", "diet_type": "non-vegetarian",
+    "lifestyle_level": "very active", "diseases": "", "allergies": "", "age": 25, "gender": "male",
+}
+
+
+def _item(name, kcal_per_100g, serving_g, meal_target):
+    return {"food_name": name, "calories": kcal_per_100g, "serving_g": serving_g,
+            "protein_g": 10.0, "carbs_g": 20.0, "fat_g": 5.0, "meal_target_calories": meal_target}
+
+
+def test_scale_plan_spreads_capped_calories():
+    plan = [_item("Big", 100, 700, 700), _item("Small", 100, 200, 200)]
+    scaled = logic.scale_plan(plan, 1.5)
+    assert scaled[0]["serving_g"] == logic.MAX_SERVING_G
+    assert sum(m["serving_g"] for m in scaled) == 1350
+    assert [m["meal_target_calories"] for m in scaled] == [800, 550]
+
+
+def test_scale_plan_item_caps_meal_target_with_serving():
+    item = logic.scale_plan_item(_item("Big", 100, 700, 700), 1.5)
+    assert item["serving_g"] == logic.MAX_SERVING_G
+    assert item["meal_target_calories"] == 800
+
+
+def test_heavy_user_overlay_hits_daily_target():
+    base = logic.get_archetype_plan(logic.archetype_key(HEAVY_USER))
+    result = logic.apply_archetype_overlay(base, HEAVY_USER)
+    target = logic.daily_calorie_target(
+        HEAVY_USER["weight_kg"], HEAVY_USER["height_cm"], HEAVY_USER["lifestyle_level"],
+        HEAVY_USER["motive"], HEAVY_USER["age"], HEAVY_USER["gender"],
+    )
+    assert result["daily_calories"] == target
+    for totals in [result["diet_totals"], *result["alternative_meal_plans"]]:
+        assert abs(totals["daily_calories"] - target) / target < 0.01
+    for plan in [result["diet"], *(p["plan_meals"] for p in result["alternative_meal_plans"])]:
+        assert all(m["serving_g"] <= logic.MAX_SERVING_G for m in plan)
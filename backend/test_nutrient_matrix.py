@@ -0,0 +1,52 @@
+"""
+Nutrient matrix: per-plan nutrient profiles from (food, grams) servings in one multiply.
+Run: python -m pytest -q test_nutrient_matrix.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.food_index import FoodNameIndex  # noqa: E402
+from app.nutrient_matrix import NUTRIENT_KEYS, NutrientMatrix, profile_dict  # noqa: E402
+
+
+def _matrix():
+    df = pd.DataFrame({
+        "food": ["Mixed dal", "Boiled rice", "Paneer tikka"],
+        "calories": [120, 130, 280],
+        "protein": [7, 2.7, 18],
+        "carbs": [18, 28, 6],
+        "fat": [2, 0.3, 20],
+        "sodium (mg)": [300, 1, 450],
+    })
+    return NutrientMatrix(df, FoodNameIndex(df["food"].tolist()))
+
+
+def test_profiles_sum_servings_per_100g():
+    matrix = _matrix()
+    profiles = matrix.profiles([[("Mixed dal", 200), ("Boiled rice", 150)], [("Paneer tikka", 100)]])
+    first, second = profile_dict(profiles[0]), profile_dict(profiles[1])
+    assert first["calories"] == round(120 * 2 + 130 * 1.5, 1)
+    assert first["protein_g"] == round(7 * 2 + 2.7 * 1.5, 1)
+    assert second["sodium_mg"] == 450
+    # Columns missing from the catalog are zero rather than an error
+    assert second["iron_mg"] == 0
+
+
+def test_unknown_foods_and_empty_plans_contribute_nothing():
+    matrix = _matrix()
+    profiles = matrix.profiles([[("Unobtainium stew", 300)], []])
+    assert np.allclose(profiles, 0)
+    assert matrix.profiles([]).shape == (0, len(NUTRIENT_KEYS))
+
+
+def test_row_falls_back_to_substring_match():
+    matrix = _matrix()
+    assert matrix.row("mixed dal") == 0
+    assert matrix.row("paneer") == 2
+    assert matrix.row("paneer", fuzzy=False) is None
@@ -0,0 +1,66 @@
+"""
+Rolling plan horizon: rolling drops past days and computes only new ones, and asking for more
+weeks than the window holds never widens it.
+Run: python -m pytest -q test_plan_horizon.py
+"""
+
+import os
+import sys
+from datetime import timedelta
+
+os.environ.setdefault("DB_DRIVER", "sqlite")
+os.environ.setdefault("SQLITE_URL", "sqlite:///:memory:")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.routers.weekly_meal_plan import (  # noqa: E402
+    PlanHorizon,
+    _plan_context,
+    _week_start,
+    build_weekly_plan,
+)
+
+PROFILE = {
+    "weight_kg": 72, "height_cm": 165, "lifestyle_level": "moderate", "motive": "weight loss",
+    "age": 34, "gender": "female", "diet_type": "vegetarian", "health_diseases": "",
+    "food_allergies": "", "breakfast": "poha", "lunch": "", "snacks": "", "dinner": "",
+    "target_area": "", "water_consumption_l": 2.5,
+}
+
+
+def _horizon(weeks=2):
+    plan, inputs = build_weekly_plan(PROFILE, week_start=_week_start())
+    return PlanHorizon.from_week(_plan_context(PROFILE), plan, inputs, weeks)
+
+
+def _dump(plan):
+    return plan.model_dump(exclude={"last_updated"})
+
+
+def test_roll_computes_only_new_days():
+    horizon = _horizon()
+    assert horizon.materialize(horizon.end) == 7
+    second_week = _dump(horizon.week(horizon.start + timedelta(days=7))[0])
+
+    assert horizon.roll(horizon.start + timedelta(days=7)) == 7
+    assert min(horizon.days) == horizon.start
+    assert horizon.pending(horizon.end) == 7
+    assert horizon.materialize(horizon.end) == 7
+    assert _dump(horizon.week(horizon.start)[0]) == second_week
+
+
+def test_roll_to_same_week_is_a_no_op():
+    horizon = _horizon()
+    horizon.materialize(horizon.end)
+    assert horizon.roll(horizon.start + timedelta(days=3)) == 0
+    assert len(horizon.days) == 14
+
+
+def test_weeks_ahead_does_not_widen_window():
+    horizon = _horizon(weeks=2)
+    plans = horizon.weeks_ahead(4)
+    assert len(plans) == 4
+    assert horizon.weeks == 2
+    assert max(horizon.days) == horizon.end
+
+    wide = _horizon(weeks=4)
+    assert [_dump(p) for p in plans] == [_dump(p) for p in wide.weeks_ahead(4)]
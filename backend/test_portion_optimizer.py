@@ -0,0 +1,108 @@
+"""
+Portion optimizer: bounded portions, calorie/protein targets, and no compounding on re-runs.
+Run: python -m pytest -q test_portion_optimizer.py
+"""
+
+import os
+import sys
+
+os.environ.setdefault("DB_DRIVER", "sqlite")
+os.environ.setdefault("SQLITE_URL", "sqlite:///:memory:")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.portion_optimizer import (  # noqa: E402
+    MealTargets,
+    OPTIONAL_LEVELS,
+    PORTION_LEVELS,
+    PortionCandidate,
+    day_targets,
+    optimize_day,
+    optimize_meal,
+)
+from app.routers.weekly_meal_plan import (  # noqa: E402
+    MealItem,
+    finish_day,
+    optimize_portions,
+    select_foods_for_target,
+)
+
+MIN_PORTION, MAX_PORTION = min(PORTION_LEVELS), max(PORTION_LEVELS)
+
+
+def _item(name, calories, protein, carbs, fats, portion=1.0):
+    return MealItem(name=name, calories=calories, protein=protein, carbs=carbs, fats=fats,
+                    preparation_time=10, difficulty="easy", portion=portion)
+
+
+def _day_slots():
+    return {
+        "breakfast": [_item("Oats", 150, 5, 27, 3), _item("Boiled egg", 78, 6, 1, 5)],
+        "lunch": [_item("Dal", 180, 9, 25, 4), _item("Jeera rice", 210, 4, 40, 4)],
+        "snacks": [_item("Apple", 95, 0.5, 25, 0.3)],
+        "dinner": [_item("Paneer bhurji", 260, 14, 6, 20), _item("Roti", 120, 3, 24, 1)],
+    }
+
+
+def test_optimize_meal_uses_bounded_levels():
+    candidates = [PortionCandidate(200, 8, 30, 5), PortionCandidate(100, 2, 20, 1, optional=True)]
+    multipliers = optimize_meal(candidates, MealTargets(400, 15))
+    assert multipliers[0] in PORTION_LEVELS
+    assert multipliers[1] in OPTIONAL_LEVELS
+
+
+def test_optimize_day_hits_calorie_target():
+    meals = {
+        "breakfast": [PortionCandidate(150, 5, 27, 3), PortionCandidate(78, 6, 1, 5)],
+        "lunch": [PortionCandidate(180, 9, 25, 4), PortionCandidate(210, 4, 40, 4)],
+        "snacks": [PortionCandidate(95, 0.5, 25, 0.3)],
+        "dinner": [PortionCandidate(260, 14, 6, 20), PortionCandidate(120, 3, 24, 1)],
+    }
+    multipliers = optimize_day(meals, day_targets(1600, 60))
+    total = sum(c.calories * m for meal, cands in meals.items() for c, m in zip(cands, multipliers[meal]))
+    assert abs(total - 1600) / 1600 < 0.10
+
+
+def test_finish_day_stays_near_targets():
+    day = finish_day(_day_slots(), 1800, 70)
+    assert abs(day.total_calories - 1800) / 1800 < 0.10
+    assert day.total_protein >= 70 * 0.8
+
+
+def test_portions_stay_within_absolute_bounds():
+    slots = _day_slots()
+    for target in (900, 1800, 3200):
+        optimized = optimize_portions(slots, target, target / 25)
+        for items in optimized.values():
+            for item in items:
+                assert MIN_PORTION <= item.portion <= MAX_PORTION, (target, item.name, item.portion)
+
+
+def test_reoptimizing_output_does_not_compound_portions():
+    plan = _day_slots()
+    for _ in range(3):
+        plan = optimize_portions(plan, 3200, 120)
+        for items in plan.values():
+            for item in items:
+                assert MIN_PORTION <= item.portion <= MAX_PORTION, (item.name, item.portion)
+
+
+def test_scaled_input_is_bounded_by_listed_serving():
+    # An item that already carries a 1.5x portion may only reach 2.0x of its listed serving
+    slots = {"breakfast": [_item("Oats", 225, 7.5, 40.5, 4.5, portion=1.5)]}
+    optimized = optimize_portions(slots, 4000, 150)
+    oats = next(i for i in optimized["breakfast"] if i.name == "Oats")
+    assert oats.portion <= MAX_PORTION
+    assert oats.calories <= 150 * MAX_PORTION + 1
+
+
+def test_select_foods_for_target_keeps_listed_serving():
+    foods = [
+        {"name": "Poha", "calories": 250, "protein": 5, "carbs": 45, "fat": 6},
+        {"name": "Sprouts", "calories": 100, "protein": 6, "carbs": 12, "fat": 2},
+        {"name": "Milk", "calories": 120, "protein": 6, "carbs": 10, "fat": 5},
+    ]
+    selected = select_foods_for_target(foods, 600, 20)
+    assert selected
+    assert all(item.portion == 1.0 for item in selected)
+    listed = {f["name"]: f["calories"] for f in foods}
+    assert all(item.calories == listed[item.name] for item in selected)
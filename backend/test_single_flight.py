@@ -0,0 +1,64 @@
+"""
+Single-flight coalescing: concurrent callers with one key share a single call.
+Run: python -m pytest -q test_single_flight.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.single_flight import SingleFlight  # noqa: E402
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+    lock = threading.Lock()
+
+    def slow(value):
+        with lock:
+            calls.append(value)
+        time.sleep(0.05)
+        return value * 2
+
+    async def main():
+        return await asyncio.gather(*(flights.run("k", slow, 21) for _ in range(5)))
+
+    assert asyncio.run(main()) == [42] * 5
+    assert calls == [21]
+    assert not flights.in_flight("k")
+
+
+def test_distinct_keys_run_separately_and_errors_reach_every_caller():
+    flights = SingleFlight()
+
+    def boom():
+        time.sleep(0.02)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(
+            flights.run("a", boom), flights.run("a", boom), flights.run("b", lambda: "ok"),
+            return_exceptions=True,
+        )
+        return results
+
+    first, second, third = asyncio.run(main())
+    assert isinstance(first, ValueError) and first is second
+    assert third == "ok"
+
+
+def test_finished_call_is_not_reused():
+    flights = SingleFlight()
+    counter = iter(range(10))
+
+    async def main():
+        a = await flights.run("k", lambda: next(counter))
+        b = await flights.run("k", lambda: next(counter))
+        return a, b
+
+    assert asyncio.run(main()) == (0, 1)
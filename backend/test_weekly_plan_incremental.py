@@ -0,0 +1,72 @@
+"""
+Incremental weekly plan updates: allergens stay out and portions stay bounded across edits,
+and a weight edit lands where a full rebuild does.
+Run: python -m pytest -q test_weekly_plan_incremental.py
+"""
+
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("DB_DRIVER", "sqlite")
+os.environ.setdefault("SQLITE_URL", "sqlite:///:memory:")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.portion_optimizer import PORTION_LEVELS  # noqa: E402
+from app.routers.weekly_meal_plan import (  # noqa: E402
+    MEAL_SLOTS,
+    WEEK_DAYS,
+    build_weekly_plan,
+    update_weekly_plan,
+)
+
+MAX_PORTION = max(PORTION_LEVELS)
+
+PROFILE = {
+    "weight_kg": 72, "height_cm": 165, "lifestyle_level": "moderate", "motive": "weight loss",
+    "age": 34, "gender": "female", "diet_type": "vegetarian", "health_diseases": "",
+    "food_allergies": "", "breakfast": "poha", "lunch": "", "snacks": "", "dinner": "",
+    "target_area": "", "water_consumption_l": 2.5,
+}
+
+
+def _items(plan):
+    return [item for day in WEEK_DAYS for meal in MEAL_SLOTS for item in getattr(plan.meals[day], meal)]
+
+
+def _foods(plan):
+    return [[item.name for meal in MEAL_SLOTS for item in getattr(plan.meals[day], meal)] for day in WEEK_DAYS]
+
+
+@pytest.mark.parametrize("allergen", ["sprouts", "phulka"])
+@pytest.mark.parametrize("delta", [-4, -2, 2, 4])
+def test_allergen_stays_out_after_portion_edit(allergen, delta):
+    plan, inputs = build_weekly_plan(PROFILE)
+    profile = dict(PROFILE, food_allergies=allergen)
+    plan, inputs = update_weekly_plan(plan, inputs, ("allergies",), profile)
+    profile = dict(profile, weight_kg=PROFILE["weight_kg"] + delta)
+    plan, inputs = update_weekly_plan(plan, inputs, ("portions",), profile)
+    leaks = [item.name for item in _items(plan) if allergen in item.name.lower()]
+    assert not leaks
+    assert allergen in inputs.avoid_tokens
+
+
+def test_repeated_weight_edits_keep_portions_bounded():
+    plan, inputs = build_weekly_plan(PROFILE)
+    for weight in (76, 80, 76, 72):
+        plan, inputs = update_weekly_plan(plan, inputs, ("portions",), dict(PROFILE, weight_kg=weight))
+        assert all(item.portion <= MAX_PORTION for item in _items(plan))
+        assert all(item.portion == 1.0 for day in inputs.slots.values() for items in day.values() for item in items)
+
+
+def test_weight_edit_matches_full_rebuild():
+    plan, inputs = build_weekly_plan(PROFILE)
+    profile = dict(PROFILE, weight_kg=75)
+    updated, _ = update_weekly_plan(plan, inputs, ("portions",), profile)
+    full, full_inputs = build_weekly_plan(profile)
+    # Same foods as before the edit, and each day as close to the new target as a rebuild gets
+    assert _foods(updated) == _foods(plan)
+    for day in WEEK_DAYS:
+        target = full_inputs.daily_calories
+        assert abs(updated.meals[day].total_calories - target) <= max(abs(full.meals[day].total_calories - target), target * 0.10)